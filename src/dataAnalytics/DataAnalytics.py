@@ -1,28 +1,41 @@
 #!/usr/bin/env python3
 
 import logging
+import numpy as np
 
-from typing      import Dict, List, Union, Any, Tuple
-from collections import Counter
+from typing      import Dict, List, Union, Any, Tuple, Iterator
 from pymongo     import MongoClient
 from datetime    import datetime as dt
 from datetime    import timedelta
 
+from dataStorage   import ReviewStorage, PersonStorage, ResultSink
+from dataAnalytics import FilmAccumulators, FilmAggregations
+
 # Класс для аналитической обработки полученных данных,
 #   находящихся в MongoDB
 class DataAnalytics(object):
     
     # Значения конфигурационного файла по умолчанию
     DefaultConfigParameters = {
-        'pathMongoDB'      : 'mongodb://localhost:27017/',
-        'databaseName'     : 'userReviews',
-        'dataPathFilms'    : 'films',
-	    'dataPathReviews'  : 'reviews',
-        'dataPathAnalytic' : 'analytic',
-        'reviewWindowSize' : 5,
-        'reviewValueUp'    : 5
+        'pathMongoDB'         : 'mongodb://localhost:27017/',
+        'databaseName'        : 'userReviews',
+        'dataPathFilms'       : 'films',
+        'dataPathPersons'     : 'persons',
+        'dataPathFilmPersons' : 'filmPersons',
+	    'dataPathReviews'     : 'reviews',
+        'dataPathReviewItems' : 'reviewItems',
+        'reviewLayout'        : 'embedded',
+        'dataPathAnalytic'    : 'analytic',
+        'analyticBatchSize'   : 1000,
+        'analyticBackend'     : 'python',
+        'resultBatchSize'     : 500,
+        'reviewWindowSize'    : 5,
+        'reviewValueUp'       : 5
     }
 
+    # Порядковый номер дня 01.01.1970 (начало отсчёта datetime64)
+    EpochOrdinal = dt(1970, 1, 1).toordinal()
+
     # Инициализация класса
     def __init__(self):       
         self.configFile         = './src/dataAnalytics/analyticConfigFile.txt'   
@@ -31,6 +44,9 @@ class DataAnalytics(object):
         self.collectionFilms    = None
         self.collectionReviews  = None
         self.collectionAnalytic = None
+        self.reviewStorage      = None
+        self.personStorage      = None
+        self.resultSink         = None
 
         logging.basicConfig(
             filename = './log/dataAnalytic.log',
@@ -74,88 +90,13 @@ class DataAnalytics(object):
 
     # Добавление новой информации в MongoDB
     def infoToMongoDB(self, nameParam: str, info: List[Any]):
-        if self.collectionAnalytic.find_one({ 'nameParam' : nameParam }) is None:
-            self.collectionAnalytic.insert_one({ 'nameParam' : nameParam, 'valuesParam' : info })
-            
-        else:
-             self.collectionAnalytic.update_one({ 'nameParam' : nameParam },
-                                                { '$set' : { 'valuesParam' : info }})
-
-        return
-
-    # Подсчёт количества одного параметра по всем фильмам / сериалам и запись результата в MongoDB
-    def countFilmParam(self, param: str, flag = True):       
-        paramDict = Counter()
-        for film in self.collectionFilms.find():
-            if flag:
-                for elem in film[param]:               
-                    paramDict[elem] += 1
-                    
-            else:
-                paramDict[film[param]] += 1  
-        
-        self.infoToMongoDB(param, sorted(list(paramDict.items()), 
-                                         key = lambda X: X[1], reverse = True))       
-        return
-
-    # Подсчёт количества некоторых параметров по всем фильмам / сериалам
-    def countFilmParamToDB(self):
-        self.countFilmParam('genres')
-        self.countFilmParam('countries')
-        self.countFilmParam('year', False)
-        return
-
-    # Информация по рейтингу фильмов / сериалов
-    def countFilmRating(self):       
-        filmRating = []
-        for film in self.collectionFilms.find():
-            filmRating.append((film['nameRU'], film['ratingValue'], film['ratingCount']))
-        
-        filmRatingValue = sorted(filmRating, key = lambda X: X[1], reverse = True)
-        filmRatingCount = sorted(filmRating, key = lambda X: X[2], reverse = True)
-        
-        self.infoToMongoDB('filmRating', [filmRatingValue, filmRatingCount])
-        return
-    
-    # Информация по продолжительности фильмов / сериалов
-    def countFilmTime(self):       
-        filmTime = []
-        for film in self.collectionFilms.find():
-            timeForEpisode = film['timeForEpisode']
-            episodesCount  = film['episodesCount']
-            filmTime.append((film['nameRU'], timeForEpisode, episodesCount, timeForEpisode * episodesCount))
-
-        timeForEpisodeList = sorted(filmTime, key = lambda elem: elem[1], reverse = True)
-        episodesCountList  = sorted(filmTime, key = lambda elem: elem[2], reverse = True)
-        allTimeList        = sorted(filmTime, key = lambda elem: elem[3], reverse = True)
-        
-        self.infoToMongoDB('filmTime', [timeForEpisodeList, episodesCountList, allTimeList])
+        self.resultSink.put(nameParam, info)
         return
 
-    # Подсчёт количества средней пользовательской оценки для некоторого участника съёмочной группы
+    # Подсчёт количества средней пользовательской оценки для некоторого участника съёмочной группы;
+    #   счётчики ведутся при скачивании фильмов / сериалов, поэтому рейтинг читается по индексу
     def countFilmPerson(self, typeOfPersons: str):
-        personIDAndName   = {}
-        personIDAndRating = {}       
-        personRatingList  = []
-        for film in self.collectionFilms.find():           
-            filmRatingValue = film['ratingValue']
-            for person in film[typeOfPersons]:
-                personID = person['_id']
-                if personID not in personIDAndName:
-                    personIDAndName  [personID] = person['name']
-                    personIDAndRating[personID] = []
-                
-                personIDAndRating[personID].append(filmRatingValue)
-        
-        for (personID, personRating) in personIDAndRating.items():           
-            personFilmCount = len(personRating)
-            personRatingAvg = round(sum(personRating) / personFilmCount, 3)
-
-            personRatingList.append((personID, personIDAndName[personID],
-                                 personRatingAvg, personFilmCount))
-        
-        personRatingList.sort(key = lambda X: X[2], reverse = True)
-        
+        personRatingList = self.personStorage.personRanking(typeOfPersons)
         self.infoToMongoDB(typeOfPersons, personRatingList)
         return
 
@@ -166,58 +107,100 @@ class DataAnalytics(object):
         self.countFilmPerson('actors')
         return
 
-    # Сохранение информации о пользовательских оценках ко всем фильмам / сериалам
-    def countFilmReview(self):
+    # Названия фильмов / сериалов по списку ID одним запросом
+    def filmNames(self, filmIDs: List[int]) -> Dict[int, str]:
+        return { film['_id'] : film['nameRU'] for film in
+                 self.collectionFilms.find({ '_id' : { '$in' : filmIDs }}, { 'nameRU' : 1 }) }
+
+    # Информация об оценках для пакета записей об отзывах; названия фильмов / сериалов
+    #   запрашиваются для всего пакета сразу
+    def reviewCountBatch(self, reviews: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        if len(reviews) == 0:
+            return []
+
+        filmNames   = self.filmNames([review['_id'] for review in reviews])
         reviewCount = []
-        for review in self.collectionReviews.find():
+        for review in reviews:
             reviewPercWithoutNeut = (
                 round((review['countGood'] + review['countNeutral'] // 2) / review['reviewMax'] * 100, 3),
                 round( review['countGood'] / (review['reviewMax'] - review['countNeutral'])     * 100, 3),
             )
-            
-            filmName = '?'
-            cursorFilmName = self.collectionFilms.find_one({ '_id' : review['_id']})
-            if cursorFilmName is not None:
-                filmName = cursorFilmName['nameRU']
-                
-            reviewCount.append((review['_id'], filmName, review['reviewMax'], review['reviewPercent'],
-                                review['countGood'], review['countNegative'], reviewPercWithoutNeut))
-        
+
+            reviewCount.append((review['_id'], filmNames.get(review['_id'], '?'), review['reviewMax'],
+                                review['reviewPercent'], review['countGood'], review['countNegative'],
+                                reviewPercWithoutNeut))
+
+        return reviewCount
+
+    # Сохранение информации о пользовательских оценках ко всем фильмам / сериалам;
+    #   из записей об отзывах запрашиваются только счётчики, без самих отзывов
+    def countFilmReview(self):
+        batchSize   = self.configParameters['analyticBatchSize']
+        projection  = { field : 1 for field in ('reviewMax', 'reviewPercent', 'countGood',
+                                                'countNegative', 'countNeutral') }
+        reviewCount = []
+        reviews     = []
+        for review in self.collectionReviews.find({}, projection).batch_size(batchSize):
+            reviews.append(review)
+            if len(reviews) == batchSize:
+                reviewCount += self.reviewCountBatch(reviews)
+                reviews      = []
+
+        reviewCount += self.reviewCountBatch(reviews)
+
         reviewMax      = sorted(reviewCount, key = lambda elem: elem[2], reverse = True)
         reviewPercent  = sorted(reviewCount, key = lambda elem: elem[3], reverse = True)
 
         self.infoToMongoDB('reviewCount', [reviewMax, reviewPercent])       
         return 
 
+    # Начало месяца для даты пользовательского отзыва
+    def monthKey(self, date: dt) -> dt:
+        return dt(date.year, date.month, 1)
+
+    # Начало дня для даты пользовательского отзыва
+    def dayKey(self, date: dt) -> dt:
+        return dt(date.year, date.month, date.day)
+
+    # Плотная гистограмма количества отзывов по дням или месяцам (unit = 'D' или 'M'):
+    #   смещения дат от базовой даты считаются np.bincount, в результат попадают все
+    #   периоды от базовой даты до последней даты lastDate и периоды позже неё с отзывами
+    @staticmethod
+    def reviewDateHistogram(reviewDays: np.ndarray, baseDate: dt, lastDate: dt,
+                            unit: str) -> List[Tuple[dt, int]]:
+
+        baseKey    = np.datetime64(baseDate, unit)
+        lastOffset = int((np.datetime64(lastDate, unit) - baseKey).astype(np.int64))
+        offsets    = (reviewDays.astype(f'datetime64[{unit}]') - baseKey).astype(np.int64)
+        counts     = np.bincount(offsets, minlength = lastOffset + 1)
+
+        indexes    = np.flatnonzero((np.arange(len(counts)) <= lastOffset) | (counts > 0))
+        dates      = (baseKey + indexes).astype('datetime64[us]')
+        return list(zip(dates.tolist(), counts[indexes].tolist()))
+
+    # Распределения количества пользовательских оценок по месяцам и по дням; периоды
+    #   без отзывов заполняются нулями от самого раннего отзыва до текущего дня;
+    #   дни отзывов переводятся в datetime64[D] через порядковый номер дня, что намного
+    #   быстрее преобразования каждого datetime средствами NumPy; расчёт не зависит
+    #   от настроек и подключения к MongoDB
+    @staticmethod
+    def reviewDateHistograms(reviews: List[Dict[str, Any]]) -> Tuple[List[Tuple[dt, int]],
+                                                                     List[Tuple[dt, int]]]:
+        reviewDates = [ReviewStorage.ReviewStorage.reviewDateTime(review['dateAndTime']) for review in reviews]
+        reviewDays  = (np.fromiter((date.toordinal() for date in reviewDates), dtype = np.int64,
+                                   count = len(reviewDates)) - DataAnalytics.EpochOrdinal).astype('datetime64[D]')
+        dateNow     = dt.today()
+        datetimeMin = min([dateNow] + reviewDates)
+        lastDate    = datetimeMin + timedelta(days = (dateNow - datetimeMin).days)
+
+        return (DataAnalytics.reviewDateHistogram(reviewDays, datetimeMin, lastDate, 'M'),
+                DataAnalytics.reviewDateHistogram(reviewDays, datetimeMin, lastDate, 'D'))
+
     # Подсчёт распределения количества пользовательских оценок 
     #    по дням и месяцам для определённого фильма / сериала
-    def countReviewDate(self, filmReview: Dict[str, Any]):
-        reviewDateCount    = Counter()
-        reviewDateDayCount = Counter()
-        datetimeMin        = dt.today()
-        for review in filmReview['reviews']:              
-            reviewDateAndTime = dt.strptime(review['dateAndTime'], '%H:%M|%d.%m.%Y')
-            datetimeMin       = min(datetimeMin, reviewDateAndTime)
+    def countReviewDate(self, filmID: int, reviews: List[Dict[str, Any]]):
+        reviewDate, reviewDateDay = self.reviewDateHistograms(reviews)
         
-        dateGenerated = [datetimeMin + timedelta(days = day) 
-                            for day in range(0, (dt.today() - datetimeMin).days + 1)]
-
-        for date in dateGenerated:
-            reviewDateCount[date.strftime('%Y.%m')]       = 0
-            reviewDateDayCount[date.strftime('%Y.%m.%d')] = 0
-            
-        for review in filmReview['reviews']:              
-            reviewDateAndTime = dt.strptime(review['dateAndTime'], '%H:%M|%d.%m.%Y')
-            reviewDateCount[reviewDateAndTime.strftime('%Y.%m')]       += 1
-            reviewDateDayCount[reviewDateAndTime.strftime('%Y.%m.%d')] += 1
-
-        reviewDate = [(dt.strptime(key, '%Y.%m'), value) 
-                       for (key, value) in sorted(reviewDateCount.items())]
-        
-        reviewDateDay = [(dt.strptime(key, '%Y.%m.%d'), value) 
-                          for (key, value) in sorted(reviewDateDayCount.items())]
-        
-        filmID = filmReview['_id']
         self.infoToMongoDB(f'reviewDate/{filmID}', reviewDate)
         self.infoToMongoDB(f'reviewDateDay/{filmID}', reviewDateDay)
         return 
@@ -225,16 +208,15 @@ class DataAnalytics(object):
     # Подсчёт распределения количества пользовательских оценок 
     #    по дням и месяцам для всех фильмов / сериалов
     def countReviewDateToDB(self):
-        for filmReview in self.collectionReviews.find():
-            self.countReviewDate(filmReview)
+        for filmID in self.reviewStorage.getFilmIDs():
+            self.countReviewDate(filmID, list(self.reviewStorage.iterReviews(filmID, ['dateAndTime'])))
             
         return 
 
     # Изменение распределения пользовательских оценок для определённого дня / месяца
-    def changeListReviewDate(self, reviewDateName: str, dateDT: dt, key: str, 
+    def changeListReviewDate(self, reviewDateName: str, dateToKey: dt, 
                              countMax: int, reviewDateList: List[Tuple[dt, int]]) -> bool:       
         flagOver  = True
-        dateToKey = dt.strptime(dateDT.strftime(key), key)
         for i in range(len(reviewDateList)):
             dateKey, value = reviewDateList[i]
             if (dateKey == dateToKey):
@@ -252,16 +234,14 @@ class DataAnalytics(object):
 
     # Обновление распределения пользовательских оценок для определённых дня
     #   и месяца и конкретного фильма / сериала
-    def updateReviewDateToDB(self, date: str, filmID: int, valueUp: int) -> bool:
-        dateDT             = dt.strptime(date, '%H:%M|%d.%m.%Y')
-        
+    def updateReviewDateToDB(self, dateDT: dt, filmID: int, valueUp: int) -> bool:
         reviewDateName     = f'reviewDate/{filmID}'
         reviewDateDayName  = f'reviewDateDay/{filmID}'
         reviewDateWWUpName = f'reviewDateWWUp/{filmID}/{valueUp}'
         
-        reviewDateList     = self.collectionAnalytic.find_one({ 'nameParam' : reviewDateName })
-        reviewDateDayList  = self.collectionAnalytic.find_one({ 'nameParam' : reviewDateDayName })
-        reviewDateWWUpList = self.collectionAnalytic.find_one({ 'nameParam' : reviewDateWWUpName })
+        reviewDateList     = self.resultSink.findOne(reviewDateName)
+        reviewDateDayList  = self.resultSink.findOne(reviewDateDayName)
+        reviewDateWWUpList = self.resultSink.findOne(reviewDateWWUpName)
         
         countMax     = self.configParameters['reviewValueUp'] + 1
         if reviewDateWWUpList is not None:
@@ -270,20 +250,20 @@ class DataAnalytics(object):
         flagDate     = True
         flagDay      = True
         if reviewDateList is not None:
-            flagDate = self.changeListReviewDate(reviewDateName, dateDT, '%Y.%m',
+            flagDate = self.changeListReviewDate(reviewDateName, self.monthKey(dateDT),
                                                  countMax, reviewDateList['valuesParam'])
 
         if reviewDateDayList is not None:
-            flagDay  = self.changeListReviewDate(reviewDateDayName, dateDT, '%Y.%m.%d',
+            flagDay  = self.changeListReviewDate(reviewDateDayName, self.dayKey(dateDT),
                                                  countMax, reviewDateDayList['valuesParam'])
         
         return (flagDate and flagDay)
 
     # Подсчёт распределения количества слов в пользовательских оценках
     #   в зависимости от их класса для конкретного фильма / сериала
-    def reviewLenText(self, filmReview: Dict[str, Any]):       
+    def reviewLenText(self, filmID: int, filmReviews: Iterator[Dict[str, Any]]):       
         reviews = [[], [], []]
-        for review in filmReview['reviews']:
+        for review in filmReviews:
             reviewText = []               
             for symbol in review['reviewText']:
                 newSymbol = ' '
@@ -294,15 +274,14 @@ class DataAnalytics(object):
                                 
             reviews[review['reviewClass']].append(len(''.join(reviewText).split()))
         
-        fiimID = filmReview['_id']
-        self.infoToMongoDB(f'reviewLenText/{fiimID}', reviews)
+        self.infoToMongoDB(f'reviewLenText/{filmID}', reviews)
         return
 
     # Подсчёт распределения количества слов в пользовательских оценках
     #   в зависимости от их класса для всех фильмов / сериалов
     def reviewLenTextToDB(self):
-        for filmReview in self.collectionReviews.find():
-            self.reviewLenText(filmReview)
+        for filmID in self.reviewStorage.getFilmIDs():
+            self.reviewLenText(filmID, self.reviewStorage.iterReviews(filmID, ['reviewText', 'reviewClass']))
             
         return 
 
@@ -329,13 +308,12 @@ class DataAnalytics(object):
     # Построение распределения с медианной фильтрацией количества
     #    пользовательских оценок по месяцам для всех фильмов / сериалов
     def reviewDateWWToDB(self, windowSize: int):
-        for filmReview in self.collectionReviews.find():
-            filmID         = filmReview['_id']
-            reviewDateList = self.collectionAnalytic.find_one({ 'nameParam' : f'reviewDate/{filmID}' })
+        for filmID in self.reviewStorage.getFilmIDs():
+            reviewDateList = self.resultSink.findOne(f'reviewDate/{filmID}')
             if reviewDateList is None:
                 continue
             
-            self.reviewDateWW(filmReview['_id'], windowSize, reviewDateList['valuesParam'])
+            self.reviewDateWW(filmID, windowSize, reviewDateList['valuesParam'])
 
         return
 
@@ -349,22 +327,48 @@ class DataAnalytics(object):
     # Построение распределения, поднятого на некоторое значение, количества 
     #   пользовательских оценок по месяцам для всех фильмов / сериалов
     def reviewDateWWUpToDB(self, windowSize: int, valueUp: int):
-        for filmReview in self.collectionReviews.find():
-            filmID           = filmReview['_id']
+        for filmID in self.reviewStorage.getFilmIDs():
             reviewDateWWName = f'reviewDateWW/{filmID}/{windowSize}'
-            reviewDateWWList = self.collectionAnalytic.find_one({ 'nameParam' : reviewDateWWName })
+            reviewDateWWList = self.resultSink.findOne(reviewDateWWName)
             if reviewDateWWList is None:
                 continue
             
-            self.reviewDateWWUp(filmReview['_id'], valueUp, reviewDateWWList['valuesParam'])
+            self.reviewDateWWUp(filmID, valueUp, reviewDateWWList['valuesParam'])
 
         return
 
-    # Обработка и запись в MongoDB информации обо всех фильмах / сериалах
+    # Накопители для общего прохода по фильмам / сериалам; если фильмы / сериалы были скачаны
+    #   до появления коллекций съёмочной группы, эти коллекции заполняются в том же проходе
+    def filmAccumulators(self) -> List[FilmAccumulators.FilmAccumulator]:
+        accumulators = [
+            FilmAccumulators.ParamAccumulator('genres'),
+            FilmAccumulators.ParamAccumulator('countries'),
+            FilmAccumulators.ParamAccumulator('year', False),
+            FilmAccumulators.RatingAccumulator(),
+            FilmAccumulators.TimeAccumulator()
+        ]
+
+        if self.personStorage.isEmpty():
+            accumulators.append(FilmAccumulators.PersonBackfillAccumulator(self.personStorage))
+
+        return accumulators
+
+    # Обработка и запись в MongoDB информации обо всех фильмах / сериалах: при analyticBackend = 'python'
+    #   за один проход по коллекции, при analyticBackend = 'aggregate' конвейерами агрегации MongoDB
     def filmAnalytics(self):
-        self.countFilmParamToDB()
-        self.countFilmRating()
-        self.countFilmTime()
+        batchSize = self.configParameters['analyticBatchSize']
+        if self.configParameters['analyticBackend'] == 'aggregate':
+            if self.personStorage.isEmpty():
+                self.personStorage.rebuildFromFilms(self.collectionFilms)
+
+            filmResults = FilmAggregations.FilmAggregations(batchSize).run(self.collectionFilms)
+
+        else:
+            filmResults = FilmAccumulators.FilmAnalyticsPass(self.filmAccumulators(), batchSize).run(self.collectionFilms)
+
+        for (nameParam, info) in filmResults:
+            self.infoToMongoDB(nameParam, info)
+
         self.countFilmPersonToDB()
         return
 
@@ -380,7 +384,7 @@ class DataAnalytics(object):
 
     # Тестирование системы на корректное определение "атаки"
     def updateAnalytics(self):
-        dateNow       = dt.now().strftime('%H:%M|%d.%m.%Y')
+        dateNow       = dt.now()
         reviewValueUp = self.configParameters['reviewValueUp']        
         for _ in range(reviewValueUp + 1):
             flagOver  = self.updateReviewDateToDB(dateNow, 435, reviewValueUp)
@@ -400,12 +404,17 @@ class DataAnalytics(object):
         self.collectionFilms    = connectionDB[self.configParameters['dataPathFilms']]
         self.collectionReviews  = connectionDB[self.configParameters['dataPathReviews']]
         self.collectionAnalytic = connectionDB[self.configParameters['dataPathAnalytic']]
+        self.reviewStorage      = ReviewStorage.ReviewStorage(self.configParameters, mongoClient)
+        self.personStorage      = PersonStorage.PersonStorage(self.configParameters, mongoClient)
+        self.resultSink         = ResultSink.ResultSink(self.collectionAnalytic,
+                                                        self.configParameters['resultBatchSize'])
 
         self.filmAnalytics()
         self.reviewAnalytics()
 
         #self.updateAnalytics()
 
+        self.resultSink.close()
         return
 
 if __name__ == '__main__':  
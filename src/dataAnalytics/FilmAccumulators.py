@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+from typing      import Dict, List, Tuple, Any
+from collections import Counter
+
+# Базовый класс накопителя аналитики по фильмам / сериалам: получает фильмы / сериалы
+#   по одному за общий проход по коллекции и в конце возвращает готовые результаты
+class FilmAccumulator(object):
+
+    # Поля фильма / сериала, нужные накопителю
+    fields = []
+
+    # Учёт одного фильма / сериала
+    def add(self, film: Dict[str, Any]):
+        return
+
+    # Результаты накопителя: список пар (название параметра, значение)
+    def results(self) -> List[Tuple[str, Any]]:
+        return []
+
+# Подсчёт количества одного параметра по всем фильмам / сериалам;
+#   flag = True - параметр является списком значений (жанры, страны)
+class ParamAccumulator(FilmAccumulator):
+
+    # Инициализация класса
+    def __init__(self, param: str, flag: bool = True):
+        self.param     = param
+        self.flag      = flag
+        self.fields    = [param]
+
+        self.paramDict = Counter()
+
+    # Учёт одного фильма / сериала
+    def add(self, film: Dict[str, Any]):
+        if self.flag:
+            for elem in film[self.param]:
+                self.paramDict[elem] += 1
+
+        else:
+            self.paramDict[film[self.param]] += 1
+
+        return
+
+    # Значения параметра по убыванию количества (при равенстве - по возрастанию значения)
+    def results(self) -> List[Tuple[str, Any]]:
+        return [(self.param, sorted(list(self.paramDict.items()), key = lambda X: (-X[1], X[0])))]
+
+# Информация по рейтингу фильмов / сериалов
+class RatingAccumulator(FilmAccumulator):
+
+    # Поля фильма / сериала, нужные накопителю
+    fields = ['nameRU', 'ratingValue', 'ratingCount']
+
+    # Инициализация класса
+    def __init__(self):
+        self.filmRating = []
+
+    # Учёт одного фильма / сериала
+    def add(self, film: Dict[str, Any]):
+        self.filmRating.append((film['_id'], (film['nameRU'], film['ratingValue'], film['ratingCount'])))
+        return
+
+    # Фильмы / сериалы по убыванию рейтинга и количества оценок (при равенстве - по возрастанию ID)
+    def results(self) -> List[Tuple[str, Any]]:
+        filmRatingValue = [film for (_, film) in sorted(self.filmRating, key = lambda X: (-X[1][1], X[0]))]
+        filmRatingCount = [film for (_, film) in sorted(self.filmRating, key = lambda X: (-X[1][2], X[0]))]
+        return [('filmRating', [filmRatingValue, filmRatingCount])]
+
+# Информация по продолжительности фильмов / сериалов
+class TimeAccumulator(FilmAccumulator):
+
+    # Поля фильма / сериала, нужные накопителю
+    fields = ['nameRU', 'timeForEpisode', 'episodesCount']
+
+    # Инициализация класса
+    def __init__(self):
+        self.filmTime = []
+
+    # Учёт одного фильма / сериала
+    def add(self, film: Dict[str, Any]):
+        timeForEpisode = film['timeForEpisode']
+        episodesCount  = film['episodesCount']
+        self.filmTime.append((film['_id'], (film['nameRU'], timeForEpisode, episodesCount,
+                                            timeForEpisode * episodesCount)))
+        return
+
+    # Фильмы / сериалы, отсортированные по убыванию одного поля (при равенстве - по возрастанию ID)
+    def sortedFilms(self, index: int) -> List[Tuple[str, int, int, int]]:
+        return [film for (_, film) in sorted(self.filmTime, key = lambda elem: (-elem[1][index], elem[0]))]
+
+    # Фильмы / сериалы по убыванию длительности серии, количества серий и общей длительности
+    def results(self) -> List[Tuple[str, Any]]:
+        timeForEpisodeList = self.sortedFilms(1)
+        episodesCountList  = self.sortedFilms(2)
+        allTimeList        = self.sortedFilms(3)
+        return [('filmTime', [timeForEpisodeList, episodesCountList, allTimeList])]
+
+# Заполнение коллекций съёмочной группы по уже скачанным фильмам / сериалам в том же проходе
+#   (нужно один раз, если фильмы / сериалы были скачаны до появления этих коллекций)
+class PersonBackfillAccumulator(FilmAccumulator):
+
+    # Инициализация класса
+    def __init__(self, personStorage: Any):
+        self.personStorage = personStorage
+        self.fields        = list(personStorage.Roles) + ['ratingValue']
+
+        self.films         = []
+
+    # Учёт одного фильма / сериала: запись пакетами по BatchSize фильмов / сериалов
+    def add(self, film: Dict[str, Any]):
+        self.films.append(film)
+        if len(self.films) == self.personStorage.BatchSize:
+            self.personStorage.filmsToMongoDB(self.films)
+            self.films = []
+
+        return
+
+    # Запись оставшихся фильмов / сериалов; рейтинги затем читаются из коллекции людей / студий
+    def results(self) -> List[Tuple[str, Any]]:
+        self.personStorage.filmsToMongoDB(self.films)
+        self.films = []
+        return []
+
+# Класс одного прохода по коллекции фильмов / сериалов: курсор запрашивает только поля,
+#   нужные накопителям, пакетами по batchSize документов, и каждый фильм / сериал
+#   передаётся всем накопителям; результаты всех накопителей возвращаются в конце
+class FilmAnalyticsPass(object):
+
+    # Инициализация класса
+    def __init__(self, accumulators: List[FilmAccumulator], batchSize: int):
+        self.accumulators = accumulators
+        self.batchSize    = batchSize
+
+    # Проекция с объединением полей всех накопителей
+    def projection(self) -> Dict[str, int]:
+        projection = {}
+        for accumulator in self.accumulators:
+            projection.update({ field : 1 for field in accumulator.fields })
+
+        return projection
+
+    # Проход по коллекции и получение результатов всех накопителей
+    def run(self, collectionFilms: Any) -> List[Tuple[str, Any]]:
+        for film in collectionFilms.find({}, self.projection()).batch_size(self.batchSize):
+            for accumulator in self.accumulators:
+                accumulator.add(film)
+
+        results = []
+        for accumulator in self.accumulators:
+            results += accumulator.results()
+
+        return results
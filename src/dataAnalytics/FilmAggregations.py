@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+from typing import Dict, List, Tuple, Any
+
+# Класс расчёта аналитики по фильмам / сериалам конвейерами агрегации MongoDB:
+#   группировка и сортировка выполняются на сервере (с allowDiskUse для больших групп),
+#   а результаты совпадают с общим проходом по коллекции (FilmAnalyticsPass), включая
+#   порядок при равенстве значений
+class FilmAggregations(object):
+
+    # Инициализация класса
+    def __init__(self, batchSize: int):
+        self.batchSize = batchSize
+
+    # Выполнение конвейера агрегации
+    def aggregate(self, collectionFilms: Any, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(collectionFilms.aggregate(pipeline, allowDiskUse = True, batchSize = self.batchSize))
+
+    # Подсчёт количества одного параметра по всем фильмам / сериалам;
+    #   flag = True - параметр является списком значений (жанры, страны)
+    def countParam(self, collectionFilms: Any, param: str, flag: bool = True) -> List[Tuple[Any, int]]:
+        pipeline  = [{ '$unwind' : f'${param}' }] if flag else []
+        pipeline += [{ '$group'  : { '_id' : f'${param}', 'count' : { '$sum' : 1 }}},
+                     { '$sort'   : { 'count' : -1, '_id' : 1 }}]
+        return [(record['_id'], record['count']) for record in self.aggregate(collectionFilms, pipeline)]
+
+    # Фильмы / сериалы по убыванию одного поля (при равенстве - по возрастанию ID)
+    def sortFilms(self, collectionFilms: Any, fields: Dict[str, Any], sortField: str) -> List[Tuple[Any, ...]]:
+        pipeline = [{ '$project' : fields },
+                    { '$sort'    : { sortField : -1, '_id' : 1 }}]
+        return [tuple(record[field] for field in fields.keys()) for record in self.aggregate(collectionFilms, pipeline)]
+
+    # Информация по рейтингу фильмов / сериалов
+    def filmRating(self, collectionFilms: Any) -> List[List[Tuple[str, float, int]]]:
+        fields = { 'nameRU' : 1, 'ratingValue' : 1, 'ratingCount' : 1 }
+        return [self.sortFilms(collectionFilms, fields, 'ratingValue'),
+                self.sortFilms(collectionFilms, fields, 'ratingCount')]
+
+    # Информация по продолжительности фильмов / сериалов
+    def filmTime(self, collectionFilms: Any) -> List[List[Tuple[str, int, int, int]]]:
+        fields = { 'nameRU'         : 1,
+                   'timeForEpisode' : 1,
+                   'episodesCount'  : 1,
+                   'allTime'        : { '$multiply' : ['$timeForEpisode', '$episodesCount'] }}
+        return [self.sortFilms(collectionFilms, fields, 'timeForEpisode'),
+                self.sortFilms(collectionFilms, fields, 'episodesCount'),
+                self.sortFilms(collectionFilms, fields, 'allTime')]
+
+    # Расчёт всех показателей: список пар (название параметра, значение), как у FilmAnalyticsPass
+    def run(self, collectionFilms: Any) -> List[Tuple[str, Any]]:
+        return [('genres',     self.countParam(collectionFilms, 'genres')),
+                ('countries',  self.countParam(collectionFilms, 'countries')),
+                ('year',       self.countParam(collectionFilms, 'year', False)),
+                ('filmRating', self.filmRating(collectionFilms)),
+                ('filmTime',   self.filmTime(collectionFilms))]
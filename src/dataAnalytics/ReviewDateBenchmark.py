@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+from typing      import Dict, List, Tuple, Union, Any
+from collections import Counter
+from random      import Random
+from time        import perf_counter
+from datetime    import datetime as dt
+from datetime    import timedelta
+
+from dataAnalytics.DataAnalytics import DataAnalytics
+from dataStorage.ReviewStorage   import ReviewStorage
+
+# Прежний расчёт распределений из DataAnalytics.countReviewDate до перехода на NumPy
+#   и даты MongoDB: время отзывов хранится строкой и разбирается strptime, а ключи дней
+#   и месяцев строятся strftime для каждого дня от самого раннего отзыва до текущего дня
+def baselineHistograms(reviews: List[Dict[str, Any]]) -> Tuple[List[Tuple[dt, int]],
+                                                                List[Tuple[dt, int]]]:
+    reviewDateCount    = Counter()
+    reviewDateDayCount = Counter()
+    datetimeMin        = dt.today()
+    for review in reviews:
+        reviewDateAndTime = dt.strptime(review['dateAndTime'], '%H:%M|%d.%m.%Y')
+        datetimeMin       = min(datetimeMin, reviewDateAndTime)
+
+    dateGenerated = [datetimeMin + timedelta(days = day)
+                        for day in range(0, (dt.today() - datetimeMin).days + 1)]
+
+    for date in dateGenerated:
+        reviewDateCount[date.strftime('%Y.%m')]       = 0
+        reviewDateDayCount[date.strftime('%Y.%m.%d')] = 0
+
+    for review in reviews:
+        reviewDateAndTime = dt.strptime(review['dateAndTime'], '%H:%M|%d.%m.%Y')
+        reviewDateCount[reviewDateAndTime.strftime('%Y.%m')]       += 1
+        reviewDateDayCount[reviewDateAndTime.strftime('%Y.%m.%d')] += 1
+
+    reviewDate = [(dt.strptime(key, '%Y.%m'), value)
+                   for (key, value) in sorted(reviewDateCount.items())]
+
+    reviewDateDay = [(dt.strptime(key, '%Y.%m.%d'), value)
+                      for (key, value) in sorted(reviewDateDayCount.items())]
+
+    return (reviewDate, reviewDateDay)
+
+# Класс измерения скорости построения распределений отзывов по месяцам и дням: на синтетических
+#   фильмах / сериалах с benchReviews отзывами за benchYears лет прежний расчёт по строкам
+#   сравнивается с DataAnalytics.reviewDateHistograms для дат MongoDB и для ещё
+#   не перенесённых строк; результаты всех расчётов должны совпадать
+class ReviewDateBenchmark(object):
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.benchFilms   = configParameters['benchFilms']
+        self.benchReviews = configParameters['benchReviews']
+        self.benchYears   = configParameters['benchYears']
+
+        self.generator    = Random(435)
+
+    # Синтетические отзывы к одному фильму / сериалу
+    def generateReviews(self, reviewCount: int) -> List[Dict[str, Any]]:
+        dateNow = dt.today()
+        seconds = self.benchYears * 365 * 24 * 60 * 60
+        return [{ 'dateAndTime' : (dateNow - timedelta(seconds = self.generator.randint(0, seconds))).replace(second = 0,
+                                                                                                      microsecond = 0) }
+                for _ in range(reviewCount)]
+
+    # Главная функция класса
+    def main(self):
+        timeBaseline = 0.0
+        timeNative   = 0.0
+        timeStrings  = 0.0
+        for _ in range(self.benchFilms):
+            reviews       = self.generateReviews(self.benchReviews)
+            reviewStrings = [{ 'dateAndTime' : review['dateAndTime'].strftime(ReviewStorage.DateFormat) }
+                             for review in reviews]
+
+            timeStart     = perf_counter()
+            histograms    = baselineHistograms(reviewStrings)
+            timeBaseline += perf_counter() - timeStart
+
+            timeStart     = perf_counter()
+            native        = DataAnalytics.reviewDateHistograms(reviews)
+            timeNative   += perf_counter() - timeStart
+
+            timeStart     = perf_counter()
+            strings       = DataAnalytics.reviewDateHistograms(reviewStrings)
+            timeStrings  += perf_counter() - timeStart
+
+            if not histograms == native == strings:
+                raise ValueError('Review date histograms are not equal!')
+
+        print(f'\n\t Benchmark: films = {self.benchFilms}, reviews = {self.benchReviews}, years = {self.benchYears}')
+        print(f'\t Baseline       : {timeBaseline / self.benchFilms * 1000:.2f} ms per film')
+        print(f'\t NumPy, dates   : {timeNative   / self.benchFilms * 1000:.2f} ms per film ' +
+              f'({timeBaseline / max(timeNative, 1e-9):.1f}x)')
+        print(f'\t NumPy, strings : {timeStrings  / self.benchFilms * 1000:.2f} ms per film ' +
+              f'({timeBaseline / max(timeStrings, 1e-9):.1f}x)')
+        return
+
+if __name__ == '__main__':
+
+    benchConfigParameters = {
+        'benchFilms'   : 20,
+        'benchReviews' : 10000,
+        'benchYears'   : 20
+    }
+
+    ReviewDateBenchmark(benchConfigParameters).main()
@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 
 from typing import List, Dict, Any
+from datetime import datetime
 from dataclasses import dataclass, field, asdict
 
 #  ласс данных дл¤ хранени¤ информации о пользовательском отзыве
 @dataclass
 class Review:
-    author:      str = '?'
-    reviewClass: int = 0    # 0 - Good; 1 - Neutral; 2 - Negative
-    title:       str = '?'
-    dateAndTime: str = '?'
-    reviewText:  str = '?'
+    author:           str = '?'
+    reviewClass:      int = 0    # 0 - Good; 1 - Neutral; 2 - Negative
+    title:            str = '?'
+    dateAndTime: datetime = datetime.min
+    reviewText:       str = '?'
 
 #  ласс данных дл¤ хранени¤ информации обо всех пользовательских отзывах
 #    к конкретному фильму / сериалу   
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+import asyncio
+import aiohttp
+import logging
+
+from typing       import Dict, List, Tuple, Union, Callable, Awaitable, Any
+from random       import random
+from time         import monotonic
+from urllib.parse import urlsplit
+
+# Класс "корзины токенов" для ограничения частоты запросов к одному хосту
+class TokenBucket(object):
+
+    # Инициализация класса
+    def __init__(self, requestsPerMinute: int, requestBurst: int):
+        self.rate       = requestsPerMinute / 60
+        self.capacity   = requestBurst
+        self.tokens     = requestBurst
+        self.lastUpdate = monotonic()
+        self.lock       = asyncio.Lock()
+
+    # Ожидание, пока в корзине не появится свободный токен
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                timeNow         = monotonic()
+                self.tokens     = min(self.capacity, self.tokens + (timeNow - self.lastUpdate) * self.rate)
+                self.lastUpdate = timeNow
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# Класс асинхронного скачивания страниц с общим ограничением частоты запросов
+#   для каждого хоста и ограничением количества одновременных запросов;
+#   при наличии архива каждая скачанная страница сохраняется в него, а при наличии
+#   регулятора частоты он заменяет "корзины токенов" и меняет частоту по ответам сервиса;
+#   при наличии пула proxy-серверов каждый запрос идёт через выбранный пулом proxy-сервер;
+#   задание с ошибкой соединения или ограничением частоты запросов повторяется после паузы,
+#   растущей с каждой попыткой (не больше jobRetries раз), как в очереди заданий WorkQueue;
+#   ожидание ответа ограничено requestTimeout секундами; в отличие от WorkQueue задания
+#   не записываются в журнал скачивания CrawlJournal, поэтому прерванный асинхронный запуск
+#   не продолжается с невыполненных заданий, а режим 'distributed' не поддерживается
+class AsyncCrawler(object):
+
+    # Пауза в секундах перед первой повторной попыткой задания (удваивается с каждой попыткой)
+    RetryBackoff = 2
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], headers: Dict[str, str],
+                 archive: Any = None, controller: Any = None, proxyPool: Any = None):
+
+        self.requestsPerMinute = configParameters['requestsPerMinute']
+        self.requestBurst      = configParameters['requestBurst']
+        self.concurrency       = configParameters['concurrency']
+        self.jitterTime        = configParameters['jitterTime']
+        self.jobRetries        = configParameters['jobRetries']
+        self.requestTimeout    = configParameters['requestTimeout']
+
+        self.headers           = headers
+        self.archive           = archive
+        self.controller        = controller
+        self.proxyPool         = proxyPool
+
+        self.session           = None
+        self.buckets           = {}
+        self.jobs              = []
+        self.jobQueue          = None
+        self.logger            = logging.getLogger()
+
+    # Получение "корзины токенов" для хоста (отдельной для каждого proxy-сервера)
+    def getBucket(self, url: str, proxyURL: str = None) -> TokenBucket:
+        key = (urlsplit(url).netloc, proxyURL)
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(self.requestsPerMinute, self.requestBurst)
+
+        return self.buckets[key]
+
+    # Скачивание одной страницы: возвращает код ответа и содержимое страницы
+    async def fetch(self, url: str) -> Tuple[int, bytes]:
+        await asyncio.sleep(random() * self.jitterTime)
+        proxy      = self.proxyPool.getProxy() if self.proxyPool is not None else None
+        proxyURL   = proxy['url'] if proxy is not None else None
+        controller = self.controller if proxy is None else proxy['controller']
+        if controller is not None:
+            await asyncio.sleep(controller.reserve())
+
+        else:
+            await self.getBucket(url, proxyURL).acquire()
+
+        timeStart = monotonic()
+        try:
+            async with self.session.get(url, proxy = proxyURL) as response:
+                statusCode, content = response.status, await response.read()
+                responseHeaders     = response.headers
+                responseURL         = str(response.url)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            if proxy is not None:
+                self.proxyPool.report(proxy, monotonic() - timeStart, True)
+
+            raise ConnectionError(str(error))
+
+        flagThrottled = controller is not None and \
+                        controller.report(statusCode, responseHeaders, content, responseURL)
+        if proxy is not None:
+            self.proxyPool.report(proxy, monotonic() - timeStart, flagThrottled)
+
+        if flagThrottled:
+            raise ConnectionError(f'{url} -> Throttled, status {statusCode}')
+
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.store, url, statusCode, content)
+
+        return (statusCode, content)
+
+    # Добавление новых заданий в очередь; можно вызывать и из выполняемого задания
+    def putAll(self, jobs: List[Any]):
+        for job in jobs:
+            if self.jobQueue is None:
+                self.jobs.append((job, 0))
+
+            else:
+                self.jobQueue.put_nowait((job, 0))
+
+        return
+
+    # Обработчик очереди заданий: одновременно выполняется не больше concurrency заданий;
+    #   задание с ошибкой соединения возвращается в очередь после паузы RetryBackoff * 2 ^ attempt
+    #   секунд, а после всех попыток, как и задание с любой другой ошибкой, передаётся в failHandler
+    async def worker(self, handler: Callable[[Any, 'AsyncCrawler'], Awaitable[None]],
+                     failHandler: Callable[[Any], None]):
+        while True:
+            job, attempt = await self.jobQueue.get()
+            try:
+                await handler(job, self)
+
+            except ConnectionError as error:
+                if attempt < self.jobRetries:
+                    await asyncio.sleep((1 + random()) * self.RetryBackoff * 2 ** attempt)
+                    self.jobQueue.put_nowait((job, attempt + 1))
+
+                else:
+                    self.logger.error(f'{job} -> Connection is broken! ({error!r}) | async')
+                    await self.jobFailed(job, failHandler)
+
+            except Exception as error:
+                self.logger.error(f'{job} -> Job is failed: {error!r} | async')
+                await self.jobFailed(job, failHandler)
+
+            finally:
+                self.jobQueue.task_done()
+
+    # Передача невыполненного задания в failHandler (в отдельном потоке, так как он пишет в MongoDB)
+    async def jobFailed(self, job: Any, failHandler: Callable[[Any], None]):
+        if failHandler is None:
+            return
+
+        try:
+            await asyncio.to_thread(failHandler, job)
+
+        except Exception as error:
+            self.logger.error(f'{job} -> Failed job is not registered: {error!r} | async')
+
+        return
+
+    # Выполнение всех заданий очереди, в том числе добавленных во время выполнения
+    async def runJobs(self, handler: Callable[[Any, 'AsyncCrawler'], Awaitable[None]],
+                      failHandler: Callable[[Any], None]):
+        self.jobQueue = asyncio.Queue()
+        for task in self.jobs:
+            self.jobQueue.put_nowait(task)
+
+        self.jobs = []
+        connector = aiohttp.TCPConnector(limit = self.concurrency)
+        timeout   = aiohttp.ClientTimeout(total = self.requestTimeout)
+        async with aiohttp.ClientSession(headers = self.headers, connector = connector,
+                                         timeout = timeout) as self.session:
+            workers = [asyncio.create_task(self.worker(handler, failHandler)) for _ in range(self.concurrency)]
+            await self.jobQueue.join()
+            for task in workers:
+                task.cancel()
+
+            await asyncio.gather(*workers, return_exceptions = True)
+
+        self.jobQueue = None
+        return
+
+    # Главная функция класса, запускающая цикл событий: handler - корутина, принимающая задание
+    #   и AsyncCrawler, failHandler - функция для задания, которое не удалось выполнить
+    def run(self, handler: Callable[[Any, 'AsyncCrawler'], Awaitable[None]],
+            failHandler: Callable[[Any], None] = None):
+        asyncio.run(self.runJobs(handler, failHandler))
+        return
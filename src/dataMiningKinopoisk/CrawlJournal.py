@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import os
+import socket
+
+from typing         import Dict, List, Tuple, Union, Any
+from datetime       import datetime as dt
+from datetime       import timedelta
+from pymongo        import MongoClient, UpdateOne, ReturnDocument, ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+# Класс журнала скачивания: для каждого задания очереди хранится его состояние
+#   ('pending' - ожидает, 'leased' - выполняется до leaseUntil, 'done' - выполнено,
+#   'failed' - не выполнено после всех попыток), поэтому прерванный запуск
+#   продолжается с невыполненных заданий без повторного планирования;
+#   в режиме 'distributed' несколько процессов забирают задания из журнала сами,
+#   продлевают их выполнение "сердцебиением" и подхватывают задания упавших процессов
+class CrawlJournal(object):
+
+    # Размер пакета при добавлении заданий в журнал
+    BatchSize = 1000
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        self.leaseTime  = configParameters['leaseTime']
+
+        self.owner      = f'{socket.gethostname()}/{os.getpid()}'
+
+        self.collection = mongoClient[configParameters['databaseName']][configParameters['dataPathJournal']]
+        self.collection.create_index([('stage', ASCENDING), ('state', ASCENDING), ('leaseUntil', ASCENDING)])
+
+    # Ключ записи журнала: этап и само задание (ID фильма или пара ID фильма и страницы)
+    def jobKey(self, stage: str, job: Any) -> str:
+        return '/'.join([stage] + [str(value) for value in self.jobToList(job)])
+
+    # Преобразование задания в список для хранения в MongoDB
+    def jobToList(self, job: Any) -> List[Any]:
+        return list(job) if isinstance(job, tuple) else [job]
+
+    # Обратное преобразование задания из записи журнала
+    def jobFromList(self, jobList: List[Any]) -> Any:
+        return jobList[0] if len(jobList) == 1 else tuple(jobList)
+
+    # Добавление новых заданий в журнал; уже записанные задания не изменяются
+    def addJobs(self, stage: str, jobs: List[Any]):
+        writeRequests = [UpdateOne({ '_id'          : self.jobKey(stage, job) },
+                                   { '$setOnInsert' : { 'stage'    : stage,
+                                                        'job'      : self.jobToList(job),
+                                                        'state'    : 'pending',
+                                                        'attempts' : 0 }}, upsert = True) for job in jobs]
+
+        for i in range(0, len(writeRequests), self.BatchSize):
+            self.collection.bulk_write(writeRequests[i:i + self.BatchSize], ordered = False)
+
+        return
+
+    # Отметка о начале выполнения задания текущим процессом
+    def leaseJob(self, stage: str, job: Any):
+        self.collection.update_one({ '_id'  : self.jobKey(stage, job) },
+                                   { '$set' : { 'state'      : 'leased',
+                                                'owner'      : self.owner,
+                                                'leaseUntil' : dt.now() + timedelta(seconds = self.leaseTime) },
+                                     '$inc' : { 'attempts'   : 1 }})
+        return
+
+    # Атомарный захват следующего невыполненного задания (в том числе задания упавшего процесса);
+    #   возвращает задание и номер попытки или None, если свободных заданий нет
+    def claimJob(self, stage: str) -> Union[Tuple[Any, int], None]:
+        record = self.collection.find_one_and_update(self.unfinishedQuery(stage),
+                                                     { '$set' : { 'state'      : 'leased',
+                                                                  'owner'      : self.owner,
+                                                                  'leaseUntil' : dt.now() + timedelta(seconds = self.leaseTime) },
+                                                       '$inc' : { 'attempts'   : 1 }},
+                                                     projection = { 'job' : 1, 'attempts' : 1 },
+                                                     return_document = ReturnDocument.AFTER)
+        if record is None:
+            return None
+
+        return (self.jobFromList(record['job']), record['attempts'])
+
+    # Возвращение задания в журнал для повторной попытки любым процессом
+    def releaseJob(self, stage: str, job: Any):
+        self.collection.update_one({ '_id'    : self.jobKey(stage, job), 'owner' : self.owner },
+                                   { '$set'   : { 'state' : 'pending' },
+                                     '$unset' : { 'owner' : '', 'leaseUntil' : '' }})
+        return
+
+    # Продление выполнения всех заданий текущего процесса ("сердцебиение")
+    def heartbeat(self):
+        self.collection.update_many({ 'owner' : self.owner, 'state' : 'leased' },
+                                    { '$set'  : { 'leaseUntil' : dt.now() + timedelta(seconds = self.leaseTime) }})
+        return
+
+    # Захват права на планирование этапа: планирует только один процесс;
+    #   право, не освобождённое за leaseTime, может захватить другой процесс
+    def acquirePlan(self, stage: str) -> bool:
+        try:
+            self.collection.update_one({ '_id'  : f'plan/{stage}', 'leaseUntil' : { '$lt' : dt.now() }},
+                                       { '$set' : { 'stage'      : 'plan',
+                                                    'owner'      : self.owner,
+                                                    'leaseUntil' : dt.now() + timedelta(seconds = self.leaseTime) }},
+                                       upsert = True)
+
+        except DuplicateKeyError:
+            return False
+
+        return True
+
+    # Освобождение права на планирование этапа после записи заданий в журнал
+    def releasePlan(self, stage: str):
+        self.collection.update_one({ '_id'  : f'plan/{stage}', 'owner' : self.owner },
+                                   { '$set' : { 'leaseUntil' : dt.now() }})
+        return
+
+    # Проверка, выполняет ли какой-нибудь процесс задания этапа или планирует его:
+    #   пока это так, свободные процессы ждут новых заданий или истечения чужих
+    def hasActiveJobs(self, stage: str) -> bool:
+        activeQuery = { '$or' : [{ 'stage' : stage, 'state' : 'leased' },
+                                 { '_id'   : f'plan/{stage}', 'leaseUntil' : { '$gte' : dt.now() }}] }
+        return self.collection.find_one(activeQuery, { '_id' : 1 }) is not None
+
+    # Проверка наличия незавершённых заданий этапа (ожидающих или выполняемых)
+    def hasUnfinishedJobs(self, stage: str) -> bool:
+        return self.collection.find_one({ 'stage' : stage, 'state' : { '$in' : ['pending', 'leased'] }},
+                                        { '_id' : 1 }) is not None
+
+    # Отметка об успешном выполнении задания
+    def doneJob(self, stage: str, job: Any):
+        self.collection.update_one({ '_id'    : self.jobKey(stage, job) },
+                                   { '$set'   : { 'state' : 'done' },
+                                     '$unset' : { 'owner' : '', 'leaseUntil' : '' }})
+        return
+
+    # Отметка об успешном выполнении нескольких заданий одной записью в журнал
+    def doneJobs(self, stage: str, jobs: List[Any]):
+        writeRequests = [UpdateOne({ '_id'    : self.jobKey(stage, job) },
+                                   { '$set'   : { 'state' : 'done' },
+                                     '$unset' : { 'owner' : '', 'leaseUntil' : '' }}) for job in jobs]
+
+        for i in range(0, len(writeRequests), self.BatchSize):
+            self.collection.bulk_write(writeRequests[i:i + self.BatchSize], ordered = False)
+
+        return
+
+    # Отметка о задании, которое не удалось выполнить после всех попыток
+    def failJob(self, stage: str, job: Any):
+        self.collection.update_one({ '_id'    : self.jobKey(stage, job) },
+                                   { '$set'   : { 'state' : 'failed' },
+                                     '$unset' : { 'owner' : '', 'leaseUntil' : '' }})
+        return
+
+    # Условие поиска невыполненных заданий: ожидающие и те, время выполнения которых истекло
+    def unfinishedQuery(self, stage: str) -> Dict[str, Any]:
+        return { 'stage' : stage, '$or' : [{ 'state' : 'pending' },
+                                           { 'state' : 'leased', 'leaseUntil' : { '$lt' : dt.now() }}] }
+
+    # Получение всех невыполненных заданий этапа; по индексу читаются только они;
+    #   в режиме 'local' журналом пользуется только один процесс, поэтому при продолжении
+    #   прерванного запуска невыполненными считаются и все начатые задания, даже если их время
+    #   выполнения ещё не истекло (например, скачанные, но не записанные из буфера)
+    def pendingJobs(self, stage: str, allLeased: bool = False) -> List[Any]:
+        query = { 'stage' : stage, 'state' : { '$in' : ['pending', 'leased'] }} if allLeased else \
+                self.unfinishedQuery(stage)
+
+        return [self.jobFromList(record['job']) for record in self.collection.find(query, { 'job' : 1 })]
+
+    # Удаление записей этапа, если все его задания завершены (выполнены или не выполнены)
+    def clearStage(self, stage: str) -> bool:
+        if self.hasUnfinishedJobs(stage):
+            return False
+
+        self.collection.delete_many({ 'stage' : stage })
+        return True
@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
+import sys
 import logging
 
 from typing import Union, List, Tuple, Dict
 from pymongo import MongoClient
-from random import shuffle
 
-import dataMiningKinopoisk.FilmMining   as FilmMining
-import dataMiningKinopoisk.ReviewMining as ReviewMining
+import dataMiningKinopoisk.filmMining       as FilmMining
+import dataMiningKinopoisk.reviewMining     as ReviewMining
+import dataMiningKinopoisk.FilmFrontier     as FilmFrontier
+import dataMiningKinopoisk.FilmMisses       as FilmMisses
+import dataMiningKinopoisk.CrawlJournal     as CrawlJournal
+import dataMiningKinopoisk.ResponseArchive  as ResponseArchive
+import dataMiningKinopoisk.RefreshScheduler as RefreshScheduler
 
 # Класс для получения данных, связанных с фильмами / сериалами
 #    и их пользовательскими оценками, с сервиса "КиноПоиск"
@@ -15,14 +20,55 @@ class ClassDataMining(object):
     
     # Значения конфигурационного файла по умолчанию
     DefaultConfigParameters = {
-      'pathMongoDB'     : 'mongodb://localhost:27017/',
-      'databaseName'    : 'userReviews',
-      'dataPathFilms'   : 'films',
-	    'dataPathReviews' : 'reviews',    
-	    'threads'         : 4,
-	    'maxID'           : 5000000,
-	    'sleepTime'       : 120,
-	    'takeFilms'       : 10000
+      'pathMongoDB'         : 'mongodb://localhost:27017/',
+      'databaseName'        : 'userReviews',
+      'dataPathFilms'       : 'films',
+      'dataPathPersons'     : 'persons',
+      'dataPathFilmPersons' : 'filmPersons',
+	    'dataPathReviews'     : 'reviews',
+	    'dataPathReviewItems' : 'reviewItems',
+	    'reviewLayout'        : 'embedded',
+	    'dataPathFrontier'    : 'frontier',
+	    'dataPathMisses'      : 'filmMisses',
+	    'missRetryDays'       : 30,
+	    'dataPathJournal'     : 'crawlJournal',
+	    'leaseTime'           : 600,
+	    'crawlMode'           : 'local',
+	    'claimWaitTime'       : 10,
+	    'archiveResponses'    : 0,
+	    'dataPathArchive'     : './archive',
+	    'archiveCompression'  : 'gzip',
+	    'dataPathRefresh'     : 'refreshState',
+	    'refreshFilms'        : 0,
+	    'refreshMinAgeDays'   : 7,
+	    'refreshDefaultAge'   : 365,
+	    'refreshReviewWeight' : 10,
+	    'threads'             : 4,
+	    'maxID'               : 5000000,
+	    'sleepTime'           : 120,
+	    'jobRetries'          : 2,
+	    'takeFilms'           : 10000,
+	    'engine'              : 'threads',
+	    'requestsPerMinute'   : 4,
+	    'requestBurst'        : 1,
+	    'concurrency'         : 100,
+	    'jitterTime'          : 5,
+	    'rateControl'         : 0,
+	    'rateMin'             : 1,
+	    'rateMax'             : 60,
+	    'rateIncrease'        : 2,
+	    'rateDecrease'        : 50,
+	    'proxies'             : '',
+	    'proxyMode'           : 'request',
+	    'proxyMaxFailures'    : 3,
+	    'proxyEjectTime'      : 300,
+	    'poolSize'            : 10,
+	    'requestRetries'      : 3,
+	    'requestTimeout'      : 30,
+	    'parseProcesses'      : 2,
+	    'pipelineQueueSize'   : 100,
+	    'writeBatchSize'      : 100,
+	    'writeFlushTime'      : 30
     }
     
     # Инициализация класса
@@ -32,6 +78,9 @@ class ClassDataMining(object):
         
         self.collectionFilms   = None
         self.collectionReviews = None
+        self.frontier          = None
+        self.missRegistry      = None
+        self.journal           = None
 
         logging.basicConfig(
             filename = './log/dataMining.log',
@@ -75,39 +124,82 @@ class ClassDataMining(object):
 
     # Получение массива ID фильмов / сериалов, находящихся в MongoDB
     def getFilmIDFromMongoDB(self) -> List[Tuple[int, int]]:
-        return [(record['_id'], record['ratingCount']) for record in self.collectionFilms.find()]
+        return [(record['_id'], record['ratingCount'])
+                for record in self.collectionFilms.find({}, { 'ratingCount' : 1 })]
 
-    # Создание массива ID фильмов / сериалов, которых ещё нет в MongoDB
+    # Проверка, нужно ли текущему процессу планировать этап в режиме 'distributed':
+    #   планирует только один процесс, остальные сразу забирают задания из журнала
+    def needPlanStage(self, stage: str) -> bool:
+        if self.configParameters['crawlMode'] != 'distributed':
+            return True
+
+        if self.journal.hasUnfinishedJobs(stage) or not self.journal.acquirePlan(stage):
+            self.logger.debug(f'Join the distributed crawl: {stage}')
+            return False
+
+        return True
+
+    # Создание массива ID фильмов / сериалов, которых ещё нет в MongoDB;
+    #   если прошлый запуск был прерван, продолжаются задания из журнала
     def createFilmIDArray(self) -> List[int]:
-        listAllID = list(range(self.configParameters['maxID'] + 1))      
-        for (filmID, _) in self.getFilmIDFromMongoDB():
-            listAllID.remove(filmID)
-            
-        shuffle(listAllID)
-        return listAllID[:self.configParameters['takeFilms']]
+        self.frontier.loadFromMongoDB()
+        if not self.needPlanStage('film'):
+            return []
+
+        filmIDs = self.journal.pendingJobs('film', self.configParameters['crawlMode'] != 'distributed')
+        if len(filmIDs) > 0:
+            self.logger.debug(f'Resume films from the crawl journal: {len(filmIDs)}')
+            return filmIDs
+
+        for filmID in self.missRegistry.releaseExpired():
+            self.frontier.unmarkBlocked(filmID)
+
+        return self.frontier.sampleUnvisited(self.configParameters['takeFilms'])
+
+    # Создание массива пользовательских отзывов по невыполненным заданиям журнала
+    def journalReviewIDArray(self) -> Dict[int, List[int]]:
+        reviewFilmPage = {}
+        for (filmID, page) in self.journal.pendingJobs('review', self.configParameters['crawlMode'] != 'distributed'):
+            reviewFilmPage.setdefault(filmID, [])
+            if page is not None:
+                reviewFilmPage[filmID].append(page)
+
+        return reviewFilmPage
 
-    # Создание массива пользовательских отзывов, которых ещё нет в MongoDB
+    # Создание массива пользовательских отзывов, которых ещё нет в MongoDB:
+    #   запрашиваются только ID и номера страниц, сами тексты отзывов не скачиваются;
+    #   если прошлый запуск был прерван, продолжаются задания из журнала
     def createReviewIDArray(self) -> Dict[int, List[int]]:
-        listFilmIDAndCount = self.getFilmIDFromMongoDB()
-        listReviewIDs      = [record['_id'] for record in self.collectionReviews.find()]
-        reviewFilmPage     = {}
-        for (filmID, reviewCount) in listFilmIDAndCount:
-            if filmID not in listReviewIDs and reviewCount > 0:
-                reviewFilmPage[filmID] = []
-        
-        for review in self.collectionReviews.find():
-            if len(review['pages']) < ((review['reviewMax'] + 199) // 200):                
-                listPages = list(range(1, (review['reviewMax'] + 199) // 200 + 1))
-                for page in review['pages']:
-                    listPages.remove(page)
-                    
-                reviewFilmPage[review['_id']] = listPages
-                
+        if not self.needPlanStage('review'):
+            return {}
+
+        reviewFilmPage = self.journalReviewIDArray()
+        if len(reviewFilmPage) > 0:
+            self.logger.debug(f'Resume reviews from the crawl journal: {len(reviewFilmPage)}')
+            return reviewFilmPage
+
+        reviewIDs      = {record['_id'] for record in self.collectionReviews.find({}, { '_id' : 1 })}
+        reviewFilmPage = {}
+        for record in self.collectionFilms.find({ 'ratingCount' : { '$gt' : 0 }}, { '_id' : 1 }):
+            if record['_id'] not in reviewIDs:
+                reviewFilmPage[record['_id']] = []
+
+        pagesNotFull = { '$expr' : { '$lt' : [{ '$size' : '$pages' },
+                                              { '$ceil' : { '$divide' : ['$reviewMax', 200] }}] }}
+
+        for review in self.collectionReviews.find(pagesNotFull, { 'pages' : 1, 'reviewMax' : 1 }):
+            pagesInDB = set(review['pages'])
+            reviewFilmPage[review['_id']] = [page for page in range(1, (review['reviewMax'] + 199) // 200 + 1)
+                                             if page not in pagesInDB]
+
         return reviewFilmPage
     
     # Последовательный вызов всех необходимых функций
     def main(self):
         self.splitConfigFile()
+        if self.configParameters['engine'] == 'async' and self.configParameters['crawlMode'] == 'distributed':
+            self.logger.warning('The async engine does not use the crawl journal, crawlMode is set to local!')
+            self.configParameters['crawlMode'] = 'local'
         
         mongoClient = self.connectionToMongoDB()
         if mongoClient is None:
@@ -116,14 +208,65 @@ class ClassDataMining(object):
         connectionDB           =  mongoClient[self.configParameters['databaseName']]
         self.collectionFilms   = connectionDB[self.configParameters['dataPathFilms']]
         self.collectionReviews = connectionDB[self.configParameters['dataPathReviews']]
+        self.collectionFilms.create_index('ratingCount')
+
+        self.frontier     = FilmFrontier.FilmFrontier(self.configParameters, mongoClient)
+        self.missRegistry = FilmMisses.FilmMissRegistry(self.configParameters, mongoClient)
+        self.journal      = CrawlJournal.CrawlJournal(self.configParameters, mongoClient)
+
+        filmMining     = FilmMining.FilmMining(self.configParameters, mongoClient, self.createFilmIDArray())
+        filmMining.main()
+        self.frontier.syncFilmIDs(filmMining.minedIDs)
+        for filmID in self.missRegistry.blockedIDs(filmMining.minedIDs):
+            self.frontier.markBlocked(filmID)
 
-        filmIDs        = self.createFilmIDArray()
-        FilmMining.FilmMining(self.configParameters, mongoClient, filmIDs).main()
+        self.frontier.saveToMongoDB()
         
         reviewFilmPage = self.createReviewIDArray()
         ReviewMining.ReviewMining(self.configParameters, mongoClient, reviewFilmPage).main()
-        
+
+        self.refreshStored(mongoClient)
+        return
+
+    # Повторное скачивание уже сохранённых фильмов / сериалов и отзывов к ним
+    #   в порядке приоритета планировщика (не больше refreshFilms за запуск; по умолчанию
+    #   refreshFilms = 0, и повторное скачивание выключено)
+    def refreshStored(self, mongoClient: MongoClient):
+        if self.configParameters['refreshFilms'] == 0:
+            return
+
+        scheduler  = RefreshScheduler.RefreshScheduler(self.configParameters, mongoClient)
+        refreshIDs = scheduler.scheduleFilms()
+        self.logger.debug(f'Films for refresh: {len(refreshIDs)}')
+
+        FilmMining.FilmMining(self.configParameters, mongoClient, refreshIDs).refreshMain()
+        ReviewMining.ReviewMining(self.configParameters, mongoClient, {}).refreshMain(refreshIDs)
+        return
+
+    # Повторный разбор и запись в MongoDB всех страниц из локального архива
+    #   без обращения к сервису "КиноПоиск" (запуск с ключом --replay)
+    def replay(self):
+        self.splitConfigFile()
+
+        mongoClient = self.connectionToMongoDB()
+        if mongoClient is None:
+            return
+
+        archive       = ResponseArchive.ResponseArchive(self.configParameters)
+        self.frontier = FilmFrontier.FilmFrontier(self.configParameters, mongoClient)
+        self.frontier.loadFromMongoDB()
+
+        filmMining = FilmMining.FilmMining(self.configParameters, mongoClient, [])
+        filmMining.replayMain(archive)
+        self.frontier.syncFilmIDs(filmMining.minedIDs)
+        self.frontier.saveToMongoDB()
+
+        ReviewMining.ReviewMining(self.configParameters, mongoClient, {}).replayMain(archive)
         return
 
 if __name__ == '__main__':
-    ClassDataMining().main()
+    if '--replay' in sys.argv:
+        ClassDataMining().replay()
+
+    else:
+        ClassDataMining().main()
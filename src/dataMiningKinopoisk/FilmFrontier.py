@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+from typing         import Any, Dict, List, Union
+from random         import randint, sample
+from pymongo        import MongoClient
+from pymongo.errors import DuplicateKeyError
+
+# Класс для хранения множеств уже посещённых и временно заблокированных ID
+#   фильмов / сериалов в виде битовых карт (1 бит на ID) с сохранением в MongoDB;
+#   карты сохраняются с номером версии, поэтому сохранение нескольких процессов
+#   не затирает посещённые ID друг друга
+class FilmFrontier(object):
+
+    # Ключи документов с битовыми картами в MongoDB
+    VisitedKey = 'visited'
+    BlockedKey = 'blocked'
+
+    # Число ID фильмов / сериалов из MongoDB, проверяемых в загруженной карте посещённых ID
+    SampleSize = 100
+
+    # Число установленных битов для каждого значения байта
+    BitCounts  = bytes(bin(value).count('1') for value in range(256))
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        self.maxID              = configParameters['maxID']
+
+        connectionDB            = mongoClient[configParameters['databaseName']]
+        self.collectionFilms    = connectionDB[configParameters['dataPathFilms']]
+        self.collectionMisses   = connectionDB[configParameters['dataPathMisses']]
+        self.collectionFrontier = connectionDB[configParameters['dataPathFrontier']]
+
+        self.visited            = bytearray((self.maxID >> 3) + 1)
+        self.blocked            = bytearray((self.maxID >> 3) + 1)
+        self.visitedCount       = 0
+        self.blockedCount       = 0
+        self.versions           = { self.VisitedKey : None, self.BlockedKey : None }
+
+    # Проверка значения бита для ID в битовой карте
+    def checkBit(self, bitmap: bytearray, filmID: int) -> bool:
+        return bool(bitmap[filmID >> 3] & (1 << (filmID & 7)))
+
+    # Проверка, был ли ID уже посещён
+    def isVisited(self, filmID: int) -> bool:
+        return self.checkBit(self.visited, filmID)
+
+    # Проверка, заблокирован ли ID после промаха
+    def isBlocked(self, filmID: int) -> bool:
+        return self.checkBit(self.blocked, filmID)
+
+    # Проверка, может ли ID попасть в выборку
+    def isFree(self, filmID: int) -> bool:
+        return not (self.isVisited(filmID) or self.isBlocked(filmID))
+
+    # Отметка ID как посещённого
+    def markVisited(self, filmID: int):
+        if filmID < 0 or filmID > self.maxID or self.isVisited(filmID):
+            return
+
+        self.visited[filmID >> 3] |= (1 << (filmID & 7))
+        self.visitedCount         += 1
+        return
+
+    # Блокировка ID после промаха
+    def markBlocked(self, filmID: int):
+        if filmID < 0 or filmID > self.maxID or self.isBlocked(filmID):
+            return
+
+        self.blocked[filmID >> 3] |= (1 << (filmID & 7))
+        self.blockedCount         += 1
+        return
+
+    # Снятие блокировки с ID
+    def unmarkBlocked(self, filmID: int):
+        if filmID < 0 or filmID > self.maxID or not self.isBlocked(filmID):
+            return
+
+        self.blocked[filmID >> 3] &= ~(1 << (filmID & 7))
+        self.blockedCount         -= 1
+        return
+
+    # Построение битовой карты посещённых ID заново по всем фильмам / сериалам из MongoDB
+    def rebuildFromFilms(self):
+        self.visited      = bytearray((self.maxID >> 3) + 1)
+        self.visitedCount = 0
+        for record in self.collectionFilms.find({}, { '_id' : 1 }):
+            self.markVisited(record['_id'])
+
+        return
+
+    # Построение битовой карты заблокированных ID заново по всем промахам из MongoDB
+    def rebuildFromMisses(self):
+        self.blocked      = bytearray((self.maxID >> 3) + 1)
+        self.blockedCount = 0
+        for record in self.collectionMisses.find({ 'blocked' : True }, { '_id' : 1 }):
+            self.markBlocked(record['_id'])
+
+        return
+
+    # Число установленных битов в битовой карте
+    def countBits(self, bitmap: bytearray) -> int:
+        return sum(bitmap.translate(self.BitCounts))
+
+    # Проверка, устарела ли сохранённая карта посещённых ID: кроме числа фильмов / сериалов
+    #   проверяется, что случайная выборка ID из MongoDB отмечена в карте
+    def visitedStale(self, record: Dict[str, Any]) -> bool:
+        if record is None or record['maxID'] != self.maxID or \
+                record['sourceCount'] != self.collectionFilms.estimated_document_count():
+            return True
+
+        for sampleRecord in self.collectionFilms.aggregate([{ '$sample'  : { 'size' : self.SampleSize }},
+                                                            { '$project' : { '_id'  : 1 }}]):
+            filmID = sampleRecord['_id']
+            if 0 <= filmID <= self.maxID and not self.checkBit(record['bitmap'], filmID):
+                return True
+
+        return False
+
+    # Загрузка битовых карт из MongoDB; устаревшие карты строятся заново
+    def loadFromMongoDB(self):
+        record = self.collectionFrontier.find_one({ '_id' : self.VisitedKey })
+        self.versions[self.VisitedKey] = None if record is None else record.get('version')
+        if self.visitedStale(record):
+            self.rebuildFromFilms()
+
+        else:
+            self.visited      = bytearray(record['bitmap'])
+            self.visitedCount = record['bitCount']
+
+        record = self.collectionFrontier.find_one({ '_id' : self.BlockedKey })
+        self.versions[self.BlockedKey] = None if record is None else record.get('version')
+        if record is None or record['maxID'] != self.maxID or \
+                record['sourceCount'] != self.collectionMisses.count_documents({ 'blocked' : True }):
+            self.rebuildFromMisses()
+
+        else:
+            self.blocked      = bytearray(record['bitmap'])
+            self.blockedCount = record['bitCount']
+
+        return
+
+    # Запись битовой карты, если после загрузки её не сохранил другой процесс;
+    #   возвращает False при изменённой версии карты в MongoDB
+    def saveBitmap(self, key: str, bitmap: bytearray, bitCount: int, sourceCount: int) -> bool:
+        version = self.versions[key]
+        try:
+            self.collectionFrontier.replace_one({ '_id'         : key, 'version' : version },
+                                                { '_id'         : key,
+                                                  'maxID'       : self.maxID,
+                                                  'sourceCount' : sourceCount,
+                                                  'bitCount'    : bitCount,
+                                                  'bitmap'      : bytes(bitmap),
+                                                  'version'     : (version or 0) + 1 }, upsert = True)
+
+        except DuplicateKeyError:
+            return False
+
+        self.versions[key] = (version or 0) + 1
+        return True
+
+    # Объединение посещённых ID с картой, сохранённой другим процессом
+    def mergeVisited(self, record: Dict[str, Any]):
+        self.versions[self.VisitedKey] = None if record is None else record.get('version')
+        if record is None or record['maxID'] != self.maxID:
+            return
+
+        visitedBits       = int.from_bytes(self.visited, 'little') | int.from_bytes(record['bitmap'], 'little')
+        self.visited      = bytearray(visitedBits.to_bytes(len(self.visited), 'little'))
+        self.visitedCount = self.countBits(self.visited)
+        return
+
+    # Сохранение битовых карт в MongoDB; если карту уже сохранил другой процесс, посещённые ID
+    #   объединяются с сохранёнными, а заблокированные строятся заново по промахам, так как
+    #   блокировка может быть снята, и запись повторяется
+    def saveToMongoDB(self):
+        while not self.saveBitmap(self.VisitedKey, self.visited, self.visitedCount,
+                                  self.collectionFilms.estimated_document_count()):
+            self.mergeVisited(self.collectionFrontier.find_one({ '_id' : self.VisitedKey }))
+
+        while not self.saveBitmap(self.BlockedKey, self.blocked, self.blockedCount,
+                                  self.collectionMisses.count_documents({ 'blocked' : True })):
+            record = self.collectionFrontier.find_one({ '_id' : self.BlockedKey })
+            self.versions[self.BlockedKey] = None if record is None else record.get('version')
+            self.rebuildFromMisses()
+
+        return
+
+    # Отметка тех ID из списка, которые появились в MongoDB после скачивания
+    def syncFilmIDs(self, IDArray: List[int]):
+        for record in self.collectionFilms.find({ '_id' : { '$in' : IDArray } }, { '_id' : 1 }):
+            self.markVisited(record['_id'])
+
+        return
+
+    # Случайная выборка свободных ID без построения полного списка всех ID
+    def sampleUnvisited(self, count: int) -> List[int]:
+        freeCount = self.maxID + 1 - self.visitedCount - self.blockedCount
+        count     = max(min(count, freeCount), 0)
+
+        # При плотной карте выборка с отклонением неэффективна - перебираем все ID
+        if 2 * count > freeCount:
+            freeIDs = [ID for ID in range(self.maxID + 1) if self.isFree(ID)]
+            return sample(freeIDs, min(count, len(freeIDs)))
+
+        sampleIDs = []
+        sampleSet = set()
+        while len(sampleIDs) < count:
+            ID = randint(0, self.maxID)
+            if ID not in sampleSet and self.isFree(ID):
+                sampleSet.add(ID)
+                sampleIDs.append(ID)
+
+        return sampleIDs
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import re
+
+from typing import Dict, Union, Any
+from json   import loads
+from bs4    import BeautifulSoup as bs
+from bs4    import SoupStrainer
+
+# Класс для быстрого извлечения блока "application/ld+json" со страницы фильма / сериала
+#   без построения полного DOM-дерева страницы
+class FilmJSONExtractor(object):
+
+    # Регулярное выражение для поиска первого блока "application/ld+json"
+    ScriptPattern = re.compile(rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+                               re.IGNORECASE | re.DOTALL)
+
+    # Фильтр для разбора страницы с помощью BeautifulSoup только по нужным тегам
+    ScriptStrainer = SoupStrainer('script', type = 'application/ld+json')
+
+    # Быстрый поиск блока с помощью регулярного выражения
+    def fastExtract(self, content: bytes) -> Union[Dict[str, Any], None]:
+        scriptFind = self.ScriptPattern.search(content)
+        if scriptFind is None:
+            return None
+
+        return loads(scriptFind.group(1).decode('utf-8'))
+
+    # Поиск блока с помощью BeautifulSoup, ограниченного только тегами script
+    def soupExtract(self, content: bytes) -> Union[Dict[str, Any], None]:
+        jsonFind = bs(content, features = 'html.parser', parse_only = self.ScriptStrainer).find('script')
+        if jsonFind is None:
+            return None
+
+        return loads(jsonFind.text)
+
+    # Извлечение блока: при неудаче быстрого поиска страница разбирается через BeautifulSoup
+    def extractJSON(self, content: bytes) -> Union[Dict[str, Any], None]:
+        try:
+            dataJSON = self.fastExtract(content)
+            if dataJSON is not None:
+                return dataJSON
+
+        except ValueError:
+            pass
+
+        return self.soupExtract(content)
+
+if __name__ == '__main__':
+
+    from time import perf_counter
+
+    # Синтетическая страница размером в несколько сотен КБ с блоком JSON в конце
+    filmJSON    = '{"@type": "Movie", "url": "https://www.kinopoisk.ru/film/435/", "name": "Зелёная миля"}'
+    pageContent = ('<html><head><title>Фильм</title></head><body>' +
+                   ''.join(f'<div class="item-{i}"><a href="/film/{i}/">Ссылка {i}</a><span>Текст</span></div>'
+                           for i in range(4000)) +
+                   f'<script type="application/ld+json">{filmJSON}</script></body></html>').encode('utf-8')
+
+    extractor   = FilmJSONExtractor()
+    repeatCount = 20
+
+    def fullExtract(content: bytes) -> Dict[str, Any]:
+        return loads(bs(content, features = 'html.parser').find('script', type = 'application/ld+json').text)
+
+    print(f'\t Page size: {len(pageContent) // 1024} KB, repeats: {repeatCount}')
+    for (name, function) in (('Full BeautifulSoup', fullExtract),
+                             ('SoupStrainer',       extractor.soupExtract),
+                             ('Regular expression', extractor.extractJSON)):
+        timeStart = perf_counter()
+        for _ in range(repeatCount):
+            assert function(pageContent) == loads(filmJSON)
+
+        print(f'\t {name:<20}: {(perf_counter() - timeStart) / repeatCount * 1000:10.3f} ms per page')
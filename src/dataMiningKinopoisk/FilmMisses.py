@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+from typing   import Dict, List, Union
+from datetime import datetime as dt
+from datetime import timedelta
+from pymongo  import MongoClient
+
+# Класс для хранения ID фильмов / сериалов, по которым "КиноПоиск" не вернул данные,
+#   с причиной, временем промаха и временем следующей повторной попытки
+class FilmMissRegistry(object):
+
+    # Причины промахов, после которых повторная попытка откладывается надолго
+    PermanentReasons = ('status/404', 'status/410', 'noJSON')
+
+    # Предельная степень удвоения интервала повторной попытки
+    MaxRetryPower    = 5
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        self.retryDays  = configParameters['missRetryDays']
+
+        self.collection = mongoClient[configParameters['databaseName']][configParameters['dataPathMisses']]
+        self.collection.create_index('blocked')
+        self.collection.create_index('retryAfter')
+
+    # Расчёт времени следующей попытки: интервал удваивается с каждым новым промахом
+    def retryAfter(self, reason: str, attempts: int, missTime: dt) -> dt:
+        retryDays = self.retryDays if (reason in self.PermanentReasons) else 1
+        return missTime + timedelta(days = retryDays * 2 ** min(attempts - 1, self.MaxRetryPower))
+
+    # Регистрация нового промаха для ID одним запросом к MongoDB: время следующей попытки
+    #   выбирается по новому числу промахов из заранее рассчитанных вариантов
+    def registerMiss(self, filmID: int, reason: str):
+        missTime    = dt.now()
+        retryDates  = [self.retryAfter(reason, attempts, missTime) for attempts in range(1, self.MaxRetryPower + 2)]
+        retryPower  = { '$min' : [{ '$subtract' : ['$attempts', 1] }, self.MaxRetryPower] }
+
+        self.collection.update_one({ '_id'  : filmID },
+                                   [{ '$set' : { 'reason'     : { '$literal' : reason },
+                                                 'missTime'   : missTime,
+                                                 'blocked'    : True,
+                                                 'attempts'   : { '$add' : [{ '$ifNull' : ['$attempts', 0] }, 1] }}},
+                                    { '$set' : { 'retryAfter' : { '$arrayElemAt' : [retryDates, retryPower] }}}],
+                                   upsert = True)
+        return
+
+    # Получение заблокированных ID из переданного списка
+    def blockedIDs(self, IDArray: List[int]) -> List[int]:
+        return [record['_id'] for record in
+                self.collection.find({ '_id' : { '$in' : IDArray }, 'blocked' : True }, { '_id' : 1 })]
+
+    # Снятие блокировки с ID, для которых наступило время повторной попытки
+    def releaseExpired(self) -> List[int]:
+        expiredIDs = [record['_id'] for record in
+                      self.collection.find({ 'blocked' : True, 'retryAfter' : { '$lte' : dt.now() }}, { '_id' : 1 })]
+
+        self.collection.update_many({ '_id' : { '$in' : expiredIDs }}, { '$set' : { 'blocked' : False }})
+        return expiredIDs
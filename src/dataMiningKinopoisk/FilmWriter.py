@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import threading
+import logging
+
+from typing             import Dict, List, Tuple, Union, Any
+from time               import monotonic
+from pymongo            import UpdateOne, ReplaceOne
+from pymongo.errors     import BulkWriteError, PyMongoError
+from pymongo.collection import Collection
+
+from dataClass.FilmDataClass import Film
+
+# Класс для накопления фильмов / сериалов в буфере и их пакетной записи в MongoDB
+#   через неупорядоченный bulk_write по размеру буфера или по времени;
+#   в режиме replace уже существующие записи заменяются новыми; при наличии хранилища
+#   съёмочной группы в него передаются все фактически записанные фильмы / сериалы, а при наличии
+#   планировщика обновления в нём сохраняется время скачивания записанных фильмов / сериалов;
+#   задания очереди, результатом которых был фильм / сериал, отмечаются выполненными
+#   только после его записи; при ошибке соединения с MongoDB весь пакет возвращается в буфер
+#   и записывается при следующей записи буфера
+class BufferedFilmWriter(object):
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], collection: Collection,
+                 replace: bool = False, personStorage: Any = None, scheduler: Any = None):
+
+        self.writeBatchSize = configParameters['writeBatchSize']
+        self.writeFlushTime = configParameters['writeFlushTime']
+
+        self.collection     = collection
+        self.replace        = replace
+        self.personStorage  = personStorage
+        self.scheduler      = scheduler
+
+        self.buffer         = []
+        self.bufferJobs     = []
+        self.workQueue      = None
+        self.lastFlush      = monotonic()
+        self.insertedIDs    = []
+        self.errorCount     = 0
+
+        self.bufferLock     = threading.Lock()
+        self.flushLock      = threading.Lock()
+        self.stopEvent      = threading.Event()
+        self.flushThread    = None
+
+        self.logger         = logging.getLogger()
+
+    # Очередь заданий, в которой отмечаются задания после записи их фильмов / сериалов
+    def setWorkQueue(self, workQueue: Any):
+        self.workQueue = workQueue
+        return
+
+    # Добавление фильма / сериала в буфер вместе с заданием очереди, которое его скачало
+    def add(self, film: Film, job: Any = None):
+        with self.bufferLock:
+            self.buffer.append(film.toDict())
+            if job is not None:
+                self.bufferJobs.append((film._id, job))
+
+            flagFlush = len(self.buffer) >= self.writeBatchSize
+
+        if flagFlush:
+            self.flush()
+
+        return
+
+    # Запрос на запись одного фильма / сериала
+    def writeRequest(self, film: Dict[str, Any]) -> Union[UpdateOne, ReplaceOne]:
+        if self.replace:
+            return ReplaceOne({ '_id' : film['_id'] }, film, upsert = True)
+
+        return UpdateOne({ '_id' : film['_id'] },
+                         { '$setOnInsert' : { key : value for (key, value) in film.items() if key != '_id' }},
+                         upsert = True)
+
+    # Фактически записанные фильмы / сериалы: в режиме replace - все, кроме записанных с ошибкой,
+    #   иначе - только новые, так как существующие записи не изменяются
+    def writtenFilms(self, films: List[Dict[str, Any]], upsertedIDs: List[int],
+                     failedIDs: List[int]) -> List[Dict[str, Any]]:
+
+        if self.replace:
+            failedIDs = set(failedIDs)
+            return [film for film in films if film['_id'] not in failedIDs]
+
+        upsertedIDs = set(upsertedIDs)
+        return [film for film in films if film['_id'] in upsertedIDs]
+
+    # Запись всех накопленных фильмов / сериалов в MongoDB
+    def flush(self):
+        with self.flushLock:
+            with self.bufferLock:
+                films, self.buffer    = self.buffer, []
+                jobs, self.bufferJobs = self.bufferJobs, []
+                self.lastFlush        = monotonic()
+
+            if len(films) == 0:
+                return
+
+            writeRequests = [self.writeRequest(film) for film in films]
+            try:
+                result      = self.collection.bulk_write(writeRequests, ordered = False)
+                upsertedIDs = list(result.upserted_ids.values())
+                failedIDs   = []
+
+            except BulkWriteError as error:
+                upsertedIDs = [upserted['_id'] for upserted in error.details['upserted']]
+                failedIDs   = [films[writeError['index']]['_id'] for writeError in error.details['writeErrors']]
+                for writeError in error.details['writeErrors']:
+                    self.errorCount += 1
+                    self.logger.error(f'{films[writeError["index"]]["_id"]} -> Not written to MongoDB: ' +
+                                      f'{writeError["errmsg"]} | film')
+
+            except PyMongoError as error:
+                with self.bufferLock:
+                    self.buffer     = films + self.buffer
+                    self.bufferJobs = jobs  + self.bufferJobs
+
+                self.logger.error(f'{len(films)} films -> Not written to MongoDB, returned to the buffer: ' +
+                                  f'{error!r} | film')
+                return
+
+            self.insertedIDs += upsertedIDs
+            self.jobsWritten(jobs, failedIDs)
+            self.writtenToStorages(films, upsertedIDs, failedIDs)
+
+        return
+
+    # Запись персон и времени загрузки записанных фильмов / сериалов; фильмы / сериалы уже
+    #   в MongoDB, поэтому ошибка здесь только записывается в лог и не делает задания невыполненными
+    def writtenToStorages(self, films: List[dict], upsertedIDs: List[int], failedIDs: List[int]):
+        if self.personStorage is not None:
+            try:
+                self.personStorage.filmsToMongoDB(self.writtenFilms(films, upsertedIDs, failedIDs))
+
+            except Exception as error:
+                self.errorCount += 1
+                self.logger.error(f'{len(films)} films -> Persons not written to MongoDB: {error!r} | film')
+
+        if self.scheduler is not None:
+            failedSet = set(failedIDs)
+            try:
+                self.scheduler.recordFetches([film['_id'] for film in films if film['_id'] not in failedSet])
+
+            except Exception as error:
+                self.errorCount += 1
+                self.logger.error(f'{len(films)} films -> Fetch time not written to MongoDB: {error!r} | film')
+
+        return
+
+    # Отметка о заданиях очереди после записи их фильмов / сериалов
+    def jobsWritten(self, jobs: List[Tuple[int, Any]], failedIDs: List[int]):
+        if self.workQueue is None or len(jobs) == 0:
+            return
+
+        failedIDs = set(failedIDs)
+        self.workQueue.jobsDone([job for (filmID, job) in jobs if filmID not in failedIDs])
+        self.workQueue.jobsFailed([job for (filmID, job) in jobs if filmID in failedIDs])
+        return
+
+    # Фоновая запись буфера, если с момента последней записи прошло writeFlushTime секунд;
+    #   ошибка одной записи не останавливает фоновую запись
+    def flushByTime(self):
+        while not self.stopEvent.wait(1):
+            if monotonic() - self.lastFlush >= self.writeFlushTime:
+                try:
+                    self.flush()
+
+                except Exception as error:
+                    self.logger.error(f'Buffer -> Not flushed by time: {error!r} | film')
+
+        return
+
+    # Запуск фоновой записи по времени
+    def start(self):
+        self.stopEvent.clear()
+        self.flushThread = threading.Thread(target = self.flushByTime, daemon = True)
+        self.flushThread.start()
+        return
+
+    # Остановка фоновой записи и запись оставшихся в буфере фильмов / сериалов; фильмы / сериалы,
+    #   которые так и не удалось записать, записываются в лог, а их задания остаются
+    #   невыполненными в журнале и повторяются при следующем запуске
+    def close(self) -> List[int]:
+        self.stopEvent.set()
+        if self.flushThread is not None:
+            self.flushThread.join()
+            self.flushThread = None
+
+        self.flush()
+        with self.bufferLock:
+            films, self.buffer = self.buffer, []
+            self.bufferJobs    = []
+
+        for film in films:
+            self.errorCount += 1
+            self.logger.error(f'{film["_id"]} -> Not written to MongoDB! | film')
+
+        return self.insertedIDs
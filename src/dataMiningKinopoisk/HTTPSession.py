@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import requests
+import threading
+
+from typing             import Dict, Union, Any
+from time               import monotonic
+from requests.adapters  import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import dataMiningKinopoisk.RateController as RateController
+
+# Класс для хранения отдельной HTTP-сессии с пулом keep-alive соединений
+#   для каждого потока скачивания и подсчёта повторно использованных соединений;
+#   при наличии архива каждая скачанная страница сохраняется в него, а при наличии
+#   регулятора частоты запросы выполняются с общей для всех потоков частотой;
+#   при наличии пула proxy-серверов каждый запрос идёт через выбранный пулом proxy-сервер
+#   с его собственным регулятором частоты
+class HTTPSessionPool(object):
+
+    # Коды ответа, после которых запрос повторяется автоматически
+    RetryStatus = (500, 502, 503, 504)
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], headers: Dict[str, str],
+                 archive: Any = None, controller: Any = None, proxyPool: Any = None):
+
+        self.poolSize       = configParameters['poolSize']
+        self.requestRetries = configParameters['requestRetries']
+        self.requestTimeout = configParameters['requestTimeout']
+
+        self.headers        = headers
+        self.archive        = archive
+        self.controller     = controller
+        self.proxyPool      = proxyPool
+
+        self.local          = threading.local()
+        self.sessions       = []
+        self.requestCount   = 0
+
+        self.lock           = threading.Lock()
+
+    # Создание новой HTTP-сессии с настроенным пулом соединений и повторами запросов;
+    #   при наличии регулятора частоты ответы об ограничении запросов не повторяются сразу,
+    #   а передаются регулятору
+    def createSession(self) -> requests.Session:
+        retryStatus = self.RetryStatus
+        if self.controller is not None:
+            retryStatus = [status for status in self.RetryStatus if status not in self.controller.ThrottleStatus]
+
+        retry   = Retry(total = self.requestRetries, backoff_factor = 1, status_forcelist = retryStatus,
+                        allowed_methods = ['GET'], raise_on_status = False,
+                        respect_retry_after_header = self.controller is None)
+        adapter = HTTPAdapter(pool_connections = self.poolSize, pool_maxsize = self.poolSize, max_retries = retry)
+
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('http://',  adapter)
+        session.mount('https://', adapter)
+        return session
+
+    # Получение HTTP-сессии текущего потока
+    def getSession(self) -> requests.Session:
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session            = self.createSession()
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+
+        return session
+
+    # Выполнение GET-запроса через HTTP-сессию текущего потока; ответ об ограничении
+    #   частоты запросов вызывает ThrottledError, чтобы задание было повторено позже
+    def get(self, url: str, **kwargs) -> requests.Response:
+        with self.lock:
+            self.requestCount += 1
+
+        proxy      = self.proxyPool.getProxy() if self.proxyPool is not None else None
+        controller = self.controller if proxy is None else proxy['controller']
+        if proxy is not None:
+            kwargs['proxies'] = { 'http' : proxy['url'], 'https' : proxy['url'] }
+
+        if controller is not None:
+            controller.acquire()
+
+        timeStart = monotonic()
+        try:
+            response = self.getSession().get(url, timeout = self.requestTimeout, **kwargs)
+
+        except (requests.ConnectionError, requests.Timeout):
+            if proxy is not None:
+                self.proxyPool.report(proxy, monotonic() - timeStart, True)
+
+            raise
+
+        flagThrottled = controller is not None and \
+                        controller.report(response.status_code, response.headers, response.content, response.url)
+        if proxy is not None:
+            self.proxyPool.report(proxy, monotonic() - timeStart, flagThrottled)
+
+        if flagThrottled:
+            raise RateController.ThrottledError(f'{url} -> status {response.status_code}')
+
+        if self.archive is not None and response.status_code != 304:
+            self.archive.store(url, response.status_code, response.content)
+
+        return response
+
+    # Количество TCP-соединений, открытых пулами одного менеджера соединений
+    def poolConnections(self, poolManager: Any) -> int:
+        pools = poolManager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    # Статистика по запросам и открытым TCP-соединениям во всех сессиях, включая соединения
+    #   через proxy-серверы (у адаптера для каждого proxy-сервера свой менеджер соединений)
+    def getStats(self) -> Dict[str, int]:
+        connectionCount = 0
+        with self.lock:
+            for session in self.sessions:
+                for adapter in set(session.adapters.values()):
+                    connectionCount += self.poolConnections(adapter.poolmanager)
+                    for proxyManager in list(adapter.proxy_manager.values()):
+                        connectionCount += self.poolConnections(proxyManager)
+
+            requestCount = self.requestCount
+
+        return { 'requests'    : requestCount,
+                 'connections' : connectionCount,
+                 'reused'      : max(requestCount - connectionCount, 0) }
+
+    # Закрытие всех HTTP-сессий
+    def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+
+            self.sessions = []
+
+        self.local = threading.local()
+        return
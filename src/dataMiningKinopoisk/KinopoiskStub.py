@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import re
+import threading
+
+from typing      import Dict, Tuple, Union
+from json        import dumps
+from random      import Random, random
+from time        import sleep
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Обработчик запросов локальной заглушки сервиса "КиноПоиск"
+class KinopoiskStubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Обработка GET-запроса: страница фильма, общая информация об отзывах или страница отзывов
+    def do_GET(self):
+        statusCode, headers, body = self.server.stub.response(self.path)
+        self.send_response(statusCode)
+        for (key, value) in headers.items():
+            self.send_header(key, value)
+
+        self.send_header('Content-Type',   'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    # Отключение вывода каждого запроса в консоль
+    def log_message(self, *args):
+        return
+
+# Класс локальной заглушки сервиса "КиноПоиск" для измерения скорости скачивания без обращения к сайту:
+#   отдаёт синтетические страницы фильмов с блоком "application/ld+json" и страницы отзывов
+#   в той же разметке, что и сайт, с задержкой stubLatency мс, а также с заданными долями
+#   отсутствующих фильмов (404), ошибок сервера (503) и ограничений частоты запросов (429)
+class KinopoiskStubServer(object):
+
+    # Регулярные выражения для URL-адресов, которые запрашивают FilmMining и ReviewMining
+    FilmPattern   = re.compile(r'^/film/(\d+)/$')
+    HeaderPattern = re.compile(r'^/film/(\d+)/reviews$')
+    PagePattern   = re.compile(r'^/film/(\d+)/reviews/ord/date/status/all/perpage/200/page/(\d+)/$')
+
+    # Названия месяцев в датах отзывов
+    Month = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля',
+             'августа', 'сентября', 'октября', 'ноября', 'декабря']
+
+    # Классы отзывов (положительный, нейтральный, отрицательный)
+    ReviewClass = ['good', 'neutral', 'bad']
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.stubLatency      = configParameters['stubLatency']
+        self.stubMissRate     = configParameters['stubMissRate']
+        self.stubErrorRate    = configParameters['stubErrorRate']
+        self.stubThrottleRate = configParameters['stubThrottleRate']
+        self.stubReviewsMax   = configParameters['stubReviewsMax']
+        self.stubPageSize     = configParameters['stubPageSize']
+
+        self.server           = None
+        self.stats            = {}
+
+        self.lock             = threading.Lock()
+
+    # Запуск сервера в отдельном потоке; возвращает URL-адрес, подставляемый вместо KinopoiskURL
+    def start(self) -> str:
+        self.server      = ThreadingHTTPServer(('127.0.0.1', 0), KinopoiskStubHandler)
+        self.server.stub = self
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+        return f'http://127.0.0.1:{self.server.server_address[1]}/film/'
+
+    # Остановка сервера
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        return
+
+    # Подсчёт ответов по видам страниц и кодам ответа
+    def countResponse(self, kind: str, statusCode: int):
+        with self.lock:
+            self.stats[(kind, statusCode)] = self.stats.get((kind, statusCode), 0) + 1
+
+        return
+
+    # Количество отзывов к фильму / сериалу (одинаковое при каждом запросе)
+    def reviewCount(self, filmID: int) -> int:
+        return Random(filmID).randint(0, self.stubReviewsMax)
+
+    # Синтетическая страница фильма / сериала
+    def filmPage(self, filmID: int) -> bytes:
+        generator = Random(filmID)
+        dataJSON  = {
+            'url'             : f'https://www.kinopoisk.ru/film/{filmID}/',
+            '@type'           : 'Movie' if generator.random() < 0.8 else 'TVSeries',
+            'name'            : f'Фильм {filmID}',
+            'alternateName'   : f'Film {filmID}',
+            'datePublished'   : str(generator.randint(1950, 2024)),
+            'description'     : 'Описание фильма. ' * 20,
+            'genre'           : generator.sample(['драма', 'комедия', 'боевик', 'триллер', 'мелодрама'], 2),
+            'countryOfOrigin' : ['Россия'],
+            'aggregateRating' : { 'ratingValue' : round(generator.uniform(3, 9), 1),
+                                  'ratingCount' : generator.randint(10, 100000) },
+            'producer'        : [{ 'url' : f'/name/{generator.randint(1, 10000)}/', '@type' : 'Person', 'name' : 'Продюсер' }],
+            'director'        : [{ 'url' : f'/name/{generator.randint(1, 10000)}/', '@type' : 'Person', 'name' : 'Режиссёр' }],
+            'actor'           : [{ 'url' : f'/name/{generator.randint(1, 10000)}/', '@type' : 'Person', 'name' : f'Актёр {i}' }
+                                 for i in range(10)]
+        }
+
+        padding = ''.join(f'<div class="item-{i}"><a href="/film/{i}/">Ссылка {i}</a></div>'
+                          for i in range(self.stubPageSize * 20))
+        return (f'<html><head><title>Фильм {filmID}</title></head><body>{padding}' +
+                f'<script type="application/ld+json">{dumps(dataJSON, ensure_ascii = False)}</script>' +
+                '</body></html>').encode('utf-8')
+
+    # Синтетическая страница с общей информацией об отзывах
+    def headerPage(self, filmID: int) -> bytes:
+        reviewMax = self.reviewCount(filmID)
+        countGood = reviewMax - reviewMax // 3
+        return (f'<html><body><ul><li class="all"><b>{reviewMax}</b></li>' +
+                f'<li class="pos"><b>{countGood}</b></li>' +
+                f'<li class="neg"><b>{reviewMax // 6}</b></li>' +
+                f'<li class="neut"><b>{reviewMax // 3 - reviewMax // 6}</b></li>' +
+                f'<li class="perc"><b>{countGood / max(reviewMax, 1) * 100:.2f}%</b></li></ul></body></html>').encode('utf-8')
+
+    # Синтетическая страница с отзывами (по 200 на странице, сначала новые)
+    def reviewPage(self, filmID: int, page: int) -> bytes:
+        reviewMax = self.reviewCount(filmID)
+        items     = []
+        for k in range(reviewMax - (page - 1) * 200 - 1, max(reviewMax - page * 200, 0) - 1, -1):
+            items.append(f'<div class="reviewItem userReview"><div class="response {self.ReviewClass[k % 3]}" itemprop="reviews">' +
+                         f'<p class="sub_title">Заголовок {k}</p><a itemprop="name">user{filmID}_{k}</a>' +
+                         f'<span class="date">{k % 28 + 1} {self.Month[k % 12]} {2000 + k % 24} | {k % 24:02d}:{k % 60:02d}</span>' +
+                         f'<span itemprop="reviewBody">{"Текст отзыва. " * (20 + k % 50)}</span></div></div>')
+
+        return ('<html><body>' + ''.join(items) + '</body></html>').encode('utf-8')
+
+    # Ответ на запрос: код ответа, заголовки и содержимое страницы
+    def response(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        sleep(self.stubLatency / 1000)
+        for (kind, pattern) in (('film', self.FilmPattern), ('header', self.HeaderPattern), ('page', self.PagePattern)):
+            pathFind = pattern.match(path)
+            if pathFind is not None:
+                break
+
+        else:
+            self.countResponse('unknown', 404)
+            return (404, {}, b'')
+
+        if random() * 100 < self.stubThrottleRate:
+            self.countResponse(kind, 429)
+            return (429, { 'Retry-After' : '1' }, b'')
+
+        if random() * 100 < self.stubErrorRate:
+            self.countResponse(kind, 503)
+            return (503, {}, b'')
+
+        filmID = int(pathFind.group(1))
+        if Random(-filmID).random() * 100 < self.stubMissRate:
+            self.countResponse(kind, 404)
+            return (404, {}, b'')
+
+        self.countResponse(kind, 200)
+        if kind == 'film':
+            return (200, {}, self.filmPage(filmID))
+
+        if kind == 'header':
+            return (200, {}, self.headerPage(filmID))
+
+        return (200, {}, self.reviewPage(filmID, int(pathFind.group(2))))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import threading
+
+from typing    import Dict, List, Union, Callable, Any
+from functools import wraps
+from time      import monotonic, thread_time
+from pymongo   import MongoClient, monitoring
+
+import dataMiningKinopoisk.DataMining    as DataMining
+import dataMiningKinopoisk.filmMining    as FilmMining
+import dataMiningKinopoisk.reviewMining  as ReviewMining
+import dataMiningKinopoisk.KinopoiskStub as KinopoiskStub
+
+# Класс для сбора времени выполнения команд записи в MongoDB
+class WriteLatencyListener(monitoring.CommandListener):
+
+    # Команды записи, время выполнения которых учитывается
+    WriteCommands = ('insert', 'update', 'delete')
+
+    # Инициализация класса
+    def __init__(self):
+        self.latencies = []
+        self.lock      = threading.Lock()
+
+    # Начало выполнения команды
+    def started(self, event: monitoring.CommandStartedEvent):
+        return
+
+    # Успешное выполнение команды: время записи в миллисекундах
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        if event.command_name in self.WriteCommands:
+            with self.lock:
+                self.latencies.append(event.duration_micros / 1000)
+
+        return
+
+    # Ошибка выполнения команды
+    def failed(self, event: monitoring.CommandFailedEvent):
+        return
+
+# Класс измерения скорости скачивания фильмов / сериалов и отзывов на локальной заглушке
+#   сервиса "КиноПоиск": скачиваются benchFilms фильмов и все отзывы к ним в отдельную
+#   базу данных, а затем выводятся фильмы и страницы отзывов в секунду, процессорное время
+#   разбора страниц и время записи в MongoDB; время разбора учитывается только в потоках
+#   текущего процесса (для engine = 'pipeline' разбор отзывов идёт в других процессах)
+class MiningBenchmark(object):
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.benchFilms       = configParameters['benchFilms']
+        self.configParameters = configParameters
+
+        self.stub             = KinopoiskStub.KinopoiskStubServer(configParameters)
+        self.listener         = WriteLatencyListener()
+        self.parseTime        = { 'film' : 0.0, 'review' : 0.0 }
+
+        self.lock             = threading.Lock()
+
+    # Обёртка функции разбора страницы для подсчёта процессорного времени потока
+    def timedParser(self, kind: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            timeStart = thread_time()
+            try:
+                return function(*args, **kwargs)
+
+            finally:
+                with self.lock:
+                    self.parseTime[kind] += thread_time() - timeStart
+
+        return wrapper
+
+    # Статистика времени записи в MongoDB: количество, среднее, 95-й процентиль и максимум (мс)
+    def writeStats(self, latencies: List[float]) -> Dict[str, float]:
+        if len(latencies) == 0:
+            return { 'count' : 0, 'mean' : 0.0, 'p95' : 0.0, 'max' : 0.0 }
+
+        latencies = sorted(latencies)
+        return { 'count' : len(latencies),
+                 'mean'  : sum(latencies) / len(latencies),
+                 'p95'   : latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+                 'max'   : latencies[-1] }
+
+    # Вывод результатов одного этапа
+    def printStage(self, name: str, itemName: str, itemCount: int, elapsedTime: float,
+                   parseTime: float, latencies: List[float]):
+
+        writeStats = self.writeStats(latencies)
+        print(f'\t {name:<8}: {itemCount} {itemName} in {elapsedTime:.2f} s = ' +
+              f'{itemCount / max(elapsedTime, 1e-9):.2f} {itemName}/s')
+        print(f'\t {"":<8}  parse CPU = {parseTime:.2f} s ' +
+              f'({parseTime / max(itemCount, 1) * 1000:.2f} ms per {itemName[:-1]})')
+        print(f'\t {"":<8}  MongoDB writes = {writeStats["count"]}, mean = {writeStats["mean"]:.2f} ms, ' +
+              f'p95 = {writeStats["p95"]:.2f} ms, max = {writeStats["max"]:.2f} ms')
+        return
+
+    # Главная функция класса
+    def main(self):
+        baseURL     = self.stub.start()
+        mongoClient = MongoClient(self.configParameters['pathMongoDB'], event_listeners = [self.listener])
+        mongoClient.drop_database(self.configParameters['databaseName'])
+
+        filmMining = FilmMining.FilmMining(self.configParameters, mongoClient, list(range(1, self.benchFilms + 1)))
+        filmMining.KinopoiskURL          = baseURL
+        filmMining.extractor.extractJSON = self.timedParser('film', filmMining.extractor.extractJSON)
+
+        timeStart  = monotonic()
+        filmMining.main()
+        filmTime   = monotonic() - timeStart
+        filmWrites = list(self.listener.latencies)
+
+        reviewMining = ReviewMining.ReviewMining(self.configParameters, mongoClient,
+                                                 { filmID : [] for filmID in filmMining.minedIDs })
+        reviewMining.KinopoiskURL            = baseURL
+        reviewMining.reviewParsingForContent = self.timedParser('review', reviewMining.reviewParsingForContent)
+
+        timeStart   = monotonic()
+        reviewMining.main()
+        reviewTime  = monotonic() - timeStart
+        reviewPages = self.stub.stats.get(('page', 200), 0)
+
+        self.stub.stop()
+        print(f'\n\t Benchmark: engine = {self.configParameters["engine"]}, ' +
+              f'threads = {self.configParameters["threads"]}, latency = {self.configParameters["stubLatency"]} ms')
+        self.printStage('Films',   'films', len(filmMining.minedIDs), filmTime,
+                        self.parseTime['film'],   filmWrites)
+        self.printStage('Reviews', 'pages', reviewPages,              reviewTime,
+                        self.parseTime['review'], self.listener.latencies[len(filmWrites):])
+        print('\t Responses:', ', '.join(f'{kind}/{statusCode} = {count}'
+                                         for ((kind, statusCode), count) in sorted(self.stub.stats.items())))
+
+        mongoClient.drop_database(self.configParameters['databaseName'])
+        mongoClient.close()
+        return
+
+if __name__ == '__main__':
+
+    benchConfigParameters = dict(DataMining.ClassDataMining.DefaultConfigParameters)
+    benchConfigParameters.update({
+        'databaseName'      : 'userReviewsBenchmark',
+        'benchFilms'        : 200,
+        'sleepTime'         : 0,
+        'rateControl'       : 0,
+        'requestsPerMinute' : 60000,
+        'requestBurst'      : 100,
+        'jitterTime'        : 0,
+        'threads'           : 8,
+        'stubLatency'       : 50,
+        'stubMissRate'      : 10,
+        'stubErrorRate'     : 1,
+        'stubThrottleRate'  : 0,
+        'stubReviewsMax'    : 1000,
+        'stubPageSize'      : 20
+    })
+
+    MiningBenchmark(benchConfigParameters).main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import threading
+import logging
+
+from typing import Dict, List, Union, Any
+from random import choices
+from time   import monotonic
+
+import dataMiningKinopoisk.RateController as RateController
+
+# Класс пула proxy-серверов для скачивания страниц через несколько IP-адресов:
+#   proxy-сервер выбирается для каждого запроса ('request') или закрепляется за потоком ('worker'),
+#   чаще выбираются быстрые и надёжные proxy-серверы, а после proxyMaxFailures ошибок подряд
+#   proxy-сервер исключается из пула на proxyEjectTime секунд; при включённом регуляторе
+#   частоты у каждого proxy-сервера свой регулятор, так как ограничения сервиса действуют на IP-адрес
+class ProxyPool(object):
+
+    # Доля нового замера в скользящем среднем времени ответа
+    LatencyWeight  = 0.2
+
+    # Время ответа до первого замера, секунды
+    DefaultLatency = 1.0
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.proxyMode        = configParameters['proxyMode']
+        self.proxyMaxFailures = configParameters['proxyMaxFailures']
+        self.proxyEjectTime   = configParameters['proxyEjectTime']
+
+        proxyURLs             = [proxyURL.strip() for proxyURL in configParameters['proxies'].split(',')
+                                 if len(proxyURL.strip()) > 0]
+
+        self.proxies = [{ 'url'          : proxyURL,
+                          'requests'     : 0,
+                          'failures'     : 0,
+                          'consecutive'  : 0,
+                          'ejections'    : 0,
+                          'latency'      : self.DefaultLatency,
+                          'ejectedUntil' : 0.0,
+                          'controller'   : RateController.RateController(configParameters)
+                                              if configParameters['rateControl'] else None }
+                        for proxyURL in proxyURLs]
+
+        self.local   = threading.local()
+        self.lock    = threading.Lock()
+        self.logger  = logging.getLogger()
+
+    # Оценка proxy-сервера: доля успешных запросов, делённая на среднее время ответа
+    def score(self, proxy: Dict[str, Any]) -> float:
+        successRate = (proxy['requests'] - proxy['failures'] + 1) / (proxy['requests'] + 1)
+        return successRate / max(proxy['latency'], 1e-3)
+
+    # Выбор proxy-сервера среди неисключённых с вероятностью, пропорциональной оценке;
+    #   если исключены все, выбирается тот, который вернётся в пул раньше остальных
+    def chooseProxy(self) -> Dict[str, Any]:
+        timeNow = monotonic()
+        with self.lock:
+            healthy = [proxy for proxy in self.proxies if proxy['ejectedUntil'] <= timeNow]
+            if len(healthy) == 0:
+                return min(self.proxies, key = lambda proxy: proxy['ejectedUntil'])
+
+            return choices(healthy, weights = [self.score(proxy) for proxy in healthy])[0]
+
+    # Получение proxy-сервера для очередного запроса с учётом режима назначения
+    def getProxy(self) -> Dict[str, Any]:
+        if self.proxyMode != 'worker':
+            return self.chooseProxy()
+
+        proxy = getattr(self.local, 'proxy', None)
+        if proxy is None or proxy['ejectedUntil'] > monotonic():
+            proxy            = self.chooseProxy()
+            self.local.proxy = proxy
+
+        return proxy
+
+    # Учёт результата запроса через proxy-сервер: время ответа и ошибка;
+    #   после proxyMaxFailures ошибок подряд proxy-сервер исключается из пула
+    def report(self, proxy: Dict[str, Any], latency: float, flagFailed: bool):
+        with self.lock:
+            proxy['requests'] += 1
+            if not flagFailed:
+                proxy['consecutive'] = 0
+                proxy['latency']     = (1 - self.LatencyWeight) * proxy['latency'] + self.LatencyWeight * latency
+                return
+
+            proxy['failures']    += 1
+            proxy['consecutive'] += 1
+            if proxy['consecutive'] >= self.proxyMaxFailures:
+                proxy['consecutive']   = 0
+                proxy['ejections']    += 1
+                proxy['ejectedUntil']  = monotonic() + self.proxyEjectTime
+                self.logger.warning(f'Proxy {proxy["url"]} is ejected for {self.proxyEjectTime} s ' +
+                                    f'after {self.proxyMaxFailures} failures')
+
+        return
+
+    # Статистика по каждому proxy-серверу
+    def getStats(self) -> List[Dict[str, Union[int, float, str, bool]]]:
+        timeNow = monotonic()
+        with self.lock:
+            return [{ 'url'       : proxy['url'],
+                      'requests'  : proxy['requests'],
+                      'failures'  : proxy['failures'],
+                      'ejections' : proxy['ejections'],
+                      'latency'   : round(proxy['latency'], 3),
+                      'healthy'   : proxy['ejectedUntil'] <= timeNow,
+                      'rate'      : round(proxy['controller'].rate, 2) if proxy['controller'] is not None else None }
+                    for proxy in self.proxies]
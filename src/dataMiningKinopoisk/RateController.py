@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import threading
+import logging
+import re
+
+from typing      import Dict, Union
+from time        import sleep, monotonic
+from datetime    import datetime as dt
+from datetime    import timezone
+from email.utils import parsedate_to_datetime
+
+# Ошибка, возникающая при ответе сервиса, который ограничивает частоту запросов;
+#   задание с такой ошибкой повторяется позже
+class ThrottledError(Exception):
+    pass
+
+# Класс общего для всех потоков регулятора частоты запросов по схеме AIMD:
+#   после каждого успешного ответа частота растёт так, чтобы за минуту увеличиться
+#   на rateIncrease запросов в минуту, а при признаках ограничения (429 / 403 / 503, капча)
+#   уменьшается в 100 / rateDecrease раз; заголовок Retry-After приостанавливает все запросы
+class RateController(object):
+
+    # Коды ответа, означающие ограничение частоты запросов
+    ThrottleStatus  = (403, 429, 503)
+
+    # Заголовки (<title>) страницы с капчей, которую сервис отдаёт вместо запрошенной страницы
+    ThrottleTitles  = ('Ой!'.encode('utf-8'), 'Вы не робот?'.encode('utf-8'))
+
+    # Регулярное выражение для заголовка страницы
+    TitlePattern    = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.rate         = configParameters['requestsPerMinute']
+        self.rateMin      = configParameters['rateMin']
+        self.rateMax      = configParameters['rateMax']
+        self.rateIncrease = configParameters['rateIncrease']
+        self.rateDecrease = configParameters['rateDecrease']
+
+        self.nextTime     = monotonic()
+        self.blockedUntil = 0.0
+        self.stats        = { 'success' : 0, 'throttled' : 0 }
+
+        self.lock         = threading.Lock()
+        self.logger       = logging.getLogger()
+
+    # Резервирование времени следующего запроса: возвращает, сколько секунд нужно подождать
+    def reserve(self) -> float:
+        with self.lock:
+            timeNow       = monotonic()
+            timeSlot      = max(timeNow, self.nextTime, self.blockedUntil)
+            self.nextTime = timeSlot + 60 / self.rate
+
+        return timeSlot - timeNow
+
+    # Ожидание разрешённого времени следующего запроса
+    def acquire(self):
+        sleep(self.reserve())
+        return
+
+    # Проверка, является ли ответ признаком ограничения частоты запросов: код ответа,
+    #   перенаправление на капчу или заголовок страницы с капчей (текст страницы не проверяется,
+    #   так как ссылка на капчу может встретиться и на обычной странице)
+    def isThrottled(self, statusCode: int, content: bytes, url: str) -> bool:
+        if statusCode in self.ThrottleStatus or 'showcaptcha' in url:
+            return True
+
+        titleFind = self.TitlePattern.search(content)
+        return titleFind is not None and titleFind.group(1).strip() in self.ThrottleTitles
+
+    # Время ожидания в секундах из заголовка Retry-After (число секунд или дата)
+    def retryAfter(self, headers: Dict[str, str]) -> Union[float, None]:
+        value = headers.get('Retry-After')
+        if value is None:
+            return None
+
+        if value.strip().isdigit():
+            return float(value)
+
+        try:
+            return max((parsedate_to_datetime(value) - dt.now(timezone.utc)).total_seconds(), 0.0)
+
+        except (TypeError, ValueError):
+            return None
+
+    # Учёт ответа сервиса: изменение частоты запросов; возвращает True, если запросы ограничены
+    def report(self, statusCode: int, headers: Dict[str, str], content: bytes = b'', url: str = '') -> bool:
+        flagThrottled = self.isThrottled(statusCode, content, url)
+        with self.lock:
+            if not flagThrottled:
+                self.stats['success'] += 1
+                self.rate = min(self.rateMax, self.rate + self.rateIncrease / self.rate)
+                return False
+
+            self.stats['throttled'] += 1
+            self.rate         = max(self.rateMin, self.rate * self.rateDecrease / 100)
+            waitTime          = self.retryAfter(headers)
+            waitTime          = 60 / self.rate if waitTime is None else waitTime
+            self.blockedUntil = max(self.blockedUntil, monotonic() + waitTime)
+            self.logger.warning(f'Requests are throttled (status {statusCode}): ' +
+                                f'rate = {self.rate:.2f} per minute, pause = {waitTime:.0f} s')
+
+        return True
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import heapq
+
+from typing   import Dict, List, Union, Any
+from math     import log1p
+from datetime import datetime as dt
+from pymongo  import MongoClient, UpdateOne
+
+# Класс планировщика повторного скачивания уже сохранённых фильмов / сериалов:
+#   для каждого фильма отдельно для страницы фильма и страницы отзывов хранится время
+#   последнего скачивания и заголовки ETag / Last-Modified, а также скорость появления новых
+#   отзывов; на обновление выбираются фильмы с наибольшим приоритетом "устаревание x популярность"
+class RefreshScheduler(object):
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        self.refreshFilms        = configParameters['refreshFilms']
+        self.refreshMinAgeDays   = configParameters['refreshMinAgeDays']
+        self.refreshDefaultAge   = configParameters['refreshDefaultAge']
+        self.refreshReviewWeight = configParameters['refreshReviewWeight']
+
+        connectionDB             = mongoClient[configParameters['databaseName']]
+        self.collectionFilms     = connectionDB[configParameters['dataPathFilms']]
+        self.collectionRefresh   = connectionDB[configParameters['dataPathRefresh']]
+
+    # Приоритет обновления: сколько дней прошло с последнего скачивания страницы фильма,
+    #   умноженное на популярность (количество оценок и скорость появления отзывов);
+    #   fetchedAt - общее время скачивания, сохранённое до разделения по видам страниц
+    def priority(self, ratingCount: int, refreshState: Dict[str, Any], timeNow: dt) -> float:
+        ageDays    = self.refreshDefaultAge
+        reviewRate = 0.0
+        if refreshState is not None:
+            fetchedAt  = refreshState.get('filmFetchedAt', refreshState.get('fetchedAt'))
+            ageDays    = ageDays if fetchedAt is None else (timeNow - fetchedAt).total_seconds() / 86400
+            reviewRate = refreshState.get('reviewRate', 0.0)
+
+        if ageDays < self.refreshMinAgeDays:
+            return 0.0
+
+        return ageDays * (log1p(ratingCount) + self.refreshReviewWeight * reviewRate)
+
+    # Выбор не больше refreshFilms фильмов / сериалов с наибольшим приоритетом обновления
+    def scheduleFilms(self) -> List[int]:
+        timeNow       = dt.now()
+        refreshStates = { record['_id'] : record for record in
+                          self.collectionRefresh.find({}, { 'filmFetchedAt' : 1, 'fetchedAt' : 1,
+                                                           'reviewRate'    : 1 }) }
+
+        priorities = ((self.priority(record['ratingCount'], refreshStates.get(record['_id']), timeNow), record['_id'])
+                      for record in self.collectionFilms.find({}, { 'ratingCount' : 1 }))
+
+        return [filmID for (priority, filmID) in heapq.nlargest(self.refreshFilms, priorities) if priority > 0]
+
+    # Заголовки условного запроса по сохранённым ETag / Last-Modified
+    def conditionalHeaders(self, filmID: int, kind: str = 'film') -> Dict[str, str]:
+        refreshState = self.collectionRefresh.find_one({ '_id' : filmID }, { f'{kind}ETag'         : 1,
+                                                                             f'{kind}LastModified' : 1 })
+        headers = {}
+        if refreshState is None:
+            return headers
+
+        if f'{kind}ETag' in refreshState:
+            headers['If-None-Match']     = refreshState[f'{kind}ETag']
+
+        if f'{kind}LastModified' in refreshState:
+            headers['If-Modified-Since'] = refreshState[f'{kind}LastModified']
+
+        return headers
+
+    # Сохранение времени скачивания и заголовков ETag / Last-Modified ответа
+    #   для страницы фильма (kind = 'film') или страницы отзывов (kind = 'review')
+    def recordFetch(self, filmID: int, responseHeaders: Dict[str, str] = None, kind: str = 'film'):
+        setFields = { f'{kind}FetchedAt' : dt.now() }
+        if responseHeaders is not None:
+            if 'ETag' in responseHeaders:
+                setFields[f'{kind}ETag']         = responseHeaders['ETag']
+
+            if 'Last-Modified' in responseHeaders:
+                setFields[f'{kind}LastModified'] = responseHeaders['Last-Modified']
+
+        self.collectionRefresh.update_one({ '_id' : filmID }, { '$set' : setFields }, upsert = True)
+        return
+
+    # Сохранение времени скачивания страниц нескольких фильмов / сериалов одной записью в MongoDB
+    def recordFetches(self, filmIDs: List[int]):
+        if len(filmIDs) == 0:
+            return
+
+        fetchedAt = dt.now()
+        self.collectionRefresh.bulk_write([UpdateOne({ '_id' : filmID }, { '$set' : { 'filmFetchedAt' : fetchedAt }},
+                                                     upsert = True) for filmID in filmIDs], ordered = False)
+        return
+
+    # Пересчёт скорости появления новых отзывов (отзывов в день) по новому общему количеству
+    def recordReviews(self, filmID: int, reviewMax: int):
+        timeNow      = dt.now()
+        refreshState = self.collectionRefresh.find_one({ '_id' : filmID }, { 'reviewMax' : 1, 'reviewAt' : 1 })
+        setFields    = { 'reviewMax' : reviewMax, 'reviewAt' : timeNow }
+        if refreshState is not None and 'reviewAt' in refreshState:
+            days = max((timeNow - refreshState['reviewAt']).total_seconds() / 86400, 1.0)
+            setFields['reviewRate'] = max(reviewMax - refreshState['reviewMax'], 0) / days
+
+        self.collectionRefresh.update_one({ '_id' : filmID }, { '$set' : setFields }, upsert = True)
+        return
+
+    # Поля нового документа, отличающиеся от сохранённого
+    def changedFields(self, storedDict: Dict[str, Any], newDict: Dict[str, Any]) -> Dict[str, Any]:
+        return { key : value for (key, value) in newDict.items()
+                 if key != '_id' and (storedDict is None or storedDict.get(key) != value) }
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import threading
+import hashlib
+import logging
+
+from typing   import Dict, List, Tuple, Union, Iterator
+from json     import dumps, loads
+from datetime import datetime as dt
+
+try:
+    import zstandard
+
+except ImportError:
+    zstandard = None
+
+# Класс локального архива скачанных страниц: содержимое каждой страницы хранится один раз
+#   в сжатом файле с именем по SHA-256 содержимого, а журнал index.jsonl связывает
+#   URL-адрес и время скачивания с этим файлом; по архиву можно заново разобрать
+#   все страницы без обращения к сервису "КиноПоиск"
+class ResponseArchive(object):
+
+    # Имя журнала архива
+    IndexName = 'index.jsonl'
+
+    # Расширения файлов для поддерживаемых видов сжатия
+    Extensions = {
+        'gzip' : 'gz',
+        'zstd' : 'zst'
+    }
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]]):
+        self.archivePath = configParameters['dataPathArchive']
+        self.compression = configParameters['archiveCompression']
+
+        if self.compression == 'zstd' and zstandard is None:
+            logging.getLogger().warning('Module "zstandard" is not installed, the archive uses gzip!')
+            self.compression = 'gzip'
+
+        self.lock        = threading.Lock()
+
+        os.makedirs(os.path.join(self.archivePath, 'objects'), exist_ok = True)
+
+    # Путь к файлу с содержимым страницы
+    def objectPath(self, digest: str, compression: str) -> str:
+        return os.path.join(self.archivePath, 'objects', digest[:2], f'{digest}.{self.Extensions[compression]}')
+
+    # Сжатие содержимого страницы
+    def compress(self, content: bytes) -> bytes:
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level = 10).compress(content)
+
+        return gzip.compress(content, compresslevel = 6)
+
+    # Распаковка содержимого страницы
+    def decompress(self, data: bytes, compression: str) -> bytes:
+        if compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('Module "zstandard" is required to read this archive!')
+
+            return zstandard.ZstdDecompressor().decompress(data)
+
+        return gzip.decompress(data)
+
+    # Сохранение скачанной страницы в архив; одинаковое содержимое записывается на диск один раз
+    def store(self, url: str, statusCode: int, content: bytes):
+        digest = hashlib.sha256(content).hexdigest()
+        path   = self.objectPath(digest, self.compression)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            tempPath = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tempPath, 'wb') as fileData:
+                fileData.write(self.compress(content))
+
+            os.replace(tempPath, path)
+
+        record = { 'url'         : url,
+                   'time'        : dt.now().isoformat(timespec = 'seconds'),
+                   'status'      : statusCode,
+                   'sha256'      : digest,
+                   'compression' : self.compression }
+
+        with self.lock:
+            with open(os.path.join(self.archivePath, self.IndexName), 'a', encoding = 'utf-8') as fileIndex:
+                fileIndex.write(dumps(record) + '\n')
+
+        return
+
+    # Получение последней записи журнала для каждого URL-адреса в порядке скачивания
+    def latestRecords(self) -> List[Dict[str, Union[int, str]]]:
+        records = {}
+        try:
+            with open(os.path.join(self.archivePath, self.IndexName), 'r', encoding = 'utf-8') as fileIndex:
+                for line in fileIndex:
+                    record = loads(line)
+                    records.pop(record['url'], None)
+                    records[record['url']] = record
+
+        except FileNotFoundError:
+            return []
+
+        return list(records.values())
+
+    # Чтение содержимого страницы по записи журнала
+    def load(self, record: Dict[str, Union[int, str]]) -> bytes:
+        with open(self.objectPath(record['sha256'], record['compression']), 'rb') as fileData:
+            return self.decompress(fileData.read(), record['compression'])
+
+    # Последовательное чтение последних версий всех страниц архива
+    def iterResponses(self) -> Iterator[Tuple[str, int, bytes]]:
+        for record in self.latestRecords():
+            yield (record['url'], record['status'], self.load(record))
+
+        return
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+from typing   import List, Any
+from datetime import datetime as dt
+from bs4      import BeautifulSoup as bs
+
+from dataClass.ReviewDataClass import Review
+
+# Класс для разбора страниц с пользовательскими отзывами с сервиса "КиноПоиск";
+#   не хранит состояния, поэтому может использоваться в отдельных процессах
+class ReviewPageParser(object):
+
+    # Словарь для преобразования названия месяца в его порядковый номер
+    Month = {
+        'января'   : '01',
+        'февраля'  : '02',
+        'марта'    : '03',
+        'апреля'   : '04',
+        'мая'      : '05',
+        'июня'     : '06',
+        'июля'     : '07',
+        'августа'  : '08',
+        'сентября' : '09',
+        'октября'  : '10',
+        'ноября'   : '11',
+        'декабря'  : '12'
+    }
+
+    # Преобразование строки с временем пользовательского отзыва в datetime,
+    #   который хранится в MongoDB как дата без повторного разбора строки
+    def reviewDateAndTime(self, textDate: str) -> dt:    
+        monthKey       = textDate.split(' ')[1]     
+        dateAndTimeStr = textDate.replace(monthKey, self.Month[monthKey])        
+        return dt.strptime(dateAndTimeStr, '%d %m %Y | %H:%M')
+
+    # Получение нового пользовательского отзыва
+    def createNewReview(self, pageElem: Any) -> Review:
+        reviewTitleInit       = pageElem.find('p', class_ = 'sub_title').text.replace(u'\xa0', ' ')
+        reviewTextInit        = pageElem.find('span', itemprop = 'reviewBody').text
+
+        newReview             = Review()
+        newReview.author      = pageElem.find('a', itemprop = 'name').text
+        newReview.title       = reviewTitleInit if (len(reviewTitleInit) > 0) else '?'
+        newReview.dateAndTime = self.reviewDateAndTime(pageElem.find('span', class_ = 'date').text)
+        newReview.reviewText  = reviewTextInit.encode('utf-8', errors = 'replace').decode('utf-8').replace('\r', '')
+        
+        reviewClass = pageElem['class'][1]
+        if   reviewClass == 'neutral':
+            newReview.reviewClass = 1
+         
+        elif reviewClass == 'bad':
+            newReview.reviewClass = 2
+
+        return newReview
+
+    # Скачивание всех пользовательских отзывов со страницы сайта
+    def reviewParsingForPage(self, pageReviews: bs) -> List[Review]:
+        reviewInPageArray = []
+        for elem in pageReviews.findAll('div', itemprop = 'reviews'):
+            reviewInPageArray.append(self.createNewReview(elem))            
+
+        return reviewInPageArray
+
+    # Разбор всех пользовательских отзывов из скачанного содержимого страницы
+    def reviewParsingForContent(self, content: bytes) -> List[Review]:
+        return self.reviewParsingForPage(bs(content, features = 'html.parser'))
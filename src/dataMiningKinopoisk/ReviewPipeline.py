@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import threading
+import queue
+
+from typing             import Dict, List, Tuple, Union, Any
+from concurrent.futures import ProcessPoolExecutor
+
+from dataClass.ReviewDataClass import Review
+
+import dataMiningKinopoisk.ReviewParser as ReviewParser
+import dataMiningKinopoisk.WorkQueue    as WorkQueue
+
+# Разбор страницы с пользовательскими отзывами в отдельном процессе
+def parseReviewPage(content: bytes) -> List[Review]:
+    return ReviewParser.ReviewPageParser().reviewParsingForContent(content)
+
+# Класс конвейера для скачивания пользовательских отзывов из трёх независимых стадий:
+#   потоки скачивания из общей очереди заданий -> пул процессов для разбора страниц -> поток записи в MongoDB;
+#   стадии связаны ограниченными очередями, поэтому медленная стадия тормозит предыдущие;
+#   задание скачивания отмечается выполненным в журнале только после записи его результата
+class ReviewPipeline(object):
+
+    # Инициализация класса
+    def __init__(self, reviewMining: Any, configParameters: Dict[str, Union[int, str]]):
+        self.reviewMining   = reviewMining
+
+        self.parseProcesses = configParameters['parseProcesses']
+
+        self.pageQueue      = queue.Queue(maxsize = configParameters['pipelineQueueSize'])
+        self.writeQueue     = queue.Queue(maxsize = configParameters['pipelineQueueSize'])
+        self.workQueue      = WorkQueue.WorkQueue(configParameters, 'review', reviewMining.journal)
+
+        self.parseThreads   = []
+        self.writeThread    = None
+
+    # Стадия скачивания: одно задание - общая информация о фильме / сериале или страница с отзывами;
+    #   ошибка соединения передаётся в очередь заданий для повторной попытки;
+    #   возвращает True, если результат задания передан следующим стадиям и ещё не записан
+    def fetchStage(self, job: Tuple[int, Union[int, None]]) -> bool:
+        filmID, page = job
+        if page is None:
+            newReviewForFilm, listPages = self.reviewMining.getCommonReviewInfo(filmID)
+            if len(listPages) == 0:
+                return False
+
+            self.writeQueue.put(('header', filmID, newReviewForFilm))
+            self.reviewMining.reviewPagesToQueue(filmID, listPages, self.workQueue)
+            return True
+
+        response = self.reviewMining.http.get(self.reviewMining.reviewPageURL(filmID, page))
+        if response.status_code != 200:
+            self.reviewMining.reviewPageDone(filmID)
+            return False
+
+        self.pageQueue.put((filmID, page, response.content))
+        return True
+
+    # Стадия разбора: каждый поток отдаёт страницу в пул процессов и ждёт результат
+    def parseStage(self, executor: ProcessPoolExecutor):
+        while True:
+            task = self.pageQueue.get()
+            if task is None:
+                return
+
+            filmID, page, content = task
+            try:
+                reviewsInPage = executor.submit(parseReviewPage, content).result()
+
+            except Exception as error:
+                with self.reviewMining.lock:
+                    self.reviewMining.logger.error(f'{filmID} -> Page {page} is not parsed: {error!r} | review')
+
+                reviewsInPage = []
+
+            if len(reviewsInPage) == 0:
+                with self.reviewMining.lock:
+                    self.reviewMining.logger.warning(f'{filmID} -> Not found JSON on the page {page}! | review')
+
+            self.writeQueue.put(('page', filmID, page, reviewsInPage))
+
+    # Стадия записи: каждая разобранная страница сразу добавляется в MongoDB, после чего её задание
+    #   отмечается выполненным; ошибка записи одного сообщения записывается в лог, задание
+    #   отмечается невыполненным, и стадия продолжает работу до сигнала завершения
+    def writeStage(self):
+        while True:
+            message = self.writeQueue.get()
+            if message is None:
+                return
+
+            job = (message[1], None) if message[0] == 'header' else (message[1], message[2])
+            try:
+                if   message[0] == 'header':
+                    self.reviewMining.reviewHeaderToMongoDB(message[2])
+
+                elif message[0] == 'page' and len(message[3]) > 0:
+                    self.reviewMining.reviewPageToMongoDB(message[1], message[2], message[3])
+
+                self.workQueue.jobsDone([job])
+
+            except Exception as error:
+                with self.reviewMining.lock:
+                    self.reviewMining.logger.error(f'{message[1]} -> {message[0].capitalize()} is not written: ' +
+                                                   f'{error!r} | review')
+
+                self.workQueue.jobsFailed([job])
+
+            finally:
+                if message[0] == 'page':
+                    self.reviewMining.reviewPageDone(message[1])
+
+    # Завершение стадий разбора и записи после всех заданий скачивания: оставшиеся страницы
+    #   записываются до того, как очередь заданий очистит журнал этапа
+    def finishStages(self):
+        for _ in self.parseThreads:
+            self.pageQueue.put(None)
+
+        for thr in self.parseThreads:
+            thr.join()
+
+        self.writeQueue.put(None)
+        self.writeThread.join()
+        return
+
+    # Главная функция класса, запускающая все стадии конвейера
+    def main(self):
+        self.reviewMining.reviewFilmsToQueue(self.workQueue)
+
+        with ProcessPoolExecutor(max_workers = self.parseProcesses) as executor:
+            self.writeThread  = threading.Thread(target = self.writeStage)
+            self.parseThreads = [threading.Thread(target = self.parseStage, args = (executor,))
+                                 for _ in range(self.parseProcesses)]
+
+            for thr in [self.writeThread] + self.parseThreads:
+                thr.start()
+
+            self.workQueue.run(self.fetchStage, self.reviewMining.RetryErrors, self.reviewMining.reviewJobFailed,
+                               self.finishStages)
+
+        return
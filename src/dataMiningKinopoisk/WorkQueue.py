@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import threading
+import logging
+import queue
+
+from typing import Dict, List, Tuple, Union, Callable, Any
+from random import random
+from time   import sleep, monotonic
+
+# Класс общей очереди заданий для нескольких потоков скачивания: каждый поток
+#   берёт следующее задание, как только освобождается, а задание с ошибкой соединения
+#   возвращается в конец очереди и выполняется повторно (не больше jobRetries раз);
+#   при наличии журнала состояние каждого задания сохраняется в MongoDB;
+#   в режиме 'distributed' задания берутся не из локальной очереди, а прямо из журнала,
+#   общего для всех процессов скачивания; при включённом регуляторе частоты (rateControl)
+#   потоки не ждут sleepTime между заданиями - паузы задаёт общий регулятор;
+#   задание, результат которого handler только передал на запись (вернул True), отмечается
+#   выполненным не сразу, а после записи в MongoDB (jobsDone / jobsFailed)
+class WorkQueue(object):
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], name: str, journal: Any = None):
+        self.threads     = configParameters['threads']
+        self.sleepTime   = configParameters['sleepTime']
+        self.rateControl = configParameters['rateControl']
+        self.jobRetries  = configParameters['jobRetries']
+        self.crawlMode   = configParameters['crawlMode']
+        self.leaseTime   = configParameters['leaseTime']
+        self.waitTime    = configParameters['claimWaitTime']
+
+        self.name        = name
+        self.journal     = journal
+
+        self.jobQueue    = queue.Queue()
+        self.workStats   = []
+        self.stopEvent   = threading.Event()
+
+        self.lock        = threading.Lock()
+        self.logger      = logging.getLogger()
+
+    # Проверка режима, в котором задания берутся из общего журнала
+    def isDistributed(self) -> bool:
+        return self.crawlMode == 'distributed' and self.journal is not None
+
+    # Добавление нового задания в очередь; можно вызывать и из выполняемого задания
+    def put(self, job: Any, attempt: int = 0):
+        if self.journal is not None and attempt == 0:
+            self.journal.addJobs(self.name, [job])
+
+        if not self.isDistributed():
+            self.jobQueue.put((job, attempt))
+
+        return
+
+    # Добавление нескольких новых заданий в очередь одной записью в журнал
+    def putAll(self, jobs: List[Any]):
+        if self.journal is not None:
+            self.journal.addJobs(self.name, jobs)
+
+        if not self.isDistributed():
+            for job in jobs:
+                self.jobQueue.put((job, 0))
+
+        return
+
+    # Повторная постановка задания в очередь после ошибки соединения
+    def retry(self, job: Any, attempt: int):
+        if self.isDistributed():
+            self.journal.releaseJob(self.name, job)
+
+        else:
+            self.put(job, attempt + 1)
+
+        return
+
+    # Получение следующего задания: из локальной очереди или захватом из журнала;
+    #   пока другие процессы выполняют задания этапа, свободный поток ждёт
+    def getJob(self) -> Union[Tuple[Any, int], None]:
+        if not self.isDistributed():
+            return self.jobQueue.get()
+
+        while True:
+            task = self.journal.claimJob(self.name)
+            if task is not None:
+                return (task[0], task[1] - 1)
+
+            if not self.journal.hasActiveJobs(self.name):
+                return None
+
+            sleep(self.waitTime)
+
+    # Продление выполнения своих заданий в журнале, пока идёт скачивание
+    def heartbeat(self):
+        while not self.stopEvent.wait(self.leaseTime / 3):
+            self.journal.heartbeat()
+
+        return
+
+    # Сохранение в журнале нового состояния задания
+    def journalJob(self, state: str, job: Any):
+        if self.journal is None:
+            return
+
+        if   state == 'leased':
+            self.journal.leaseJob(self.name, job)
+
+        elif state == 'done':
+            self.journal.doneJob(self.name, job)
+
+        elif state == 'failed':
+            self.journal.failJob(self.name, job)
+
+        return
+
+    # Отметка о выполнении заданий, результат которых записан в MongoDB после самого задания
+    def jobsDone(self, jobs: List[Any]):
+        if self.journal is not None and len(jobs) > 0:
+            self.journal.doneJobs(self.name, jobs)
+
+        return
+
+    # Отметка о заданиях, результат которых не удалось записать в MongoDB
+    def jobsFailed(self, jobs: List[Any]):
+        for job in jobs:
+            self.journalJob('failed', job)
+
+        return
+
+    # Обработчик очереди заданий в отдельном потоке
+    def worker(self, workerID: int, handler: Callable[[Any], Union[bool, None]],
+               retryErrors: Tuple[type, ...], failHandler: Callable[[Any], None]):
+
+        workStats = { 'worker' : workerID, 'done' : 0, 'retried' : 0, 'failed' : 0, 'busyTime' : 0.0 }
+        with self.lock:
+            self.workStats.append(workStats)
+
+        flagFirst = True
+        while True:
+            task = self.getJob()
+            if task is None:
+                return
+
+            job, attempt = task
+            if not flagFirst and not self.rateControl:
+                sleep((1 + random()) * self.sleepTime)
+
+            flagFirst = False
+            timeStart = monotonic()
+            try:
+                if not self.isDistributed():
+                    self.journalJob('leased', job)
+
+                if not handler(job):
+                    self.journalJob('done', job)
+
+                workStats['done'] += 1
+
+            except retryErrors as error:
+                if attempt < self.jobRetries:
+                    workStats['retried'] += 1
+                    self.retry(job, attempt)
+
+                else:
+                    workStats['failed'] += 1
+                    self.journalJob('failed', job)
+                    with self.lock:
+                        self.logger.error(f'{job} -> Connection is broken! ({error!r}) | {self.name}')
+
+                    if failHandler is not None:
+                        failHandler(job)
+
+            except Exception as error:
+                workStats['failed'] += 1
+                self.journalJob('failed', job)
+                with self.lock:
+                    self.logger.error(f'{job} -> Job is failed: {error!r} | {self.name}')
+
+                if failHandler is not None:
+                    failHandler(job)
+
+            finally:
+                workStats['busyTime'] += monotonic() - timeStart
+                if not self.isDistributed():
+                    self.jobQueue.task_done()
+
+    # Выполнение всех заданий очереди в threads потоках; возвращает статистику по каждому потоку;
+    #   flushHandler дописывает в MongoDB результаты заданий, ещё не записанные к концу очереди
+    def run(self, handler: Callable[[Any], Union[bool, None]], retryErrors: Tuple[type, ...],
+            failHandler: Callable[[Any], None] = None,
+            flushHandler: Callable[[], None] = None) -> List[Dict[str, Union[int, float]]]:
+
+        workThreads = [threading.Thread(target = self.worker, args = (i, handler, retryErrors, failHandler))
+                       for i in range(self.threads)]
+
+        heartbeatThread = None
+        if self.isDistributed():
+            self.journal.releasePlan(self.name)
+            self.stopEvent.clear()
+            heartbeatThread = threading.Thread(target = self.heartbeat, daemon = True)
+            heartbeatThread.start()
+
+        for thr in workThreads:
+            thr.start()
+
+        if not self.isDistributed():
+            self.jobQueue.join()
+            for _ in workThreads:
+                self.jobQueue.put(None)
+
+        for thr in workThreads:
+            thr.join()
+
+        if flushHandler is not None:
+            flushHandler()
+
+        if heartbeatThread is not None:
+            self.stopEvent.set()
+            heartbeatThread.join()
+
+        for workStats in self.workStats:
+            self.logger.debug(f'Worker {workStats["worker"]} ({self.name}): done = {workStats["done"]}, ' +
+                              f'retried = {workStats["retried"]}, failed = {workStats["failed"]}, ' +
+                              f'busy = {workStats["busyTime"]:.1f} s')
+
+        if self.journal is not None:
+            self.journal.clearStage(self.name)
+
+        return self.workStats
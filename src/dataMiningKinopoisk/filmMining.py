@@ -1,28 +1,33 @@
 #!/usr/bin/env python3
 
+import re
 import requests
 import threading
 import logging
+import asyncio
 
-from typing  import Dict, List, Union
-from random  import random
-from time    import sleep
-from json    import loads
-from bs4     import BeautifulSoup as bs
-from pymongo import MongoClient
+from typing    import Dict, List, Union, Any
+from pymongo   import MongoClient
 
 from dataClass.FilmDataClass import Person, Film
+from dataStorage             import PersonStorage
+
+import dataMiningKinopoisk.FilmMisses       as FilmMisses
+import dataMiningKinopoisk.AsyncMining      as AsyncMining
+import dataMiningKinopoisk.HTTPSession      as HTTPSession
+import dataMiningKinopoisk.FilmJSONExtract  as FilmJSONExtract
+import dataMiningKinopoisk.FilmWriter       as FilmWriter
+import dataMiningKinopoisk.WorkQueue        as WorkQueue
+import dataMiningKinopoisk.CrawlJournal     as CrawlJournal
+import dataMiningKinopoisk.ResponseArchive  as ResponseArchive
+import dataMiningKinopoisk.RefreshScheduler as RefreshScheduler
+import dataMiningKinopoisk.RateController   as RateController
+import dataMiningKinopoisk.ProxyPool        as ProxyPool
 
 # Класс для скачивания данных с помощью Web-Scrapping
 #   о различных фильмах / сериалах с сервиса "КиноПоиск"
 class FilmMining(object):
     
-    # Proxy-сервера для обхода блокировки сайта
-    Proxies = {
-        'http'  : 'http://10.10.1.10:3128',
-        'https' : 'http://10.10.1.10:1080'
-    }
-
     # URL-адрес сервиса "КиноПоиск"
     KinopoiskURL = 'https://www.kinopoisk.ru/film/'
     
@@ -32,6 +37,12 @@ class FilmMining(object):
         'Referer'    : 'https://sso.kinopoisk.ru/'
     }
 
+    # Ошибки, после которых задание повторяется позже
+    RetryErrors = (requests.ConnectionError, requests.Timeout, RateController.ThrottledError)
+
+    # Регулярное выражение для URL-адреса страницы фильма / сериала в архиве
+    FilmURLPattern = re.compile(r'/film/(\d+)/$')
+
     # Инициализация класса
     def __init__(self, configParameters: Dict[str, Union[int, str]],
                  mongoClient: MongoClient, IDArray: List[int]):
@@ -40,10 +51,32 @@ class FilmMining(object):
         self.databaseName  = configParameters['databaseName']
         self.threads       = configParameters['threads']
         self.sleepTime     = configParameters['sleepTime']
+        self.engine        = configParameters['engine']
+
+        self.configParameters = configParameters
         
         self.collection    = mongoClient[self.databaseName][self.dataPathFilms]
 
         self.IDArray       = IDArray
+        self.minedIDs      = []
+
+        self.missRegistry  = FilmMisses.FilmMissRegistry(configParameters, mongoClient)
+        self.extractor     = FilmJSONExtract.FilmJSONExtractor()
+        self.persons       = PersonStorage.PersonStorage(configParameters, mongoClient)
+        self.scheduler     = RefreshScheduler.RefreshScheduler(configParameters, mongoClient)
+        self.writer        = FilmWriter.BufferedFilmWriter(configParameters, self.collection,
+                                                           personStorage = self.persons,
+                                                           scheduler     = self.scheduler)
+        self.journal       = CrawlJournal.CrawlJournal(configParameters, mongoClient)
+        self.archive       = ResponseArchive.ResponseArchive(configParameters) \
+                                if configParameters['archiveResponses'] else None
+        self.controller    = RateController.RateController(configParameters) \
+                                if configParameters['rateControl'] else None
+        self.proxyPool     = ProxyPool.ProxyPool(configParameters) \
+                                if configParameters['proxies'] else None
+
+        self.http = HTTPSession.HTTPSessionPool(configParameters, self.URLHeaders, self.archive,
+                                                self.controller, self.proxyPool)
 
         self.lock = threading.Lock()
         
@@ -105,62 +138,193 @@ class FilmMining(object):
 
         return newFilm
 
-    # Добавление новой записи в MongoDB
-    def filmToMongoDB(self, film: Film):
+    # Добавление новой записи в буфер для пакетной записи в MongoDB
+    def filmToMongoDB(self, film: Film, job: Any = None):
+        self.writer.add(film, job)
         with self.lock:
-            checkFilm = self.collection.find_one({ '_id' : film._id })
-            if checkFilm is None:
-                self.collection.insert_one(film.toDict())
-                
             print(' Film:', film._id)
+
         return
 
-    # Скачивание необходимых данных с сервиса "КиноПоиск"
-    def urlFilmParsing(self, IDArray: int):
-        for ID in IDArray:
-            if ID != IDArray[0]:
-                sleep((1 + random()) * self.sleepTime)
-                
-            try:
-                response = requests.get(self.KinopoiskURL + f'{ID}/',
-                                        headers = self.URLHeaders)
-                
-            except requests.ConnectionError:
-                with self.lock:
-                    self.logger.error(f'{ID} -> Connection is broken! | film')
-                    
-                break
-            
-            if response.status_code != 200:
+    # Разбор скачанной страницы фильма / сериала и запись результата в MongoDB (время скачивания
+    #   сохраняется в планировщике обновления при записи буфера); возвращает True,
+    #   если фильм / сериал передан в буфер и ещё не записан
+    def filmPageToMongoDB(self, ID: int, statusCode: int, content: bytes) -> bool:
+        with self.lock:
+            self.minedIDs.append(ID)
+
+        if statusCode != 200:
+            self.missRegistry.registerMiss(ID, f'status/{statusCode}')
+            return False
+
+        film = self.filmFromPage(ID, content)
+        if film is None:
+            self.missRegistry.registerMiss(ID, 'noJSON')
+            return False
+
+        self.filmToMongoDB(film, ID)
+        return True
+
+    # Разбор страницы фильма / сериала без учёта в реестре промахов и в планировщике обновления
+    def filmFromPage(self, ID: int, content: bytes) -> Union[Film, None]:
+        dataJSON = self.extractor.extractJSON(content)
+        if dataJSON is None:
+            with self.lock:
+                self.logger.warning(f'{ID} -> Not found JSON on the site! | film')
+
+            return None
+
+        return self.JSONToFilm(dataJSON)
+
+    # Скачивание данных об одном фильме / сериале с сервиса "КиноПоиск";
+    #   ошибка соединения передаётся в очередь заданий для повторной попытки; задание
+    #   с найденным фильмом / сериалом отмечается выполненным после записи буфера
+    def urlFilmParsing(self, ID: int) -> bool:
+        response = self.http.get(self.KinopoiskURL + f'{ID}/')
+        return self.filmPageToMongoDB(ID, response.status_code, response.content)
+    
+    # Повторное скачивание сохранённого фильма / сериала условным запросом:
+    #   в MongoDB обновляются только изменившиеся поля
+    def urlFilmRefresh(self, ID: int):
+        response = self.http.get(self.KinopoiskURL + f'{ID}/', headers = self.scheduler.conditionalHeaders(ID))
+        if response.status_code == 304:
+            self.scheduler.recordFetch(ID, response.headers)
+            return
+
+        if response.status_code != 200:
+            with self.lock:
+                self.logger.warning(f'{ID} -> Not refreshed, status {response.status_code}! | film')
+
+            return
+
+        dataJSON = self.extractor.extractJSON(response.content)
+        if dataJSON is None:
+            with self.lock:
+                self.logger.warning(f'{ID} -> Not found JSON on the site! | film')
+
+            return
+
+        film          = self.JSONToFilm(dataJSON).toDict()
+        changedFields = self.scheduler.changedFields(self.collection.find_one({ '_id' : ID }), film)
+        if len(changedFields) > 0:
+            self.collection.update_one({ '_id' : ID }, { '$set' : changedFields })
+
+        if any(key in changedFields for key in ('ratingValue',) + PersonStorage.PersonStorage.Roles):
+            self.persons.filmsToMongoDB([film])
+
+        self.scheduler.recordFetch(ID, response.headers)
+        with self.lock:
+            print(' Refresh:', ID, sorted(changedFields.keys()))
+
+        return
+
+    # Запуск повторного скачивания выбранных планировщиком фильмов / сериалов
+    def refreshMain(self):
+        print('\t The data about films is refreshing...')
+        self.logger.debug('The data about films is refreshing...')
+
+        workQueue = WorkQueue.WorkQueue(self.configParameters, 'refresh')
+        workQueue.putAll(self.IDArray)
+        workQueue.run(self.urlFilmRefresh, self.RetryErrors)
+
+        print('\t The data about films was refreshed successfully!')
+        self.logger.debug('The data about films was refreshed successfully!')
+        return
+
+    # Регистрация промаха для фильма / сериала, который не удалось скачать после всех попыток;
+    #   повторная попытка откладывается, как для других временных промахов
+    def filmJobFailed(self, ID: int):
+        self.missRegistry.registerMiss(ID, 'jobFailed')
+        return
+
+    # Асинхронное скачивание данных об одном фильме / сериале с сервиса "КиноПоиск";
+    #   ошибка соединения передаётся в очередь заданий для повторной попытки
+    async def asyncFilmParsing(self, ID: int, crawler: AsyncMining.AsyncCrawler):
+        statusCode, content = await crawler.fetch(self.KinopoiskURL + f'{ID}/')
+        await asyncio.to_thread(self.filmPageToMongoDB, ID, statusCode, content)
+        return
+
+    # Запуск асинхронного скачивания данных обо всех фильмах / сериалах
+    def asyncMain(self):
+        crawler = AsyncMining.AsyncCrawler(self.configParameters, self.URLHeaders, self.archive,
+                                           self.controller, self.proxyPool)
+        crawler.putAll(self.IDArray)
+        crawler.run(self.asyncFilmParsing, self.filmJobFailed)
+        return
+
+    # Запуск нескольких параллельных потоков на скачивание данных из общей очереди заданий
+    def threadMain(self):
+        workQueue = WorkQueue.WorkQueue(self.configParameters, 'film', self.journal)
+        workQueue.putAll(self.IDArray)
+
+        self.writer.setWorkQueue(workQueue)
+        workQueue.run(self.urlFilmParsing, self.RetryErrors, self.filmJobFailed, self.writer.flush)
+
+        httpStats = self.http.getStats()
+        self.logger.debug(f'HTTP films: requests = {httpStats["requests"]}, ' +
+                          f'connections = {httpStats["connections"]}, reused = {httpStats["reused"]}')
+        if self.controller is not None:
+            self.logger.debug(f'Rate films: {self.controller.rate:.2f} per minute, ' +
+                              f'success = {self.controller.stats["success"]}, ' +
+                              f'throttled = {self.controller.stats["throttled"]}')
+
+        if self.proxyPool is not None:
+            for proxyStats in self.proxyPool.getStats():
+                self.logger.debug(f'Proxy films: {proxyStats}')
+
+        self.http.close()
+        return
+
+    # Повторный разбор всех страниц фильмов / сериалов из архива без обращения к сервису "КиноПоиск";
+    #   уже существующие записи в MongoDB заменяются результатом нового разбора; страницы с ошибкой
+    #   пропускаются, а реестр промахов и время скачивания в планировщике обновления не меняются,
+    #   так как они относятся к прежнему скачиванию, а не к разбору архива; ID всех страниц
+    #   сохраняются в minedIDs для отметки в битовой карте посещённых ID
+    def replayMain(self, archive: ResponseArchive.ResponseArchive):
+        print('\t The data about films is replaying from the archive...')
+        self.logger.debug('The data about films is replaying from the archive...')
+
+        self.writer = FilmWriter.BufferedFilmWriter(self.configParameters, self.collection, replace = True,
+                                                    personStorage = self.persons)
+        for record in archive.latestRecords():
+            urlFind = self.FilmURLPattern.search(record['url'])
+            if urlFind is None:
                 continue
-            
-            pageKinopoisk = bs(response.content, features = 'html.parser')
-            jsonFind      = pageKinopoisk.find('script', type = 'application/ld+json')
-            if jsonFind is None:               
-                with self.lock:
-                    self.logger.warning(f'{ID} -> Not found JSON on the site! | film')
-                    
+
+            ID = int(urlFind.group(1))
+            self.minedIDs.append(ID)
+            if record['status'] != 200:
                 continue
 
-            self.filmToMongoDB(self.JSONToFilm(loads(jsonFind.text)))
+            try:
+                film = self.filmFromPage(ID, archive.load(record))
+                if film is not None:
+                    self.filmToMongoDB(film)
+
+            except (KeyError, ValueError) as error:
+                self.logger.error(f'{urlFind.group(1)} -> Page is not parsed: {error!r} | film')
 
+        self.writer.close()
+
+        print('\t The data about films was replayed successfully!')
+        self.logger.debug('The data about films was replayed successfully!')
         return
-    
-    # Главная функция класса, запускающая несколько параллельных потоков на скачивание данных
+
+    # Главная функция класса, запускающая скачивание данных в потоках или асинхронно
     def main(self):
         print('\t The data about films is downloading...')
         self.logger.debug('The data about films is downloading...')
 
-        threadFilmArray = []        
-        IDArrays        = [self.IDArray[i::self.threads] for i in range(self.threads)]
-        
-        for i in range(self.threads):
-            thr = threading.Thread(target = self.urlFilmParsing, args = (IDArrays[i],))
-            threadFilmArray.append(thr)
-            thr.start()
-        
-        for thr in threadFilmArray:
-            thr.join()
+        self.writer.start()
+        try:
+            if self.engine == 'async':
+                self.asyncMain()
+
+            else:
+                self.threadMain()
+
+        finally:
+            self.writer.close()
 
         print('\t The data about films was downloaded successfully!')
         self.logger.debug('The data about films was downloaded successfully!')
@@ -169,10 +333,46 @@ class FilmMining(object):
 if __name__ == '__main__':
     
     defaultConfigParameters = {
-        'databaseName'  : 'userReviews',
-        'dataPathFilms' : 'films',
-        'threads'       : 4,
-        'sleepTime'     : 30
+        'databaseName'        : 'userReviews',
+        'dataPathFilms'       : 'films',
+        'dataPathPersons'     : 'persons',
+        'dataPathFilmPersons' : 'filmPersons',
+        'dataPathMisses'      : 'filmMisses',
+        'missRetryDays'       : 30,
+        'dataPathJournal'     : 'crawlJournal',
+        'leaseTime'           : 600,
+        'crawlMode'           : 'local',
+        'claimWaitTime'       : 10,
+        'archiveResponses'    : 0,
+        'dataPathArchive'     : './archive',
+        'archiveCompression'  : 'gzip',
+        'dataPathRefresh'     : 'refreshState',
+        'refreshFilms'        : 0,
+        'refreshMinAgeDays'   : 7,
+        'refreshDefaultAge'   : 365,
+        'refreshReviewWeight' : 10,
+        'threads'             : 4,
+        'sleepTime'           : 30,
+        'jobRetries'          : 2,
+        'engine'              : 'threads',
+        'requestsPerMinute'   : 4,
+        'requestBurst'        : 1,
+        'concurrency'         : 100,
+        'jitterTime'          : 5,
+        'rateControl'         : 0,
+        'rateMin'             : 1,
+        'rateMax'             : 60,
+        'rateIncrease'        : 2,
+        'rateDecrease'        : 50,
+        'proxies'             : '',
+        'proxyMode'           : 'request',
+        'proxyMaxFailures'    : 3,
+        'proxyEjectTime'      : 300,
+        'poolSize'            : 10,
+        'requestRetries'      : 3,
+        'requestTimeout'      : 30,
+        'writeBatchSize'      : 100,
+        'writeFlushTime'      : 30
     }
 
     mongoClient = MongoClient('mongodb://localhost:27017/')
@@ -1,28 +1,35 @@
 #!/usr/bin/env python3
 
+import re
 import requests
 import threading
 import logging
+import asyncio
 
-from typing   import Dict, List, Tuple, Union, Any
-from random   import random
-from time     import sleep
-from datetime import datetime as dt
-from bs4      import BeautifulSoup as bs
-from pymongo  import MongoClient
+from typing             import Dict, List, Tuple, Union
+from functools          import partial
+from concurrent.futures import ProcessPoolExecutor
+from bs4                import BeautifulSoup as bs
+from pymongo            import MongoClient
 
 from dataClass.ReviewDataClass import Review, ReviewForFilm
+from dataStorage                import ReviewStorage
+
+import dataMiningKinopoisk.AsyncMining      as AsyncMining
+import dataMiningKinopoisk.HTTPSession      as HTTPSession
+import dataMiningKinopoisk.ReviewParser     as ReviewParser
+import dataMiningKinopoisk.ReviewPipeline   as ReviewPipeline
+import dataMiningKinopoisk.WorkQueue        as WorkQueue
+import dataMiningKinopoisk.CrawlJournal     as CrawlJournal
+import dataMiningKinopoisk.ResponseArchive  as ResponseArchive
+import dataMiningKinopoisk.RefreshScheduler as RefreshScheduler
+import dataMiningKinopoisk.RateController   as RateController
+import dataMiningKinopoisk.ProxyPool        as ProxyPool
 
 # Класс для скачивания данных с помощью Web-Scrapping
 #   о пользовательских отзывах к различным фильмам / сериалам с сервиса "КиноПоиск"
-class ReviewMining(object):
+class ReviewMining(ReviewParser.ReviewPageParser):
     
-    # Proxy-сервера для обхода блокировки сайта
-    Proxies = {
-        'http'  : 'http://10.10.1.10:3128',
-        'https' : 'http://10.10.1.10:1080'
-    }
-
     # URL-адрес сервиса "КиноПоиск"
     KinopoiskURL = 'https://www.kinopoisk.ru/film/'
     
@@ -31,22 +38,16 @@ class ReviewMining(object):
         'User-Agent' : 'Chrome/120.0.0.0 YaBrowser/24.1.0.0',
         'Referer'    : 'https://sso.kinopoisk.ru/'
     }
-    
-    # Словарь для преобразования названия месяца в его порядковый номер
-    Month = {
-        'января'   : '01',
-        'февраля'  : '02',
-        'марта'    : '03',
-        'апреля'   : '04',
-        'мая'      : '05',
-        'июня'     : '06',
-        'июля'     : '07',
-        'августа'  : '08',
-        'сентября' : '09',
-        'октября'  : '10',
-        'ноября'   : '11',
-        'декабря'  : '12'
-    }
+
+    # Регулярные выражения для URL-адресов страниц с отзывами в архиве
+    HeaderURLPattern = re.compile(r'/film/(\d+)/reviews$')
+    PageURLPattern   = re.compile(r'/film/(\d+)/reviews/ord/date/status/all/perpage/200/page/(\d+)/$')
+
+    # Ошибки, после которых задание повторяется позже
+    RetryErrors = (requests.ConnectionError, requests.Timeout, RateController.ThrottledError)
+
+    # Количество страниц с отзывами, одновременно разбираемых при повторном разборе архива
+    ReplayBatchSize  = 200
 
     # Инициализация класса
     def __init__(self, configParameters: Dict[str, Union[int, str]],
@@ -56,11 +57,26 @@ class ReviewMining(object):
         self.dataPathReviews = configParameters['dataPathReviews']
         self.threads         = configParameters['threads']
         self.sleepTime       = configParameters['sleepTime']
+        self.engine          = configParameters['engine']
+
+        self.configParameters = configParameters
     
-        self.collection      = mongoClient[self.databaseName][self.dataPathReviews]
+        self.storage         = ReviewStorage.ReviewStorage(configParameters, mongoClient)
+        self.journal         = CrawlJournal.CrawlJournal(configParameters, mongoClient)
+        self.archive         = ResponseArchive.ResponseArchive(configParameters) \
+                                  if configParameters['archiveResponses'] else None
+        self.scheduler       = RefreshScheduler.RefreshScheduler(configParameters, mongoClient)
+        self.controller      = RateController.RateController(configParameters) \
+                                  if configParameters['rateControl'] else None
+        self.proxyPool       = ProxyPool.ProxyPool(configParameters) \
+                                  if configParameters['proxies'] else None
 
         self.reviewFilmPage  = reviewFilmPage
+        self.pagesLeft       = {}
         
+        self.http = HTTPSession.HTTPSessionPool(configParameters, self.URLHeaders, self.archive,
+                                                self.controller, self.proxyPool)
+
         self.lock = threading.Lock()
         
         logging.basicConfig(
@@ -70,57 +86,17 @@ class ReviewMining(object):
         )       
         self.logger = logging.getLogger()
     
-    # Преобразование строки с временем пользовательского отзыва в нужный формат
-    def reviewDateAndTime(self, textDate: str) -> str:    
-        monthKey       = textDate.split(' ')[1]     
-        dateAndTimeStr = textDate.replace(monthKey, self.Month[monthKey])        
-        dateAndTimeDt  = dt.strptime(dateAndTimeStr, '%d %m %Y | %H:%M')
-        return dateAndTimeDt.strftime('%H:%M|%d.%m.%Y')
-
-    # Получение нового пользовательского отзыва
-    def createNewReview(self, pageElem: Any) -> Review:
-        reviewTitleInit       = pageElem.find('p', class_ = 'sub_title').text.replace(u'\xa0', ' ')
-        reviewTextInit        = pageElem.find('span', itemprop = 'reviewBody').text
-
-        newReview             = Review()
-        newReview.author      = pageElem.find('a', itemprop = 'name').text
-        newReview.title       = reviewTitleInit if (len(reviewTitleInit) > 0) else '?'
-        newReview.dateAndTime = self.reviewDateAndTime(pageElem.find('span', class_ = 'date').text)
-        newReview.reviewText  = reviewTextInit.encode('utf-8', errors = 'replace').decode('utf-8').replace('\r', '')
-        
-        reviewClass = pageElem['class'][1]
-        if   reviewClass == 'neutral':
-            newReview.reviewClass = 1
-         
-        elif reviewClass == 'bad':
-            newReview.reviewClass = 2
+    # URL-адрес страницы со всеми пользовательскими отзывами (по 200 на странице)
+    def reviewPageURL(self, filmID: int, page: int) -> str:
+        return self.KinopoiskURL + f'{filmID}/reviews/ord/date/status/all/perpage/200/page/{page}/'
 
-        return newReview
-
-    # Скачивание всех пользовательских отзывов со страницы сайта
-    def reviewParsingForPage(self, pageReviews: bs) -> List[Review]:
-        reviewInPageArray = []
-        for elem in pageReviews.findAll('div', itemprop = 'reviews'):
-            reviewInPageArray.append(self.createNewReview(elem))            
-
-        return reviewInPageArray
-
-    # Заполнение общих полей в классе ReviewForFilm
-    def getCommonReviewInfo(self, filmID: int) -> Tuple[ReviewForFilm, List[int]]:
-        try:
-            response = requests.get(self.KinopoiskURL + f'{filmID}/reviews',
-                                    headers = self.URLHeaders)
-                
-        except requests.ConnectionError:
-            with self.lock:
-                self.logger.error(f'{filmID} -> Connection is broken! | review')
-            
+    # Заполнение общих полей в классе ReviewForFilm по скачанной странице
+    def commonReviewInfoFromPage(self, filmID: int, statusCode: int,
+                                 content: bytes) -> Tuple[ReviewForFilm, List[int]]:
+        if statusCode != 200:
             return [ReviewForFilm(), []]
             
-        if response.status_code != 200:
-            return [ReviewForFilm(), []]
-            
-        pageKinopoisk   = bs(response.content, features = 'html.parser')
+        pageKinopoisk   = bs(content, features = 'html.parser')
         reviewCountFind = pageKinopoisk.find('li', class_ = 'all')
             
         if reviewCountFind is None:                
@@ -142,88 +118,261 @@ class ReviewMining(object):
         
         return [newReviewForFilm, list(range(1, (reviewCountMax + 199) // 200 + 1))]
 
-    # Добавление новой записи в MongoDB
-    def reviewToMongoDB(self, review: ReviewForFilm, flagCreate: bool):
-        reviewToDict = review.toDict()
+    # Заполнение общих полей в классе ReviewForFilm; ошибка соединения
+    #   передаётся в очередь заданий для повторной попытки
+    def getCommonReviewInfo(self, filmID: int) -> Tuple[ReviewForFilm, List[int]]:
+        response = self.http.get(self.KinopoiskURL + f'{filmID}/reviews')
+        return self.commonReviewInfoFromPage(filmID, response.status_code, response.content)
+
+    # Разбор скачанной страницы с пользовательскими отзывами
+    def reviewPageToList(self, filmID: int, page: int, statusCode: int, content: bytes) -> List[Review]:
+        if statusCode != 200:
+            return []
+
+        reviewsInPage = self.reviewParsingForContent(content)
+        if len(reviewsInPage) == 0:  
+            with self.lock:
+                self.logger.warning(f'{filmID} -> Not found JSON on the page {page}! | review')
+
+        return reviewsInPage
+
+    # Добавление в MongoDB записи с общей информацией об отзывах без самих отзывов
+    def reviewHeaderToMongoDB(self, review: ReviewForFilm):
+        self.storage.headerToMongoDB(review)
+        return
+
+    # Добавление в MongoDB отзывов с одной страницы
+    def reviewPageToMongoDB(self, filmID: int, page: int, reviews: List[Review]):
+        self.storage.pageToMongoDB(filmID, page, reviews)
+        return
+
+    # Вывод информации о завершении скачивания отзывов к фильму / сериалу
+    def reviewDone(self, filmID: int):
         with self.lock:
-            if flagCreate:
-                self.collection.insert_one(reviewToDict)
-                
-            else:               
-                self.collection.update_one({ '_id'  : reviewToDict['_id'] },
-                                           { '$set' : { 'pages'  : reviewToDict['pages'],
-                                                       'reviews' : reviewToDict['reviews'] }})                
-            print(' Review:', reviewToDict['_id'])           
-        return
-
-    # Скачивание необходимых данных с сервиса "КиноПоиск"
-    def urlReviewParsing(self, reviewFilmPage: List[Tuple[int, List[int]]]):
-        for (filmID, pages) in reviewFilmPage:
-            if filmID != reviewFilmPage[0][0]:
-                sleep((1 + random()) * self.sleepTime)
-                
-            listPages  = pages
-            flagCreate = True
-            if len(pages) == 0:
-                newReviewForFilm, listPages = self.getCommonReviewInfo(filmID)
-                if len(listPages) == 0:
-                    continue
+            print(' Review:', filmID)
 
-            else:
-                flagCreate = False
-                with self.lock:
-                    newReviewForFilm = ReviewForFilm(**self.collection.find_one({ '_id' : filmID }))
-                    
-            for page in listPages:
-                if page != listPages[0]:
-                    sleep((1 + random()) * self.sleepTime)
-                    
-                try:
-                    response = requests.get(self.KinopoiskURL + 
-                                            f'{filmID}/reviews/ord/date/status/all/' + 
-                                            f'perpage/200/page/{page}/',
-                                            headers = self.URLHeaders)
-                
-                except requests.ConnectionError:
-                    with self.lock:
-                        self.logger.error(f'{filmID} -> Connection is broken! | review')
-                    
-                    return
-            
-                if response.status_code != 200:
-                    continue
+        return
+
+    # Постановка в очередь заданий всех страниц с отзывами к фильму / сериалу
+    def reviewPagesToQueue(self, filmID: int, pages: List[int],
+                           workQueue: Union[WorkQueue.WorkQueue, AsyncMining.AsyncCrawler]):
+        with self.lock:
+            self.pagesLeft[filmID] = len(pages)
+
+        workQueue.putAll([(filmID, page) for page in pages])
+        return
+
+    # Учёт обработанной страницы с отзывами; после последней страницы фильм / сериал считается скачанным
+    #   (страницы, поставленные в журнал другим процессом, не учитываются)
+    def reviewPageDone(self, filmID: int):
+        with self.lock:
+            if filmID not in self.pagesLeft:
+                return
+
+            self.pagesLeft[filmID] -= 1
+            flagDone = self.pagesLeft[filmID] == 0
+            if flagDone:
+                del self.pagesLeft[filmID]
 
-                pageReviews   = bs(response.content, features = 'html.parser')               
-                reviewsInPage = self.reviewParsingForPage(pageReviews)
-                if len(reviewsInPage) == 0:  
-                    with self.lock:
-                        self.logger.warning(f'{filmID} -> Not found JSON on the page {page}! | review')
-                        
-                    continue
+        if flagDone:
+            self.reviewDone(filmID)
+
+        return
+
+    # Постановка в очередь заданий всех фильмов / сериалов: для фильма без известных страниц
+    #   сначала скачивается общая информация (задание с page = None)
+    def reviewFilmsToQueue(self, workQueue: Union[WorkQueue.WorkQueue, AsyncMining.AsyncCrawler]):
+        workQueue.putAll([(filmID, None) for (filmID, pages) in self.reviewFilmPage.items() if len(pages) == 0])
+        for (filmID, pages) in self.reviewFilmPage.items():
+            if len(pages) > 0:
+                self.reviewPagesToQueue(filmID, pages, workQueue)
+
+        return
 
-                newReviewForFilm.pages.append(page)
-                newReviewForFilm.reviews += reviewsInPage
-                
-            self.reviewToMongoDB(newReviewForFilm, flagCreate)
+    # Скачивание общей информации об отзывах и постановка в очередь страниц с отзывами
+    def reviewHeaderParsing(self, filmID: int, workQueue: WorkQueue.WorkQueue):
+        newReviewForFilm, listPages = self.getCommonReviewInfo(filmID)
+        if len(listPages) == 0:
+            return
 
+        self.reviewHeaderToMongoDB(newReviewForFilm)
+        self.reviewPagesToQueue(filmID, listPages, workQueue)
+        return
+
+    # Отметка о страницах, которые не удалось скачать после всех повторных попыток
+    def reviewJobFailed(self, job: Tuple[int, Union[int, None]]):
+        if job[1] is not None:
+            self.reviewPageDone(job[0])
+
+        return
+
+    # Выполнение одного задания из очереди: скачивание общей информации
+    #   об отзывах или одной страницы с отзывами с сервиса "КиноПоиск"
+    def urlReviewParsing(self, job: Tuple[int, Union[int, None]], workQueue: WorkQueue.WorkQueue):
+        filmID, page = job
+        if page is None:
+            self.reviewHeaderParsing(filmID, workQueue)
+            return
+
+        response      = self.http.get(self.reviewPageURL(filmID, page))
+        reviewsInPage = self.reviewPageToList(filmID, page, response.status_code, response.content)
+        if len(reviewsInPage) > 0:
+            self.reviewPageToMongoDB(filmID, page, reviewsInPage)
+
+        self.reviewPageDone(filmID)
         return
     
-    # Главная функция класса, запускающая несколько параллельных потоков на скачивание данных
+    # Повторное скачивание общей информации об отзывах условным запросом: изменившиеся поля
+    #   обновляются в MongoDB, а при росте количества отзывов добавляются новые отзывы с первой страницы
+    def urlReviewRefresh(self, filmID: int):
+        response = self.http.get(self.KinopoiskURL + f'{filmID}/reviews',
+                                 headers = self.scheduler.conditionalHeaders(filmID, 'review'))
+        if response.status_code == 304:
+            self.scheduler.recordFetch(filmID, response.headers, 'review')
+            return
+
+        newReviewForFilm, listPages = self.commonReviewInfoFromPage(filmID, response.status_code, response.content)
+        if len(listPages) == 0:
+            return
+
+        reviewMaxOld = self.storage.refreshHeader(newReviewForFilm)
+        self.scheduler.recordReviews(filmID, newReviewForFilm.reviewMax)
+        self.scheduler.recordFetch(filmID, response.headers, 'review')
+        if reviewMaxOld is None or newReviewForFilm.reviewMax <= reviewMaxOld:
+            return
+
+        response      = self.http.get(self.reviewPageURL(filmID, 1))
+        reviewsInPage = self.reviewPageToList(filmID, 1, response.status_code, response.content)
+        reviewCount   = self.storage.addNewReviews(filmID, reviewsInPage)
+        with self.lock:
+            print(' Refresh review:', filmID, reviewCount)
+
+        return
+
+    # Запуск повторного скачивания отзывов к выбранным планировщиком фильмам / сериалам
+    def refreshMain(self, filmIDs: List[int]):
+        print('\t The data about reviews is refreshing...')
+        self.logger.debug('The data about reviews is refreshing...')
+
+        reviewIDs = set(self.storage.getFilmIDs())
+        workQueue = WorkQueue.WorkQueue(self.configParameters, 'refresh')
+        workQueue.putAll([filmID for filmID in filmIDs if filmID in reviewIDs])
+        workQueue.run(self.urlReviewRefresh, self.RetryErrors)
+
+        print('\t The data about reviews was refreshed successfully!')
+        self.logger.debug('The data about reviews was refreshed successfully!')
+        return
+
+    # Асинхронное выполнение одного задания: скачивание общей информации об отзывах
+    #   или одной страницы с отзывами; ошибка соединения передаётся в очередь заданий
+    #   для повторной попытки, а после всех попыток страница считается обработанной
+    async def asyncReviewParsing(self, job: Tuple[int, Union[int, None]], crawler: AsyncMining.AsyncCrawler):
+        filmID, page = job
+        if page is None:
+            statusCode, content = await crawler.fetch(self.KinopoiskURL + f'{filmID}/reviews')
+            newReviewForFilm, listPages = await asyncio.to_thread(self.commonReviewInfoFromPage,
+                                                                  filmID, statusCode, content)
+            if len(listPages) == 0:
+                return
+
+            await asyncio.to_thread(self.reviewHeaderToMongoDB, newReviewForFilm)
+            self.reviewPagesToQueue(filmID, listPages, crawler)
+            return
+
+        statusCode, content = await crawler.fetch(self.reviewPageURL(filmID, page))
+        reviewsInPage       = await asyncio.to_thread(self.reviewPageToList, filmID, page, statusCode, content)
+        if len(reviewsInPage) > 0:
+            await asyncio.to_thread(self.reviewPageToMongoDB, filmID, page, reviewsInPage)
+
+        self.reviewPageDone(filmID)
+        return
+
+    # Запуск асинхронного скачивания пользовательских отзывов ко всем фильмам / сериалам
+    def asyncMain(self):
+        crawler = AsyncMining.AsyncCrawler(self.configParameters, self.URLHeaders, self.archive,
+                                           self.controller, self.proxyPool)
+        self.reviewFilmsToQueue(crawler)
+        crawler.run(self.asyncReviewParsing, self.reviewJobFailed)
+        return
+
+    # Запуск нескольких параллельных потоков на скачивание данных из общей очереди заданий
+    def threadMain(self):
+        workQueue = WorkQueue.WorkQueue(self.configParameters, 'review', self.journal)
+        self.reviewFilmsToQueue(workQueue)
+        workQueue.run(partial(self.urlReviewParsing, workQueue = workQueue),
+                      self.RetryErrors, self.reviewJobFailed)
+
+        httpStats = self.http.getStats()
+        self.logger.debug(f'HTTP reviews: requests = {httpStats["requests"]}, ' +
+                          f'connections = {httpStats["connections"]}, reused = {httpStats["reused"]}')
+        if self.controller is not None:
+            self.logger.debug(f'Rate reviews: {self.controller.rate:.2f} per minute, ' +
+                              f'success = {self.controller.stats["success"]}, ' +
+                              f'throttled = {self.controller.stats["throttled"]}')
+
+        if self.proxyPool is not None:
+            for proxyStats in self.proxyPool.getStats():
+                self.logger.debug(f'Proxy reviews: {proxyStats}')
+
+        self.http.close()
+        return
+
+    # Повторный разбор всех страниц с отзывами из архива без обращения к сервису "КиноПоиск":
+    #   сначала заменяется общая информация об отзывах, затем страницы разбираются в пуле процессов;
+    #   если страниц с отзывами к фильму / сериалу в архиве нет, уже записанные отзывы сохраняются
+    def replayMain(self, archive: ResponseArchive.ResponseArchive):
+        print('\t The data about reviews is replaying from the archive...')
+        self.logger.debug('The data about reviews is replaying from the archive...')
+
+        headerRecords, pageRecords = [], []
+        for record in archive.latestRecords():
+            headerFind = self.HeaderURLPattern.search(record['url'])
+            pageFind   = self.PageURLPattern.search(record['url'])
+            if headerFind is not None:
+                headerRecords.append((int(headerFind.group(1)), record))
+
+            elif pageFind is not None and record['status'] == 200:
+                pageRecords.append((int(pageFind.group(1)), int(pageFind.group(2)), record))
+
+        replayedFilms = { filmID for (filmID, _, _) in pageRecords }
+        for (filmID, record) in headerRecords:
+            newReviewForFilm, listPages = self.commonReviewInfoFromPage(filmID, record['status'], archive.load(record))
+            if len(listPages) == 0:
+                continue
+
+            if filmID in replayedFilms:
+                self.storage.headerToMongoDB(newReviewForFilm, replace = True)
+
+            else:
+                self.storage.headerMergeToMongoDB(newReviewForFilm)
+
+        with ProcessPoolExecutor(max_workers = self.configParameters['parseProcesses']) as executor:
+            for i in range(0, len(pageRecords), self.ReplayBatchSize):
+                batchRecords = pageRecords[i:i + self.ReplayBatchSize]
+                batchReviews = executor.map(ReviewPipeline.parseReviewPage,
+                                            [archive.load(record) for (_, _, record) in batchRecords])
+
+                for ((filmID, page, _), reviewsInPage) in zip(batchRecords, batchReviews):
+                    if len(reviewsInPage) > 0:
+                        self.reviewPageToMongoDB(filmID, page, reviewsInPage)
+
+        print('\t The data about reviews was replayed successfully!')
+        self.logger.debug('The data about reviews was replayed successfully!')
+        return
+
+    # Главная функция класса, запускающая скачивание данных в потоках, асинхронно или конвейером
     def main(self):
         print('\t The data about reviews is downloading...')
         self.logger.debug('The data about reviews is downloading...')
 
-        threadReviewArray = []
-        reviewFilmPageArr = list(self.reviewFilmPage.items())
-        reviewFilmPageThr = [reviewFilmPageArr[i::self.threads] for i in range(self.threads)]
+        if   self.engine == 'async':
+            self.asyncMain()
 
-        for i in range(self.threads):
-            thr = threading.Thread(target = self.urlReviewParsing, args = (reviewFilmPageThr[i],))
-            threadReviewArray.append(thr)
-            thr.start()
-        
-        for thr in threadReviewArray:
-            thr.join()
+        elif self.engine == 'pipeline':
+            ReviewPipeline.ReviewPipeline(self, self.configParameters).main()
+
+        else:
+            self.threadMain()
         
         print('\t The data about reviews was downloaded successfully!')
         self.logger.debug('The data about reviews was downloaded successfully!')
@@ -232,10 +381,44 @@ class ReviewMining(object):
 if __name__ == '__main__':
     
     defaultConfigParameters = {
-        'databaseName'    : 'userReviews',
-        'dataPathReviews' : 'reviews',
-        'threads'         : 4,
-        'sleepTime'       : 30
+        'databaseName'        : 'userReviews',
+        'dataPathReviews'     : 'reviews',
+        'dataPathReviewItems' : 'reviewItems',
+        'reviewLayout'        : 'embedded',
+        'dataPathJournal'     : 'crawlJournal',
+        'leaseTime'           : 600,
+        'crawlMode'           : 'local',
+        'claimWaitTime'       : 10,
+        'archiveResponses'    : 0,
+        'dataPathArchive'     : './archive',
+        'archiveCompression'  : 'gzip',
+        'dataPathRefresh'     : 'refreshState',
+        'refreshFilms'        : 0,
+        'refreshMinAgeDays'   : 7,
+        'refreshDefaultAge'   : 365,
+        'refreshReviewWeight' : 10,
+        'threads'             : 4,
+        'sleepTime'           : 30,
+        'jobRetries'          : 2,
+        'engine'              : 'threads',
+        'requestsPerMinute'   : 4,
+        'requestBurst'        : 1,
+        'concurrency'         : 100,
+        'jitterTime'          : 5,
+        'rateControl'         : 0,
+        'rateMin'             : 1,
+        'rateMax'             : 60,
+        'rateIncrease'        : 2,
+        'rateDecrease'        : 50,
+        'proxies'             : '',
+        'proxyMode'           : 'request',
+        'proxyMaxFailures'    : 3,
+        'proxyEjectTime'      : 300,
+        'poolSize'            : 10,
+        'requestRetries'      : 3,
+        'requestTimeout'      : 30,
+        'parseProcesses'      : 2,
+        'pipelineQueueSize'   : 100
     }
 
     mongoClient = MongoClient('mongodb://localhost:27017/')
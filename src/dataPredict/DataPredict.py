@@ -15,6 +15,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing   import StandardScaler
 from sklearn.metrics         import mean_squared_error, r2_score
 
+from dataStorage import ResultSink
+
 # Класс для аналитической обработки полученных данных,
 #   находящихся в MongoDB
 class DataPredict(object):
@@ -27,6 +29,7 @@ class DataPredict(object):
 	    'dataPathReviews'  : 'reviews',
         'dataPathAnalytic' : 'analytic',
         'dataPathPredict'  : 'predict',
+        'resultBatchSize'  : 500,
         'reviewWindowSize' : 5,
         'reviewValueUp'    : 5,
         'reviewDegree'     : 7,
@@ -42,6 +45,7 @@ class DataPredict(object):
         self.collectionReviews  = None
         self.collectionAnalytic = None
         self.collectionPredict  = None
+        self.resultSink         = None
 
         logging.basicConfig(
             filename = './log/dataPredict.log',
@@ -85,13 +89,7 @@ class DataPredict(object):
 
     # Добавление новой информации в MongoDB
     def infoToMongoDB(self, nameParam: str, info: List[Any]):
-        if self.collectionPredict.find_one({ 'nameParam' : nameParam }) is None:
-            self.collectionPredict.insert_one({ 'nameParam' : nameParam, 'valuesParam' : info })
-            
-        else:
-             self.collectionPredict.update_one({ 'nameParam' : nameParam },
-                                               { '$set' : { 'valuesParam' : info }})
-             
+        self.resultSink.put(nameParam, info)
         return
 
     # Подготовка данных для обучения регрессии и Дерева Решений
@@ -309,7 +307,7 @@ class DataPredict(object):
         for filmReview in self.collectionReviews.find():
             filmID             = filmReview['_id']
             decisionTreeNameWW = f'{keyStr[0]}/{filmID}'
-            decisionTreeListWW = self.collectionPredict.find_one({ 'nameParam' : decisionTreeNameWW })
+            decisionTreeListWW = self.resultSink.findOne(decisionTreeNameWW)
             if decisionTreeListWW is None:
                 continue
             
@@ -317,7 +315,7 @@ class DataPredict(object):
                                 decisionTreeListWW['valuesParam'], keyStr[2])
             
             decisionTreeName = f'{keyStr[1]}/{filmID}'
-            decisionTreeList = self.collectionPredict.find_one({ 'nameParam' : decisionTreeName })
+            decisionTreeList = self.resultSink.findOne(decisionTreeName)
             if decisionTreeList is None:
                 continue
             
@@ -358,9 +356,12 @@ class DataPredict(object):
         self.collectionReviews  = connectionDB[self.configParameters['dataPathReviews']]
         self.collectionAnalytic = connectionDB[self.configParameters['dataPathAnalytic']]
         self.collectionPredict  = connectionDB[self.configParameters['dataPathPredict']]
+        self.resultSink         = ResultSink.ResultSink(self.collectionPredict,
+                                                        self.configParameters['resultBatchSize'])
 
         self.regressionForReview()
 
+        self.resultSink.close()
         return
 
 if __name__ == '__main__':  
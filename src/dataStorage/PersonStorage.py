@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+from typing         import Dict, List, Tuple, Union, Any
+from bson           import ObjectId
+from pymongo        import MongoClient, UpdateOne, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+# Класс для хранения съёмочной группы в MongoDB отдельно от фильмов / сериалов:
+#   в коллекции людей / студий каждый человек хранится один раз вместе со счётчиками
+#   по каждой роли (сумма оценок, количество фильмов и средняя оценка), а в коллекции
+#   связей хранится пара "фильм - человек" с ролью и оценкой фильма; счётчики меняются
+#   только на разницу между новыми и уже сохранёнными связями фильма, а связи изменяются
+#   условно, поэтому повторная или одновременная запись того же фильма / сериала
+#   несколькими процессами не учитывается дважды
+class PersonStorage(object):
+
+    # Роли съёмочной группы (совпадают с полями Film)
+    Roles     = ('producers', 'directors', 'actors')
+
+    # Размер пакета фильмов / сериалов при заполнении коллекций по уже скачанным данным
+    BatchSize = 1000
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        connectionDB               = mongoClient[configParameters['databaseName']]
+        self.collectionPersons     = connectionDB[configParameters['dataPathPersons']]
+        self.collectionFilmPersons = connectionDB[configParameters['dataPathFilmPersons']]
+
+        self.createIndexes()
+
+    # Создание индексов: связи по человеку и по фильму, люди / студии по средней оценке в каждой роли
+    def createIndexes(self):
+        self.collectionFilmPersons.create_index([('person', ASCENDING), ('role', ASCENDING)])
+        self.collectionFilmPersons.create_index([('film', ASCENDING)])
+        for role in self.Roles:
+            self.collectionPersons.create_index([(f'{role}.ratingAvg', DESCENDING)])
+
+        return
+
+    # Запрос на изменение счётчиков человека / студии в одной роли; средняя оценка
+    #   пересчитывается в той же операции, поэтому одновременные изменения не теряются
+    def personRequest(self, personID: int, role: str, person: Dict[str, Any],
+                      ratingDelta: float, countDelta: int) -> UpdateOne:
+
+        return UpdateOne({ '_id' : personID },
+                         [{ '$set' : { 'name'                : person['name'],
+                                       'personType'          : person['personType'],
+                                       f'{role}.ratingSum'   : { '$add' : [{ '$ifNull' : [f'${role}.ratingSum', 0] },
+                                                                           ratingDelta] },
+                                       f'{role}.filmCount'   : { '$add' : [{ '$ifNull' : [f'${role}.filmCount', 0] },
+                                                                           countDelta] }}},
+                          { '$set' : { f'{role}.ratingAvg'   : { '$cond' : [{ '$gt' : [f'${role}.filmCount', 0] },
+                                                                            { '$divide' : [f'${role}.ratingSum',
+                                                                                           f'${role}.filmCount'] },
+                                                                            0] }}}],
+                         upsert = True)
+
+    # Запись съёмочной группы нескольких фильмов / сериалов (словари Film.toDict());
+    #   фильмы, связи которых одновременно изменил другой процесс, записываются повторно
+    #   по новым сохранённым связям
+    def filmsToMongoDB(self, films: List[Dict[str, Any]]):
+        while len(films) > 0:
+            films = self.filmsEdgesToMongoDB(films)
+
+        return
+
+    # Запрос на условное изменение связи: новая связь добавляется, только если её ещё нет,
+    #   изменённая и удалённая - только если в MongoDB сохранена прежняя оценка фильма
+    def edgeRequest(self, edgeID: str, storedEdge: Dict[str, Any], edge: Dict[str, Any],
+                    token: ObjectId) -> UpdateOne:
+
+        if storedEdge is None:
+            return UpdateOne({ '_id' : edgeID, 'removed' : { '$exists' : False }},
+                             { '$setOnInsert' : edge }, upsert = True)
+
+        edgeFilter = { '_id' : edgeID, 'rating' : storedEdge['rating'], 'removed' : { '$exists' : False }}
+        if edge is None:
+            return UpdateOne(edgeFilter, { '$set' : { 'removed' : token }}, upsert = True)
+
+        return UpdateOne(edgeFilter, { '$set' : { key : value for (key, value) in edge.items() if key != '_id' }},
+                         upsert = True)
+
+    # Запись связей фильмов / сериалов и изменение счётчиков людей / студий на разницу между новыми
+    #   и сохранёнными связями: каждое изменение связи условно, поэтому счётчики меняет только
+    #   процесс, изменение которого записано, и повторная или одновременная запись того же фильма
+    #   не учитывается дважды; возвращает фильмы с изменениями, не записанными из-за другого процесса
+    def filmsEdgesToMongoDB(self, films: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        storedEdges  = { edge['_id'] : edge for edge in
+                         self.collectionFilmPersons.find({ 'film'    : { '$in' : [film['_id'] for film in films] },
+                                                           'removed' : { '$exists' : False }}) }
+        token        = ObjectId()
+        seenEdges    = set()
+        edgeRequests = []
+        edgeChanges  = []
+        for film in films:
+            for role in self.Roles:
+                for person in film[role]:
+                    edgeID = f'{film["_id"]}/{role}/{person["_id"]}'
+                    if edgeID in seenEdges:
+                        continue
+
+                    seenEdges.add(edgeID)
+                    storedEdge = storedEdges.pop(edgeID, None)
+                    if storedEdge is not None and storedEdge['rating'] == film['ratingValue']:
+                        continue
+
+                    edge = { '_id'    : edgeID,
+                             'film'   : film['_id'],
+                             'person' : person['_id'],
+                             'role'   : role,
+                             'name'   : person['name'],
+                             'type'   : person['personType'],
+                             'rating' : film['ratingValue'] }
+                    edgeRequests.append(self.edgeRequest(edgeID, storedEdge, edge, token))
+                    edgeChanges.append((film['_id'], person['_id'], role, person,
+                                        None if storedEdge is None else storedEdge['rating'], film['ratingValue']))
+
+        for (edgeID, storedEdge) in storedEdges.items():
+            edgeRequests.append(self.edgeRequest(edgeID, storedEdge, None, token))
+            edgeChanges.append((storedEdge['film'], storedEdge['person'], storedEdge['role'],
+                                { 'name' : storedEdge['name'], 'personType' : storedEdge['type'] },
+                                storedEdge['rating'], None))
+
+        if len(edgeRequests) == 0:
+            return []
+
+        try:
+            upsertedIndexes = set(self.collectionFilmPersons.bulk_write(edgeRequests, ordered = False).upserted_ids)
+            writeErrors     = []
+
+        except BulkWriteError as error:
+            upsertedIndexes = { upserted['index'] for upserted in error.details['upserted'] }
+            writeErrors     = error.details['writeErrors']
+
+        # Ошибка повторяющегося ключа - связь уже изменил другой процесс
+        conflictIndexes = { writeError['index'] for writeError in writeErrors if writeError['code'] == 11000 }
+        conflictFilms   = set()
+        personDeltas    = {}
+        for (index, (filmID, personID, role, person, ratingOld, ratingNew)) in enumerate(edgeChanges):
+            if index in conflictIndexes or (ratingOld is None and index not in upsertedIndexes):
+                conflictFilms.add(filmID)
+                continue
+
+            # Удаляемой связи уже нет: записана только метка удаления
+            if ratingNew is None and index in upsertedIndexes:
+                continue
+
+            delta = personDeltas.setdefault((personID, role), [person, 0.0, 0])
+            if ratingNew is None:
+                delta[1] -= ratingOld
+                delta[2] -= 1
+
+            elif index in upsertedIndexes:
+                delta[1] += ratingNew
+                delta[2] += 1
+
+            else:
+                delta[1] += ratingNew - ratingOld
+
+        self.collectionFilmPersons.delete_many({ 'removed' : token })
+        if len(personDeltas) > 0:
+            self.collectionPersons.bulk_write([self.personRequest(personID, role, person, ratingDelta, countDelta)
+                                               for ((personID, role), (person, ratingDelta, countDelta))
+                                               in personDeltas.items()], ordered = False)
+
+        if len(conflictIndexes) < len(writeErrors):
+            raise BulkWriteError({ 'writeErrors' : [writeError for writeError in writeErrors
+                                                    if writeError['code'] != 11000] })
+
+        return [film for film in films if film['_id'] in conflictFilms]
+
+    # Рейтинг людей / студий в одной роли по средней оценке фильмов / сериалов (по индексу):
+    #   список кортежей (ID, имя, средняя оценка, количество фильмов / сериалов)
+    def personRanking(self, role: str) -> List[Tuple[int, str, float, int]]:
+        cursor = self.collectionPersons.find({ f'{role}.filmCount' : { '$gt' : 0 }},
+                                             { 'name' : 1, role : 1 }).sort(f'{role}.ratingAvg', DESCENDING)
+        return [(person['_id'], person['name'], round(person[role]['ratingAvg'], 3), person[role]['filmCount'])
+                for person in cursor.batch_size(self.BatchSize)]
+
+    # Проверка, что коллекция связей ещё не заполнена
+    def isEmpty(self) -> bool:
+        return self.collectionFilmPersons.find_one({}, { '_id' : 1 }) is None
+
+    # Заполнение коллекций по уже скачанным фильмам / сериалам пакетами по BatchSize;
+    #   повторный запуск не меняет уже учтённые связи
+    def rebuildFromFilms(self, collectionFilms: Any):
+        projection = { role : 1 for role in self.Roles }
+        projection['ratingValue'] = 1
+
+        films     = []
+        filmCount = 0
+        for film in collectionFilms.find({}, projection).batch_size(self.BatchSize):
+            films.append(film)
+            if len(films) == self.BatchSize:
+                self.filmsToMongoDB(films)
+                filmCount += len(films)
+                films      = []
+
+        self.filmsToMongoDB(films)
+        filmCount += len(films)
+
+        print(' Persons rebuilt from films:', filmCount)
+        return
+
+if __name__ == '__main__':
+
+    defaultConfigParameters = {
+        'databaseName'        : 'userReviews',
+        'dataPathFilms'       : 'films',
+        'dataPathPersons'     : 'persons',
+        'dataPathFilmPersons' : 'filmPersons'
+    }
+
+    mongoClient = MongoClient('mongodb://localhost:27017/')
+    PersonStorage(defaultConfigParameters, mongoClient).rebuildFromFilms(
+        mongoClient[defaultConfigParameters['databaseName']][defaultConfigParameters['dataPathFilms']])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import logging
+
+from typing             import Dict, Union, Any
+from time               import monotonic
+from pymongo            import ReplaceOne, ASCENDING
+from pymongo.errors     import OperationFailure
+from pymongo.collection import Collection
+
+# Класс для записи результатов аналитики и предсказаний в MongoDB: результаты с ключом
+#   nameParam накапливаются в буфере и записываются неупорядоченным bulk_write
+#   с заменой по уникальному индексу nameParam; ещё не записанные результаты
+#   читаются из буфера, поэтому их можно использовать на следующих этапах расчёта
+class ResultSink(object):
+
+    # Инициализация класса
+    def __init__(self, collection: Collection, resultBatchSize: int):
+        self.collection      = collection
+        self.resultBatchSize = resultBatchSize
+
+        self.buffer          = {}
+        self.writtenCount    = 0
+        self.writeTime       = 0.0
+
+        self.logger          = logging.getLogger()
+
+        self.createIndex()
+
+    # Создание уникального индекса по nameParam; если в коллекции уже есть повторяющиеся
+    #   результаты, запись идёт без уникального индекса
+    def createIndex(self):
+        try:
+            self.collection.create_index([('nameParam', ASCENDING)], unique = True)
+
+        except OperationFailure as error:
+            self.logger.error(f'{self.collection.name} -> Unique index on nameParam is not created: {error}')
+
+        return
+
+    # Добавление результата в буфер (более поздний результат с тем же nameParam заменяет прежний)
+    def put(self, nameParam: str, info: Any):
+        self.buffer[nameParam] = { 'nameParam' : nameParam, 'valuesParam' : info }
+        if len(self.buffer) >= self.resultBatchSize:
+            self.flush()
+
+        return
+
+    # Получение результата по nameParam: сначала из буфера, затем из MongoDB по индексу
+    def findOne(self, nameParam: str) -> Union[Dict[str, Any], None]:
+        if nameParam in self.buffer:
+            return self.buffer[nameParam]
+
+        return self.collection.find_one({ 'nameParam' : nameParam })
+
+    # Запись всех накопленных результатов в MongoDB
+    def flush(self):
+        if len(self.buffer) == 0:
+            return
+
+        results, self.buffer = list(self.buffer.values()), {}
+        timeStart            = monotonic()
+        self.collection.bulk_write([ReplaceOne({ 'nameParam' : result['nameParam'] }, result, upsert = True)
+                                    for result in results], ordered = False)
+
+        self.writeTime    += monotonic() - timeStart
+        self.writtenCount += len(results)
+        return
+
+    # Запись оставшихся результатов и вывод скорости записи
+    def close(self) -> Dict[str, float]:
+        self.flush()
+        stats = { 'results' : self.writtenCount,
+                  'time'    : self.writeTime,
+                  'speed'   : self.writtenCount / max(self.writeTime, 1e-9) }
+
+        print(f'\t Results written to {self.collection.name}: {stats["results"]} in {stats["time"]:.2f} s = ' +
+              f'{stats["speed"]:.1f} results/s')
+        self.logger.debug(f'Results written to {self.collection.name}: {stats["results"]} in ' +
+                          f'{stats["time"]:.2f} s = {stats["speed"]:.1f} results/s')
+        return stats
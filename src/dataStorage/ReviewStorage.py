@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+
+from typing      import Dict, List, Union, Iterator, Any
+from dataclasses import asdict
+from datetime    import datetime as dt
+from pymongo     import MongoClient, ReplaceOne, UpdateOne, ASCENDING
+
+from dataClass.ReviewDataClass import Review, ReviewForFilm
+
+# Класс для хранения пользовательских отзывов в MongoDB в одном из двух видов:
+#   'embedded'   - все отзывы к фильму / сериалу хранятся в одном документе;
+#   'normalized' - в документе фильма / сериала хранятся только счётчики и страницы,
+#                  а каждый отзыв хранится отдельным документом с ключом по ID фильма
+class ReviewStorage(object):
+
+    # Размер пакета при записи и чтении отдельных отзывов
+    BatchSize  = 1000
+
+    # Прежний строковый формат времени отзыва, который заменяется на дату MongoDB
+    DateFormat = '%H:%M|%d.%m.%Y'
+
+    # Инициализация класса
+    def __init__(self, configParameters: Dict[str, Union[int, str]], mongoClient: MongoClient):
+        self.reviewLayout          = configParameters['reviewLayout']
+
+        connectionDB               = mongoClient[configParameters['databaseName']]
+        self.collectionReviews     = connectionDB[configParameters['dataPathReviews']]
+        self.collectionReviewItems = connectionDB[configParameters['dataPathReviewItems']]
+
+        if self.reviewLayout == 'normalized':
+            self.createIndexes()
+
+    # Создание составных индексов для коллекции отдельных отзывов
+    def createIndexes(self):
+        self.collectionReviewItems.create_index([('film', ASCENDING), ('dateAndTime', ASCENDING)])
+        self.collectionReviewItems.create_index([('film', ASCENDING), ('reviewClass', ASCENDING)])
+        return
+
+    # Преобразование отзыва в отдельный документ; ID документа однозначно задаётся
+    #   фильмом, страницей и номером отзыва, поэтому повторная запись не создаёт дублей
+    def reviewToItem(self, filmID: int, page: int, number: int, review: Dict[str, Any]) -> Dict[str, Any]:
+        reviewItem = { '_id' : f'{filmID}/{page}/{number}', 'film' : filmID, 'page' : page }
+        reviewItem.update(review)
+        return reviewItem
+
+    # Добавление в MongoDB записи с общей информацией об отзывах без самих отзывов;
+    #   при replace существующая запись заменяется, а её страницы и отзывы сбрасываются
+    def headerToMongoDB(self, review: ReviewForFilm, replace: bool = False):
+        reviewToDict = review.toDict()
+        reviewToDict['pages'] = []
+        if self.reviewLayout == 'normalized':
+            del reviewToDict['reviews']
+
+        else:
+            reviewToDict['reviews'] = []
+
+        if replace:
+            self.collectionReviews.replace_one({ '_id' : reviewToDict['_id'] }, reviewToDict, upsert = True)
+            return
+
+        self.collectionReviews.update_one({ '_id'          : reviewToDict['_id'] },
+                                          { '$setOnInsert' : { key : value for (key, value) in reviewToDict.items()
+                                                               if key != '_id' }}, upsert = True)
+        return
+
+    # Обновление общей информации об отзывах без сброса уже записанных страниц и отзывов
+    def headerMergeToMongoDB(self, review: ReviewForFilm):
+        reviewToDict = review.toDict()
+        insertFields = { 'pages' : [] }
+        if self.reviewLayout != 'normalized':
+            insertFields['reviews'] = []
+
+        self.collectionReviews.update_one({ '_id'          : reviewToDict['_id'] },
+                                          { '$set'         : { key : value for (key, value) in reviewToDict.items()
+                                                               if key not in ('_id', 'pages', 'reviews') },
+                                            '$setOnInsert' : insertFields }, upsert = True)
+        return
+
+    # Добавление в MongoDB отзывов с одной страницы; страница, уже записанная ранее, пропускается
+    def pageToMongoDB(self, filmID: int, page: int, reviews: List[Review]):
+        if self.reviewLayout == 'normalized':
+            reviewItems = [self.reviewToItem(filmID, page, number, asdict(review))
+                           for (number, review) in enumerate(reviews)]
+            self.collectionReviewItems.bulk_write([ReplaceOne({ '_id' : item['_id'] }, item, upsert = True)
+                                                   for item in reviewItems], ordered = False)
+            self.collectionReviews.update_one({ '_id' : filmID }, { '$addToSet' : { 'pages' : page }})
+            return
+
+        self.collectionReviews.update_one({ '_id'       : filmID, 'pages' : { '$ne' : page }},
+                                          { '$push'     : { 'reviews' : { '$each' : [asdict(review)
+                                                                                     for review in reviews] }},
+                                            '$addToSet' : { 'pages'   : page }})
+        return
+
+    # Обновление общей информации об отзывах только по изменившимся полям;
+    #   возвращает прежнее общее количество отзывов или None, если записи ещё нет
+    def refreshHeader(self, review: ReviewForFilm) -> Union[int, None]:
+        reviewToDict = { key : value for (key, value) in review.toDict().items() if key not in ('pages', 'reviews') }
+        storedHeader = self.collectionReviews.find_one({ '_id' : reviewToDict['_id'] },
+                                                       { key : 1 for key in reviewToDict.keys() })
+        if storedHeader is None:
+            return None
+
+        changedFields = { key : value for (key, value) in reviewToDict.items() if storedHeader.get(key) != value }
+        if len(changedFields) > 0:
+            self.collectionReviews.update_one({ '_id' : reviewToDict['_id'] }, { '$set' : changedFields })
+
+        return storedHeader['reviewMax']
+
+    # Время отзыва как дата; отзывы, записанные до переноса на даты MongoDB
+    #   (python -m dataStorage.ReviewStorage --dates), хранят время строкой
+    @staticmethod
+    def reviewDateTime(dateAndTime: Union[dt, str]) -> dt:
+        if isinstance(dateAndTime, str):
+            return dt.strptime(dateAndTime, ReviewStorage.DateFormat)
+
+        return dateAndTime
+
+    # Добавление новых отзывов с первой страницы (самые свежие отзывы); отзывы,
+    #   уже сохранённые ранее, определяются по автору и времени и пропускаются
+    #   (в том числе отзывы со временем строкой, ещё не перенесённые на даты MongoDB)
+    def addNewReviews(self, filmID: int, reviews: List[Review]) -> int:
+        knownReviews = {(review['author'], self.reviewDateTime(review['dateAndTime']))
+                        for review in self.iterReviews(filmID, ['author', 'dateAndTime'])}
+        newReviews   = [asdict(review) for review in reviews
+                        if (review.author, review.dateAndTime) not in knownReviews]
+        if len(newReviews) == 0:
+            return 0
+
+        if self.reviewLayout == 'normalized':
+            reviewItems = [self.reviewToItem(filmID, 1, number, review) for (number, review) in enumerate(newReviews)]
+            for reviewItem in reviewItems:
+                reviewItem['_id'] = f'{filmID}/new/{reviewItem["author"]}/{reviewItem["dateAndTime"]:%Y.%m.%d %H:%M}'
+
+            self.collectionReviewItems.bulk_write([ReplaceOne({ '_id' : item['_id'] }, item, upsert = True)
+                                                   for item in reviewItems], ordered = False)
+            return len(newReviews)
+
+        self.collectionReviews.update_one({ '_id'   : filmID },
+                                          { '$push' : { 'reviews' : { '$each' : newReviews }}})
+        return len(newReviews)
+
+    # Получение ID всех фильмов / сериалов, для которых есть пользовательские отзывы
+    def getFilmIDs(self) -> List[int]:
+        return [record['_id'] for record in self.collectionReviews.find({}, { '_id' : 1 })]
+
+    # Потоковое получение отзывов к фильму / сериалу только с нужными полями
+    def iterReviews(self, filmID: int, fields: List[str]) -> Iterator[Dict[str, Any]]:
+        if self.reviewLayout == 'normalized':
+            projection = { field : 1 for field in fields }
+            projection['_id'] = 0
+            yield from self.collectionReviewItems.find({ 'film' : filmID }, projection).batch_size(self.BatchSize)
+            return
+
+        record = self.collectionReviews.find_one({ '_id' : filmID }, { f'reviews.{field}' : 1 for field in fields })
+        if record is not None:
+            yield from record.get('reviews', [])
+
+        return
+
+    # Перенос отзывов из документов фильмов / сериалов в отдельную коллекцию;
+    #   при повторном запуске уже перенесённые фильмы пропускаются
+    def migrateToNormalized(self):
+        self.createIndexes()
+        filmIDs = [record['_id'] for record in
+                   self.collectionReviews.find({ 'reviews' : { '$exists' : True }}, { '_id' : 1 })]
+
+        for filmID in filmIDs:
+            reviews     = self.collectionReviews.find_one({ '_id' : filmID }, { 'reviews' : 1 })['reviews']
+            reviewItems = [self.reviewToItem(filmID, 0, number, review) for (number, review) in enumerate(reviews)]
+            for i in range(0, len(reviewItems), self.BatchSize):
+                self.collectionReviewItems.bulk_write([ReplaceOne({ '_id' : item['_id'] }, item, upsert = True)
+                                                       for item in reviewItems[i:i + self.BatchSize]], ordered = False)
+
+            self.collectionReviews.update_one({ '_id' : filmID }, { '$unset' : { 'reviews' : '' }})
+            print(' Migrated:', filmID, len(reviewItems))
+
+        return
+
+    # Замена строкового времени отзывов на даты MongoDB пакетами по BatchSize отзывов
+    #   (в виде embedded документ фильма / сериала обновляется частями по BatchSize отзывов);
+    #   обновляются только отзывы, время которых ещё хранится строкой, поэтому
+    #   повторный запуск продолжает прерванный перенос
+    def migrateDatesToNative(self):
+        if self.reviewLayout == 'normalized':
+            cursor        = self.collectionReviewItems.find({ 'dateAndTime' : { '$type' : 'string' }},
+                                                            { 'dateAndTime' : 1 }).batch_size(self.BatchSize)
+            writeRequests = []
+            reviewCount   = 0
+            for reviewItem in cursor:
+                writeRequests.append(UpdateOne({ '_id'  : reviewItem['_id'] },
+                                               { '$set' : { 'dateAndTime' : dt.strptime(reviewItem['dateAndTime'],
+                                                                                        self.DateFormat) }}))
+                if len(writeRequests) == self.BatchSize:
+                    self.collectionReviewItems.bulk_write(writeRequests, ordered = False)
+                    reviewCount  += len(writeRequests)
+                    writeRequests = []
+
+            if len(writeRequests) > 0:
+                self.collectionReviewItems.bulk_write(writeRequests, ordered = False)
+                reviewCount += len(writeRequests)
+
+            print(' Migrated dates:', reviewCount)
+            return
+
+        filmIDs = [record['_id'] for record in
+                   self.collectionReviews.find({ 'reviews.dateAndTime' : { '$type' : 'string' }}, { '_id' : 1 })]
+
+        writeRequests = []
+        reviewCount   = 0
+        for filmID in filmIDs:
+            reviews    = self.collectionReviews.find_one({ '_id' : filmID }, { 'reviews.dateAndTime' : 1 })['reviews']
+            dateFields = [(f'reviews.{number}.dateAndTime', dt.strptime(review['dateAndTime'], self.DateFormat))
+                          for (number, review) in enumerate(reviews) if isinstance(review['dateAndTime'], str)]
+
+            for i in range(0, len(dateFields), self.BatchSize):
+                setFields = dict(dateFields[i:i + self.BatchSize])
+                writeRequests.append(UpdateOne({ '_id' : filmID }, { '$set' : setFields }))
+                reviewCount += len(setFields)
+                if reviewCount >= self.BatchSize:
+                    self.collectionReviews.bulk_write(writeRequests, ordered = False)
+                    print(' Migrated dates:', reviewCount)
+                    writeRequests = []
+                    reviewCount   = 0
+
+        if len(writeRequests) > 0:
+            self.collectionReviews.bulk_write(writeRequests, ordered = False)
+            print(' Migrated dates:', reviewCount)
+
+        return
+
+# Чтение параметров из конфигурационного файла сервиса Data Mining (формат "ключ = значение")
+def readConfigFile(configFile: str) -> Dict[str, Union[int, str]]:
+    configParameters = {}
+    with open(configFile, 'r') as fileData:
+        for line in fileData.readlines()[3:]:
+            splitParameter = line.split('=')
+            parameterName  = splitParameter[0].strip()
+            parameterValue = splitParameter[1].strip()
+            configParameters[parameterName] = int(parameterValue) if parameterValue.isdigit() else parameterValue
+
+    return configParameters
+
+# Запуск переноса из каталога src (параметры MongoDB и вид хранения берутся из
+#   конфигурационного файла сервиса Data Mining):
+#       python -m dataStorage.ReviewStorage           - перенос отзывов в отдельную коллекцию
+#       python -m dataStorage.ReviewStorage --dates   - замена строкового времени отзывов на даты
+if __name__ == '__main__':
+
+    configParameters = readConfigFile(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                                   'dataMiningKinopoisk', 'miningConfigFile.txt'))
+    mongoClient      = MongoClient(configParameters['pathMongoDB'])
+
+    if '--dates' in sys.argv:
+        ReviewStorage(configParameters, mongoClient).migrateDatesToNative()
+
+    else:
+        ReviewStorage(configParameters, mongoClient).migrateToNormalized()
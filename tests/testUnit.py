@@ -1,13 +1,168 @@
 
 import sys
+import socket
+import logging
+import threading
+import requests
+import mongomock
 sys.path.append('../src')
 
+from time           import monotonic
+from datetime       import datetime, timedelta
+from http.server    import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pymongo        import ReplaceOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
 import src.dataMiningKinopoisk.DataMining as DM
 import src.dataAnalytics.DataAnalytics    as DA
 import src.dataPredict.DataPredict        as DP
 import src.visualization.Visualization    as VS
 import src.dataClass.FilmDataClass        as FC
 import src.dataClass.ReviewDataClass      as RC
+import src.dataMiningKinopoisk.FilmFrontier as FF
+import src.dataMiningKinopoisk.FilmMisses   as FM
+import src.dataMiningKinopoisk.AsyncMining  as AM
+import src.dataMiningKinopoisk.HTTPSession  as HS
+import src.dataMiningKinopoisk.FilmJSONExtract as FJ
+import src.dataMiningKinopoisk.ReviewPipeline  as RP
+import src.dataMiningKinopoisk.FilmWriter      as FW
+import src.dataStorage.ReviewStorage           as RS
+import src.dataStorage.PersonStorage           as PS
+import src.dataStorage.ResultSink              as SK
+import src.dataAnalytics.FilmAccumulators      as FA
+import src.dataAnalytics.FilmAggregations      as FG
+import src.dataMiningKinopoisk.WorkQueue       as WQ
+import src.dataMiningKinopoisk.CrawlJournal    as CJ
+import src.dataMiningKinopoisk.ResponseArchive as RA
+import src.dataMiningKinopoisk.RefreshScheduler as RF
+import src.dataMiningKinopoisk.RateController   as RT
+import src.dataMiningKinopoisk.ProxyPool        as PP
+import src.dataMiningKinopoisk.KinopoiskStub    as KS
+import src.dataMiningKinopoisk.ReviewParser     as RV
+
+# Обработчик корневого логгера: logging.basicConfig в конструкторах
+# становится пустым и тесты не пишут журналы в ./log
+logging.getLogger().addHandler(logging.NullHandler())
+
+class StubHandler(BaseHTTPRequestHandler):
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200 if self.path != '/missing/' else 404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def log_message(self, *args):
+        pass
+
+class StubCursor(list):
+    
+    def batch_size(self, size):
+        return self
+
+class StubCollection(object):
+    
+    def __init__(self):
+        self.batches   = []
+        self.updates   = []
+        self.documents = []
+        self.pipelines = []
+        
+    def aggregate(self, pipeline, **kwargs):
+        self.pipelines.append((pipeline, kwargs))
+        return StubCursor(self.documents)
+        
+    def find(self, filter = None, projection = None):
+        return StubCursor(self.documents)
+        
+    def create_index(self, keys, unique = False):
+        pass
+        
+    def update_one(self, filter, update, upsert = False):
+        self.updates.append((filter, update))
+        
+    def bulk_write(self, requests, ordered = True):
+        self.batches.append(requests)
+        return type('Result', (), {'upserted_ids': {i: i for i in range(len(requests))}})()
+
+class BulkCollection(object):
+    
+    def __init__(self, collection):
+        self.collection = collection
+        
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+        
+    def bulk_write(self, requests, ordered = True):
+        upserted, writeErrors = {}, []
+        for (index, request) in enumerate(requests):
+            try:
+                if isinstance(request, DeleteOne):
+                    self.collection.delete_one(request._filter)
+                    continue
+                    
+                if isinstance(request, ReplaceOne):
+                    result = self.collection.replace_one(request._filter, request._doc, upsert = request._upsert)
+                else:
+                    result = self.collection.update_one(request._filter, request._doc, upsert = request._upsert)
+                if result.upserted_id is not None:
+                    upserted[index] = result.upserted_id
+                    
+            except DuplicateKeyError as error:
+                writeErrors.append({'index': index, 'code': 11000, 'errmsg': str(error)})
+                if ordered:
+                    break
+        
+        if len(writeErrors) > 0:
+            raise BulkWriteError({'writeErrors': writeErrors,
+                                  'upserted': [{'index': index, '_id': _id} for (index, _id) in upserted.items()]})
+        return type('Result', (), {'upserted_ids': upserted})()
+
+class MockDatabase(object):
+    
+    def __init__(self, database):
+        self.database    = database
+        self.collections = {}
+        
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+        
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, BulkCollection(self.database[name]))
+
+class MockClient(object):
+    
+    def __init__(self):
+        self.client    = mongomock.MongoClient()
+        self.databases = {}
+        
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+        
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, MockDatabase(self.client[name]))
+
+class LockedCollection(object):
+    
+    def __init__(self, collection):
+        self.collection = collection
+        self.lock       = threading.Lock()
+        
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+        
+        def locked(*args, **kwargs):
+            with self.lock:
+                return method(*args, **kwargs)
+        return locked
+
+def startStubServer():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
 
 class TestUnit(object):
     
@@ -31,3 +186,717 @@ class TestUnit(object):
         assert review.reviewMax == \
             (review.countGood + review.countNegative + review.countNeutral)
       
+    def testFilmFrontier(self):
+        configParameters = {'maxID': 100, 'databaseName': 'db', 'dataPathFilms': 'films',
+                            'dataPathMisses': 'misses', 'dataPathFrontier': 'frontier'}
+        frontier = FF.FilmFrontier(configParameters,
+                                   {'db': {'films': None, 'misses': None, 'frontier': None}})
+        for filmID in range(0, 101, 2):
+            frontier.markVisited(filmID)
+        
+        frontier.markVisited(4)
+        assert frontier.visitedCount == 51
+        assert frontier.isVisited(100) and not frontier.isVisited(99)
+        
+        filmIDs = frontier.sampleUnvisited(20)
+        assert len(set(filmIDs)) == 20
+        assert all(filmID % 2 == 1 for filmID in filmIDs)
+        
+        frontier.markBlocked(1)
+        frontier.markBlocked(3)
+        frontier.unmarkBlocked(3)
+        assert frontier.blockedCount == 1
+        assert sorted(frontier.sampleUnvisited(1000)) == list(range(3, 100, 2))
+
+    def testFilmFrontierConcurrentSave(self):
+        configParameters = {'maxID': 100, 'databaseName': 'db', 'dataPathFilms': 'films',
+                            'dataPathMisses': 'misses', 'dataPathFrontier': 'frontier'}
+        mongoClient = MockClient()
+        mongoClient.db.misses.insert_many([{'_id': 7, 'blocked': True}, {'_id': 8, 'blocked': True}])
+        first  = FF.FilmFrontier(configParameters, mongoClient)
+        second = FF.FilmFrontier(configParameters, mongoClient)
+        first.loadFromMongoDB()
+        second.loadFromMongoDB()
+        
+        mongoClient.db.films.insert_many([{'_id': filmID} for filmID in (1, 2, 3)])
+        first.syncFilmIDs([1, 2])
+        second.syncFilmIDs([3])
+        mongoClient.db.misses.update_one({'_id': 8}, {'$set': {'blocked': False}})
+        second.unmarkBlocked(8)
+        second.saveToMongoDB()
+        first.saveToMongoDB()
+        
+        frontier = FF.FilmFrontier(configParameters, mongoClient)
+        frontier.loadFromMongoDB()
+        assert [filmID for filmID in range(101) if frontier.isVisited(filmID)] == [1, 2, 3]
+        assert frontier.visitedCount == 3 and first.versions['visited'] == 2
+        assert [filmID for filmID in range(101) if frontier.isBlocked(filmID)] == [7]
+        
+        mongoClient.db.films.delete_one({'_id': 3})
+        mongoClient.db.films.insert_one({'_id': 50})
+        frontier.loadFromMongoDB()
+        assert frontier.isVisited(50) and not frontier.isVisited(3)
+        
+    def testFilmMissRegistry(self):
+        mongoClient = MockClient()
+        registry    = FM.FilmMissRegistry({'missRetryDays': 30, 'databaseName': 'db', 'dataPathMisses': 'misses'},
+                                          mongoClient)
+        misses      = mongoClient.db.misses
+        retryDays   = []
+        for _ in range(8):
+            registry.registerMiss(1, 'status/503')
+            record = misses.find_one({'_id': 1})
+            retryDays.append((record['retryAfter'] - record['missTime']).days)
+        
+        assert retryDays == [1, 2, 4, 8, 16, 32, 32, 32] and record['attempts'] == 8
+        registry.registerMiss(2, 'status/404')
+        registry.registerMiss(2, 'noJSON')
+        record = misses.find_one({'_id': 2})
+        assert record['reason'] == 'noJSON' and (record['retryAfter'] - record['missTime']).days == 60
+        
+        misses.update_one({'_id': 1}, {'$set': {'retryAfter': datetime.now() - timedelta(days = 1)}})
+        assert sorted(registry.blockedIDs([1, 2, 3])) == [1, 2]
+        assert registry.releaseExpired() == [1]
+        assert registry.blockedIDs([1, 2, 3]) == [2] and registry.releaseExpired() == []
+        
+    def testAsyncCrawler(self):
+        server, baseURL  = startStubServer()
+        configParameters = {'requestsPerMinute': 1200, 'requestBurst': 5,
+                            'concurrency': 50, 'jitterTime': 0, 'jobRetries': 2, 'requestTimeout': 10}
+        results  = []
+        attempts = {}
+        failed   = []
+        
+        async def handler(path, crawler):
+            attempts[path] = attempts.get(path, 0) + 1
+            if path == 'broken/' or (path == '3/' and attempts[path] == 1):
+                raise ConnectionError(path)
+            results.append(await crawler.fetch(baseURL + path))
+            if path == '0/':
+                crawler.putAll(['nested/'])
+        
+        timeStart = monotonic()
+        crawler   = AM.AsyncCrawler(configParameters, {})
+        crawler.RetryBackoff = 0.01
+        crawler.putAll([f'{i}/' for i in range(15)] + ['missing/', 'broken/'])
+        crawler.run(handler, failed.append)
+        server.shutdown()
+        
+        assert len(results) == 17
+        assert (404, b'/missing/') in results
+        assert (200, b'/7/') in results and (200, b'/3/') in results and (200, b'/nested/') in results
+        assert attempts['3/'] == 2 and attempts['broken/'] == 3 and failed == ['broken/']
+        assert monotonic() - timeStart >= 0.5
+        
+    def testHTTPSessionPool(self):
+        server, baseURL  = startStubServer()
+        configParameters = {'poolSize': 2, 'requestRetries': 0, 'requestTimeout': 5}
+        http = HS.HTTPSessionPool(configParameters, {'User-Agent': 'test'})
+        for i in range(5):
+            assert http.get(baseURL + f'{i}/').content == f'/{i}/'.encode()
+        
+        assert http.getStats() == {'requests': 5, 'connections': 1, 'reused': 4}
+        for i in range(3):
+            assert http.get(f'http://kinopoisk.test/{i}/', proxies = {'http': baseURL}).content == \
+                   f'http://kinopoisk.test/{i}/'.encode()
+        
+        assert http.getStats() == {'requests': 8, 'connections': 2, 'reused': 6}
+        http.close()
+        server.shutdown()
+        
+    def testFilmJSONExtractor(self):
+        extractor = FJ.FilmJSONExtractor()
+        page      = ('<html><script>var a = "<b>";</script><div>Фильм</div>' +
+                     '<script type="application/ld+json">{"name": "Зелёная миля", "url": "/film/435/"}</script>' +
+                     '<script type="application/ld+json">{"name": "?"}</script></html>').encode('utf-8')
+        
+        assert extractor.extractJSON(page) == {'name': 'Зелёная миля', 'url': '/film/435/'}
+        assert extractor.soupExtract(page) == extractor.fastExtract(page)
+        assert extractor.extractJSON(b'<html><script>{}</script></html>') is None
+        assert extractor.extractJSON(b"<script type='application/ld+json'>{\"a\": 1}</script>") == {'a': 1}
+        
+    def testParseReviewPage(self):
+        page = ('<div class="response bad" itemprop="reviews"><p class="sub_title">Title</p>' +
+                '<a itemprop="name">author</a><span class="date">5 марта 2015 | 12:30</span>' +
+                '<span itemprop="reviewBody">Text\r of review</span></div>').encode('utf-8')
+        
+        reviews = RP.parseReviewPage(page)
+        assert len(reviews) == 1
+        assert reviews[0].author      == 'author'
+        assert reviews[0].reviewClass == 2
+        assert reviews[0].dateAndTime == datetime(2015, 3, 5, 12, 30)
+        assert reviews[0].reviewText  == 'Text of review'
+        
+    def testReviewPipelineWriteStage(self):
+        class StubMining(object):
+            lock   = threading.Lock()
+            logger = type('Logger', (), {'error': lambda self, message: errors.append(message)})()
+            
+            def reviewHeaderToMongoDB(self, review):
+                raise ConnectionError(review)
+                
+            def reviewPageToMongoDB(self, filmID, page, reviews):
+                if page == 1:
+                    raise ConnectionError(page)
+                written.append((filmID, page))
+                
+            def reviewPageDone(self, filmID):
+                done.append(filmID)
+        
+        class StubQueue(object):
+            def jobsDone(self, jobs):
+                journal.extend(('done', job) for job in jobs)
+            def jobsFailed(self, jobs):
+                journal.extend(('failed', job) for job in jobs)
+        
+        errors, written, done, journal = [], [], [], []
+        pipeline = RP.ReviewPipeline.__new__(RP.ReviewPipeline)
+        pipeline.reviewMining = StubMining()
+        pipeline.workQueue    = StubQueue()
+        pipeline.writeQueue   = RP.queue.Queue()
+        for message in [('header', 435, 'header'), ('page', 435, 1, ['review']), ('page', 435, 2, ['review']), None]:
+            pipeline.writeQueue.put(message)
+        
+        pipeline.writeStage()
+        assert written == [(435, 2)] and done == [435, 435]
+        assert len(errors) == 2 and errors[1].startswith('435 -> Page is not written') and errors[1].endswith('| review')
+        assert journal == [('failed', (435, None)), ('failed', (435, 1)), ('done', (435, 2))]
+        
+    def testBufferedFilmWriter(self):
+        collection = StubCollection()
+        refresh    = StubCollection()
+        scheduler  = RF.RefreshScheduler({'refreshFilms': 0, 'refreshMinAgeDays': 7, 'refreshDefaultAge': 365,
+                                          'refreshReviewWeight': 10, 'databaseName': 'userReviews',
+                                          'dataPathFilms': 'films', 'dataPathRefresh': 'refreshState'},
+                                         {'userReviews': {'films': collection, 'refreshState': refresh}})
+        writer     = FW.BufferedFilmWriter({'writeBatchSize': 3, 'writeFlushTime': 60}, collection,
+                                           scheduler = scheduler)
+        writer.start()
+        for filmID in range(7):
+            writer.add(FC.Film(_id = filmID))
+        
+        assert [len(batch) for batch in collection.batches] == [3, 3]
+        assert len(writer.close()) == 7
+        assert [len(batch) for batch in collection.batches] == [3, 3, 1]
+        assert '_id' not in collection.batches[0][0]._doc['$setOnInsert']
+        assert [[request._filter['_id'] for request in batch] for batch in refresh.batches] == [[0, 1, 2], [3, 4, 5], [6]]
+        
+    def testBufferedFilmWriterConnectionError(self):
+        class FailingCollection(StubCollection):
+            def bulk_write(self, requests, ordered = True):
+                if len(self.batches) == 0 and not self.updates:
+                    self.updates.append('failed')
+                    raise FW.PyMongoError('connection refused')
+                return StubCollection.bulk_write(self, requests, ordered)
+        
+        collection = FailingCollection()
+        writer     = FW.BufferedFilmWriter({'writeBatchSize': 2, 'writeFlushTime': 60}, collection)
+        for filmID in range(2):
+            writer.add(FC.Film(_id = filmID))
+        
+        assert collection.batches == [] and len(writer.buffer) == 2
+        writer.add(FC.Film(_id = 2))
+        assert [request._filter['_id'] for request in collection.batches[0]] == [0, 1, 2]
+        assert len(writer.close()) == 3 and writer.buffer == []
+        
+    def testBufferedFilmWriterSideEffectError(self):
+        class FailingStorage(object):
+            def filmsToMongoDB(self, films):
+                raise RuntimeError('persons down')
+            def recordFetches(self, filmIDs):
+                raise FW.PyMongoError('refresh down')
+        
+        class JobRecorder(object):
+            def __init__(self):
+                self.done, self.failed = [], []
+            def jobsDone(self, jobs):
+                self.done += jobs
+            def jobsFailed(self, jobs):
+                self.failed += jobs
+        
+        collection = StubCollection()
+        writer     = FW.BufferedFilmWriter({'writeBatchSize': 2, 'writeFlushTime': 60}, collection,
+                                           personStorage = FailingStorage(), scheduler = FailingStorage())
+        recorder   = JobRecorder()
+        writer.setWorkQueue(recorder)
+        for filmID in range(2):
+            writer.add(FC.Film(_id = filmID), job = filmID)
+        
+        assert recorder.done == [0, 1] and recorder.failed == []
+        assert writer.errorCount == 2 and len(writer.close()) == 2
+        
+    def testReviewStorage(self):
+        collections = {'reviews': StubCollection(), 'reviewItems': StubCollection()}
+        storage     = RS.ReviewStorage({'reviewLayout': 'normalized', 'databaseName': 'userReviews',
+                                        'dataPathReviews': 'reviews', 'dataPathReviewItems': 'reviewItems'},
+                                       {'userReviews': collections})
+        reviews     = [RC.Review(author = 'first'), RC.Review(author = 'second')]
+        storage.pageToMongoDB(435, 2, reviews)
+        storage.pageToMongoDB(435, 2, reviews)
+        
+        items = [request._doc for request in collections['reviewItems'].batches[0]]
+        assert [item['_id'] for item in items] == ['435/2/0', '435/2/1']
+        assert items[1]['film'] == 435 and items[1]['author'] == 'second'
+        assert collections['reviewItems'].batches[0][0]._filter == collections['reviewItems'].batches[1][0]._filter
+        assert collections['reviews'].updates[0] == ({'_id': 435}, {'$addToSet': {'pages': 2}})
+        
+    def testReviewStorageEmbeddedPage(self):
+        mongoClient = MockClient()
+        storage     = RS.ReviewStorage({'reviewLayout': 'embedded', 'databaseName': 'userReviews',
+                                        'dataPathReviews': 'reviews', 'dataPathReviewItems': 'reviewItems'},
+                                       mongoClient)
+        storage.headerToMongoDB(RC.ReviewForFilm(_id = 435, reviewMax = 3))
+        storage.pageToMongoDB(435, 2, [RC.Review(author = 'first'), RC.Review(author = 'second')])
+        storage.pageToMongoDB(435, 2, [RC.Review(author = 'first'), RC.Review(author = 'second')])
+        storage.pageToMongoDB(435, 1, [RC.Review(author = 'third')])
+        
+        record = mongoClient.userReviews.reviews.find_one({'_id': 435})
+        assert [review['author'] for review in record['reviews']] == ['first', 'second', 'third']
+        assert record['pages'] == [2, 1]
+        
+    def testReviewHeaderMerge(self):
+        collections = {'reviews': StubCollection(), 'reviewItems': StubCollection()}
+        storage     = RS.ReviewStorage({'reviewLayout': 'embedded', 'databaseName': 'userReviews',
+                                        'dataPathReviews': 'reviews', 'dataPathReviewItems': 'reviewItems'},
+                                       {'userReviews': collections})
+        storage.headerMergeToMongoDB(RC.ReviewForFilm(_id = 435, reviewMax = 12))
+        
+        filter, update = collections['reviews'].updates[0]
+        assert filter == {'_id': 435} and update['$set']['reviewMax'] == 12
+        assert update['$setOnInsert'] == {'pages': [], 'reviews': []}
+        assert not {'_id', 'pages', 'reviews'} & set(update['$set'])
+        
+    def testAddNewReviewsLegacyDates(self):
+        mongoClient = MockClient()
+        storage     = RS.ReviewStorage({'reviewLayout': 'embedded', 'databaseName': 'userReviews',
+                                        'dataPathReviews': 'reviews', 'dataPathReviewItems': 'reviewItems'},
+                                       mongoClient)
+        mongoClient.userReviews.reviews.insert_one({'_id': 435, 'pages': [1],
+                                                    'reviews': [{'author': 'first', 'dateAndTime': '12:30|05.03.2015'}]})
+        reviews = [RC.Review(author = 'first',  dateAndTime = datetime(2015, 3, 5, 12, 30)),
+                   RC.Review(author = 'second', dateAndTime = datetime(2015, 3, 5, 12, 30))]
+        
+        assert storage.addNewReviews(435, reviews) == 1
+        assert [review['author'] for review in mongoClient.userReviews.reviews.find_one({'_id': 435})['reviews']] == \
+            ['first', 'second']
+        
+    def testMigrateReviewDates(self):
+        collections = {'reviews': StubCollection(), 'reviewItems': StubCollection()}
+        collections['reviewItems'].documents = [{'_id': f'435/1/{i}', 'dateAndTime': '12:30|05.03.2015'}
+                                                for i in range(3)]
+        storage = RS.ReviewStorage({'reviewLayout': 'normalized', 'databaseName': 'userReviews',
+                                    'dataPathReviews': 'reviews', 'dataPathReviewItems': 'reviewItems'},
+                                   {'userReviews': collections})
+        storage.BatchSize = 2
+        storage.migrateDatesToNative()
+        
+        batches = collections['reviewItems'].batches
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert batches[1][0]._filter == {'_id': '435/1/2'}
+        assert batches[1][0]._doc    == {'$set': {'dateAndTime': datetime(2015, 3, 5, 12, 30)}}
+        
+    def testWorkQueue(self):
+        workQueue = WQ.WorkQueue({'threads': 3, 'sleepTime': 0, 'rateControl': 0, 'jobRetries': 2,
+                                  'crawlMode': 'local', 'leaseTime': 600, 'claimWaitTime': 10}, 'test')
+        attempts  = {}
+        done      = []
+        failed    = []
+        
+        def handler(job):
+            attempts[job] = attempts.get(job, 0) + 1
+            if job % 4 == 0 and (job == 0 or attempts[job] < 2):
+                raise ConnectionError(job)
+            
+            if job == 10:
+                workQueue.put(100)
+                
+            done.append(job)
+        
+        for job in range(12):
+            workQueue.put(job)
+            
+        stats = workQueue.run(handler, (ConnectionError,), failed.append)
+        assert sorted(done)   == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 100]
+        assert failed         == [0]
+        assert attempts[0]    == 3
+        assert len(stats)     == 3
+        assert sum(workStats['retried'] for workStats in stats) == 5
+        assert sum(workStats['done']    for workStats in stats) == 12
+        
+    def testWorkQueueJournal(self):
+        class StubJournal(object):
+            def __init__(self):
+                self.events = []
+            def addJobs(self, stage, jobs):
+                self.events += [('pending', job) for job in jobs]
+            def leaseJob(self, stage, job):
+                self.events.append(('leased', job))
+            def doneJob(self, stage, job):
+                self.events.append(('done', job))
+            def failJob(self, stage, job):
+                self.events.append(('failed', job))
+            def clearStage(self, stage):
+                self.events.append(('clear', stage))
+        
+        def handler(job):
+            if job[1] == 2:
+                raise ConnectionError(job)
+        
+        journal   = StubJournal()
+        workQueue = WQ.WorkQueue({'threads': 1, 'sleepTime': 0, 'rateControl': 0, 'jobRetries': 1,
+                                  'crawlMode': 'local', 'leaseTime': 600, 'claimWaitTime': 10}, 'review', journal)
+        workQueue.putAll([(435, 1), (435, 2)])
+        workQueue.run(handler, (ConnectionError,))
+        assert journal.events == [('pending', (435, 1)), ('pending', (435, 2)),
+                                  ('leased',  (435, 1)), ('done',    (435, 1)),
+                                  ('leased',  (435, 2)), ('leased',  (435, 2)), ('failed', (435, 2)),
+                                  ('clear',   'review')]
+        
+    def testWorkQueueDoneAfterWrite(self):
+        class StubJournal(object):
+            def __init__(self):
+                self.events = []
+            def addJobs(self, stage, jobs):
+                pass
+            def leaseJob(self, stage, job):
+                self.events.append(('leased', job))
+            def doneJob(self, stage, job):
+                self.events.append(('done', job))
+            def doneJobs(self, stage, jobs):
+                self.events += [('written', job) for job in jobs]
+            def clearStage(self, stage):
+                self.events.append(('clear', stage))
+        
+        def handler(job):
+            if job == 2:
+                return False
+            writer.add(FC.Film(_id = job), job)
+            journal.events.append(('buffered', job))
+            return True
+        
+        journal   = StubJournal()
+        writer    = FW.BufferedFilmWriter({'writeBatchSize': 10, 'writeFlushTime': 60}, StubCollection())
+        workQueue = WQ.WorkQueue({'threads': 1, 'sleepTime': 0, 'rateControl': 0, 'jobRetries': 1,
+                                  'crawlMode': 'local', 'leaseTime': 600, 'claimWaitTime': 10}, 'film', journal)
+        writer.setWorkQueue(workQueue)
+        workQueue.putAll([1, 2, 3])
+        workQueue.run(handler, (ConnectionError,), flushHandler = writer.flush)
+        assert journal.events == [('leased',  1), ('buffered', 1), ('leased', 2), ('done', 2),
+                                  ('leased',  3), ('buffered', 3), ('written', 1), ('written', 3),
+                                  ('clear',   'film')]
+        
+    def testCrawlJournalLocalResume(self):
+        journal = CJ.CrawlJournal({'leaseTime': 600, 'databaseName': 'userReviews', 'dataPathJournal': 'crawlJournal'},
+                                  MockClient())
+        journal.addJobs('film', [1, 2, 3])
+        journal.leaseJob('film', 1)
+        journal.leaseJob('film', 2)
+        journal.doneJob('film', 2)
+        
+        assert sorted(journal.pendingJobs('film')) == [3]
+        assert sorted(journal.pendingJobs('film', allLeased = True)) == [1, 3]
+        
+    def testCreateReviewIDArray(self):
+        mongoClient = MockClient()
+        dataMining  = DM.ClassDataMining()
+        dataMining.configParameters  = {'crawlMode': 'local', 'leaseTime': 600, 'databaseName': 'userReviews',
+                                        'dataPathJournal': 'crawlJournal'}
+        dataMining.journal           = CJ.CrawlJournal(dataMining.configParameters, mongoClient)
+        dataMining.collectionFilms   = mongoClient.userReviews.films
+        dataMining.collectionReviews = mongoClient.userReviews.reviews
+        dataMining.collectionFilms.insert_many([{'_id': filmID, 'ratingCount': 10} for filmID in (1, 2, 3, 4)] +
+                                               [{'_id': 5, 'ratingCount': 0}])
+        dataMining.collectionReviews.insert_many([{'_id': 2, 'reviewMax': 450, 'pages': [1, 3]},
+                                                  {'_id': 3, 'reviewMax': 400, 'pages': [2, 1]},
+                                                  {'_id': 4, 'reviewMax': 0,   'pages': []}])
+        
+        assert dataMining.createReviewIDArray() == {1: [], 2: [2]}
+        
+        dataMining.journal.addJobs('review', [(3, 2), (6, None)])
+        assert dataMining.createReviewIDArray() == {3: [2], 6: []}
+        
+    def testWorkQueueDistributed(self):
+        stub       = KS.KinopoiskStubServer({'stubLatency': 5, 'stubMissRate': 0, 'stubErrorRate': 0,
+                                             'stubThrottleRate': 0, 'stubReviewsMax': 10, 'stubPageSize': 5})
+        baseURL    = stub.start()
+        collection = LockedCollection(MockClient()['userReviews']['crawlJournal'])
+        config     = {'threads': 2, 'sleepTime': 0, 'rateControl': 0, 'jobRetries': 1, 'crawlMode': 'distributed',
+                      'leaseTime': 600, 'claimWaitTime': 0.01, 'databaseName': 'userReviews',
+                      'dataPathJournal': 'crawlJournal'}
+        journals   = {}
+        for (owner, leaseTime) in (('first', 600), ('second', 600), ('crashed', -1)):
+            journals[owner]       = CJ.CrawlJournal(dict(config, leaseTime = leaseTime),
+                                                    {'userReviews': {'crawlJournal': collection}})
+            journals[owner].owner = owner
+        
+        assert journals['first'].acquirePlan('film') is True
+        assert journals['second'].acquirePlan('film') is False
+        
+        jobs = list(range(1, 21))
+        journals['first'].addJobs('film', jobs)
+        assert journals['crashed'].claimJob('film') == (1, 1)
+        
+        done = []
+        def handler(owner, job):
+            response = requests.get(baseURL + f'{job}/')
+            assert response.status_code == 200
+            done.append((owner, job))
+        
+        workers = [threading.Thread(target = WQ.WorkQueue(config, 'film', journals[owner]).run,
+                                    args = (lambda job, owner = owner: handler(owner, job), (ConnectionError,)))
+                   for owner in ('first', 'second')]
+        for thr in workers:
+            thr.start()
+        for thr in workers:
+            thr.join()
+        stub.stop()
+        
+        assert sorted(job for (_, job) in done) == jobs
+        assert {owner for (owner, _) in done} == {'first', 'second'}
+        assert collection.find_one({'stage': 'film'}) is None
+        
+    def testResponseArchive(self, tmp_path):
+        archive = RA.ResponseArchive({'dataPathArchive': str(tmp_path), 'archiveCompression': 'gzip'})
+        archive.store('https://www.kinopoisk.ru/film/435/', 503, b'<html>busy</html>')
+        archive.store('https://www.kinopoisk.ru/film/435/', 200, b'<html>film</html>')
+        archive.store('https://www.kinopoisk.ru/film/326/', 200, b'<html>film</html>')
+        
+        assert len(list((tmp_path / 'objects').rglob('*.gz'))) == 2
+        assert list(archive.iterResponses()) == [('https://www.kinopoisk.ru/film/435/', 200, b'<html>film</html>'),
+                                                 ('https://www.kinopoisk.ru/film/326/', 200, b'<html>film</html>')]
+        
+    def testRefreshScheduler(self):
+        mongoClient = MockClient()
+        scheduler   = RF.RefreshScheduler({'refreshFilms': 10, 'refreshMinAgeDays': 7, 'refreshDefaultAge': 365,
+                                           'refreshReviewWeight': 10, 'databaseName': 'userReviews',
+                                           'dataPathFilms': 'films', 'dataPathRefresh': 'refreshState'},
+                                          mongoClient)
+        timeNow     = datetime.now()
+        
+        assert scheduler.priority(1000, {'filmFetchedAt': timeNow - timedelta(days = 3)}, timeNow) == 0
+        assert scheduler.priority(1000, None, timeNow) > scheduler.priority(1000, {'filmFetchedAt': timeNow}, timeNow)
+        assert scheduler.priority(1000, {'filmFetchedAt': timeNow - timedelta(days = 30)}, timeNow) > \
+               scheduler.priority(10,   {'filmFetchedAt': timeNow - timedelta(days = 30)}, timeNow)
+        assert scheduler.priority(10,   {'filmFetchedAt': timeNow - timedelta(days = 30), 'reviewRate': 5.0}, timeNow) > \
+               scheduler.priority(1000, {'filmFetchedAt': timeNow - timedelta(days = 30), 'reviewRate': 0.0}, timeNow)
+        assert scheduler.priority(1000, {'fetchedAt': timeNow - timedelta(days = 3)}, timeNow) == 0
+        assert scheduler.changedFields({'_id': 1, 'ratingCount': 5, 'year': 2000},
+                                       {'_id': 1, 'ratingCount': 6, 'year': 2000}) == {'ratingCount': 6}
+        
+        mongoClient.userReviews.films.insert_many([{'_id': 1, 'ratingCount': 100}, {'_id': 2, 'ratingCount': 100}])
+        mongoClient.userReviews.refreshState.insert_many([{'_id': 1, 'filmFetchedAt': timeNow - timedelta(days = 30)},
+                                                          {'_id': 2, 'filmFetchedAt': timeNow - timedelta(days = 30)}])
+        scheduler.recordFetch(1, {'ETag': 'reviews'}, 'review')
+        scheduler.recordFetches([2])
+        assert scheduler.scheduleFilms() == [1]
+        assert mongoClient.userReviews.refreshState.find_one({'_id': 1})['reviewETag'] == 'reviews'
+        
+    def testRateController(self):
+        controller = RT.RateController({'requestsPerMinute': 60, 'rateMin': 1, 'rateMax': 120,
+                                        'rateIncrease': 6, 'rateDecrease': 50})
+        assert controller.report(200, {}) is False
+        assert controller.rate == 60.1
+        assert controller.report(404, {}, b'<html>not found</html>') is False
+        
+        assert controller.report(429, {'Retry-After': '30'}) is True
+        assert 30 < controller.rate < 30.1
+        assert 29 < controller.reserve() <= 30
+        assert controller.report(200, {}, b'', 'https://www.kinopoisk.ru/showcaptcha?retpath=') is True
+        assert controller.report(200, {}, '<html><head><title>Ой!</title></head></html>'.encode('utf-8')) is True
+        assert controller.report(200, {}, b'<title>Film</title><a href="/showcaptcha">') is False
+        assert controller.stats == {'success': 3, 'throttled': 3}
+        
+        for _ in range(10):
+            controller.report(403, {})
+        assert controller.rate == 1
+        assert controller.retryAfter({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+        assert controller.retryAfter({'Retry-After': 'soon'}) is None
+        
+    def testProxyPool(self):
+        proxyServers = [startStubServer() for _ in range(2)]
+        deadSocket   = socket.socket()
+        deadSocket.bind(('127.0.0.1', 0))
+        deadProxy    = f'http://127.0.0.1:{deadSocket.getsockname()[1]}'
+        deadSocket.close()
+        
+        configParameters = {'poolSize': 2, 'requestRetries': 0, 'requestTimeout': 5, 'rateControl': 0,
+                            'proxies': ', '.join(proxyURL for (_, proxyURL) in proxyServers),
+                            'proxyMode': 'request', 'proxyMaxFailures': 2, 'proxyEjectTime': 600}
+        proxyPool = PP.ProxyPool(configParameters)
+        http      = HS.HTTPSessionPool(configParameters, {}, proxyPool = proxyPool)
+        bodies    = [http.get(f'http://kinopoisk.test/film/{i}/').content for i in range(20)]
+        http.close()
+        for (server, _) in proxyServers:
+            server.shutdown()
+        
+        stats = proxyPool.getStats()
+        assert bodies[-1] == b'http://kinopoisk.test/film/19/'
+        assert sum(proxyStats['requests'] for proxyStats in stats) == 20
+        assert all(proxyStats['healthy'] and proxyStats['failures'] == 0 for proxyStats in stats)
+        
+        configParameters['proxies'] = deadProxy
+        deadPool = PP.ProxyPool(configParameters)
+        http     = HS.HTTPSessionPool(configParameters, {}, proxyPool = deadPool)
+        for i in range(2):
+            try:
+                http.get(f'http://kinopoisk.test/film/{i}/')
+                assert False
+            except requests.ConnectionError:
+                pass
+        
+        stats = deadPool.getStats()
+        assert stats[0]['failures'] == 2 and stats[0]['ejections'] == 1 and not stats[0]['healthy']
+        assert deadPool.chooseProxy()['url'] == deadProxy
+        
+    def testKinopoiskStub(self):
+        stub    = KS.KinopoiskStubServer({'stubLatency': 0, 'stubMissRate': 0, 'stubErrorRate': 0,
+                                          'stubThrottleRate': 0, 'stubReviewsMax': 500, 'stubPageSize': 1})
+        baseURL = stub.start()
+        filmID  = next(filmID for filmID in range(1, 100) if 200 < stub.reviewCount(filmID) <= 400)
+        http    = HS.HTTPSessionPool({'poolSize': 1, 'requestRetries': 0, 'requestTimeout': 5}, {})
+        
+        dataJSON = FJ.FilmJSONExtractor().extractJSON(http.get(baseURL + f'{filmID}/').content)
+        assert dataJSON['url'] == f'https://www.kinopoisk.ru/film/{filmID}/'
+        assert b'<li class="all"><b>' in http.get(baseURL + f'{filmID}/reviews').content
+        
+        pageURL = baseURL + f'{filmID}/reviews/ord/date/status/all/perpage/200/page/%d/'
+        reviews = [RV.ReviewPageParser().reviewParsingForContent(http.get(pageURL % page).content) for page in (1, 2)]
+        assert len(reviews[0]) == 200 and len(reviews[0]) + len(reviews[1]) == stub.reviewCount(filmID)
+        assert http.get(baseURL + 'unknown').status_code == 404
+        
+        http.close()
+        stub.stop()
+        assert stub.stats[('page', 200)] == 2 and stub.stats[('unknown', 404)] == 1
+        
+    def testPersonStorage(self):
+        mongoClient = MockClient()
+        storage     = PS.PersonStorage({'databaseName': 'userReviews', 'dataPathPersons': 'persons',
+                                        'dataPathFilmPersons': 'filmPersons'}, mongoClient)
+        actor       = FC.Person(_id = 3, name = 'actor')
+        film        = FC.Film(_id = 435, ratingValue = 8.0, directors = [FC.Person(_id = 2)], actors = [actor, actor])
+        persons     = mongoClient.userReviews.persons
+        storage.filmsToMongoDB([film.toDict()])
+        
+        assert sorted(edge['_id'] for edge in mongoClient.userReviews.filmPersons.find()) == \
+            ['435/actors/3', '435/directors/2']
+        assert persons.find_one({'_id': 3})['actors'] == {'ratingSum': 8.0, 'filmCount': 1, 'ratingAvg': 8.0}
+        
+        storage.filmsToMongoDB([film.toDict()])
+        assert persons.find_one({'_id': 3})['actors']['filmCount'] == 1
+        
+        film.ratingValue, film.directors = 6.5, []
+        storage.filmsToMongoDB([film.toDict()])
+        assert persons.find_one({'_id': 3})['actors'] == {'ratingSum': 6.5, 'filmCount': 1, 'ratingAvg': 6.5}
+        assert persons.find_one({'_id': 2})['directors'] == {'ratingSum': 0.0, 'filmCount': 0, 'ratingAvg': 0}
+        assert mongoClient.userReviews.filmPersons.count_documents({}) == 1
+        
+    def testPersonStorageConcurrentWrite(self):
+        class StaleCollection(BulkCollection):
+            def __init__(self, collection):
+                BulkCollection.__init__(self, collection)
+                self.staleReads = 1
+            def find(self, *args, **kwargs):
+                if self.staleReads > 0:
+                    self.staleReads -= 1
+                    return iter([])
+                return self.collection.find(*args, **kwargs)
+        
+        mongoClient = MockClient()
+        config      = {'databaseName': 'userReviews', 'dataPathPersons': 'persons', 'dataPathFilmPersons': 'filmPersons'}
+        film        = FC.Film(_id = 435, ratingValue = 8.0, actors = [FC.Person(_id = 3, name = 'actor')])
+        PS.PersonStorage(config, mongoClient).filmsToMongoDB([film.toDict()])
+        
+        storage = PS.PersonStorage(config, mongoClient)
+        storage.collectionFilmPersons = StaleCollection(mongoClient.userReviews.filmPersons)
+        film.ratingValue = 7.0
+        storage.filmsToMongoDB([film.toDict()])
+        assert mongoClient.userReviews.persons.find_one({'_id': 3})['actors'] == \
+            {'ratingSum': 7.0, 'filmCount': 1, 'ratingAvg': 7.0}
+        assert mongoClient.userReviews.filmPersons.find_one({'_id': '435/actors/3'})['rating'] == 7.0
+        
+    def testFilmAnalyticsPass(self):
+        collection = StubCollection()
+        collection.documents = [FC.Film(_id = 1, nameRU = 'A', year = 2000, genres = ['Драма'], ratingValue = 7.0,
+                                        timeForEpisode = 30, episodesCount = 10).toDict(),
+                                FC.Film(_id = 2, nameRU = 'B', year = 2000, genres = ['Драма', 'Комедия'],
+                                        ratingValue = 8.0, timeForEpisode = 120).toDict()]
+        filmPass   = FA.FilmAnalyticsPass([FA.ParamAccumulator('genres'), FA.ParamAccumulator('year', False),
+                                           FA.RatingAccumulator(), FA.TimeAccumulator()], 100)
+        
+        assert 'description' not in filmPass.projection() and 'actors' not in filmPass.projection()
+        results = dict(filmPass.run(collection))
+        assert results['genres'] == [('Драма', 2), ('Комедия', 1)] and results['year'] == [(2000, 2)]
+        assert results['filmRating'][0] == [('B', 8.0, 0), ('A', 7.0, 0)]
+        assert [film[0] for film in results['filmTime'][2]] == ['A', 'B']
+        
+    def testFilmAggregations(self):
+        collection = StubCollection()
+        collection.documents = [{'_id': 'Драма', 'count': 2}, {'_id': 'Комедия', 'count': 1}]
+        aggregations = FG.FilmAggregations(100)
+        
+        assert aggregations.countParam(collection, 'genres') == [('Драма', 2), ('Комедия', 1)]
+        aggregations.countParam(collection, 'year', False)
+        assert collection.pipelines[0][0][0] == {'$unwind': '$genres'}
+        assert collection.pipelines[1][0][0] == {'$group': {'_id': '$year', 'count': {'$sum': 1}}}
+        assert collection.pipelines[1][0][-1] == {'$sort': {'count': -1, '_id': 1}}
+        assert collection.pipelines[1][1] == {'allowDiskUse': True, 'batchSize': 100}
+        
+    def testResultSink(self):
+        collection      = StubCollection()
+        collection.name = 'analytic'
+        collection.find_one = lambda filter: None
+        sink = SK.ResultSink(collection, 2)
+        
+        sink.put('genres', [('Драма', 2)])
+        sink.put('genres', [('Драма', 3)])
+        assert collection.batches == [] and sink.findOne('genres')['valuesParam'] == [('Драма', 3)]
+        
+        sink.put('year', [(2000, 3)])
+        assert [request._filter for request in collection.batches[0]] == [{'nameParam': 'genres'}, {'nameParam': 'year'}]
+        assert collection.batches[0][0]._upsert and sink.findOne('genres') is None
+        
+        sink.put('countries', [])
+        assert sink.close()['results'] == 3 and len(collection.batches) == 2
+        
+    def testCountFilmReview(self):
+        class CountingCollection(BulkCollection):
+            def __init__(self, collection):
+                BulkCollection.__init__(self, collection)
+                self.filters = []
+            def find(self, filter = None, projection = None):
+                self.filters.append(filter)
+                return self.collection.find(filter, projection)
+        
+        mongoClient = MockClient()
+        analytics   = DA.DataAnalytics()
+        results     = {}
+        analytics.configParameters  = {'analyticBatchSize': 2}
+        analytics.collectionFilms   = CountingCollection(mongoClient.userReviews.films)
+        analytics.collectionReviews = mongoClient.userReviews.reviews
+        analytics.infoToMongoDB     = lambda nameParam, info: results.update({nameParam: info})
+        mongoClient.userReviews.films.insert_many([{'_id': filmID, 'nameRU': f'film {filmID}'} for filmID in (1, 2)])
+        mongoClient.userReviews.reviews.insert_many([{'_id': filmID, 'reviewMax': 10 * filmID, 'reviewPercent': 50.0,
+                                                      'countGood': 5, 'countNegative': 3, 'countNeutral': 2,
+                                                      'reviews': [{'author': 'first'}]} for filmID in (1, 2, 3)])
+        analytics.countFilmReview()
+        
+        reviewMax, reviewPercent = results['reviewCount']
+        assert [(review[0], review[1], review[2]) for review in reviewMax] == \
+            [(3, '?', 30), (2, 'film 2', 20), (1, 'film 1', 10)]
+        assert analytics.collectionFilms.filters == [{'_id': {'$in': [1, 2]}}, {'_id': {'$in': [3]}}]
+        
+    def testReviewDateHistograms(self):
+        analytics = DA.DataAnalytics
+        today     = datetime.combine(datetime.today().date(), datetime.min.time())
+        reviews   = [{'dateAndTime': today - timedelta(days = 40, hours = -12)},
+                     {'dateAndTime': today - timedelta(days = 40)},
+                     {'dateAndTime': today + timedelta(days = 3, hours = 1)}]
+        
+        reviewDate, reviewDateDay = analytics.reviewDateHistograms(reviews)
+        assert len(reviewDateDay) == 42 and reviewDateDay[0] == (today - timedelta(days = 40), 2)
+        assert reviewDateDay[-2] == (today, 0) and reviewDateDay[-1] == (today + timedelta(days = 3), 1)
+        assert sum(count for (_, count) in reviewDate) == 3 and reviewDate[0][0].day == 1
+        assert analytics.reviewDateHistograms([]) == ([(today.replace(day = 1), 0)], [(today, 0)])
+        
+        legacy = [{'dateAndTime': (today - timedelta(days = 40)).strftime('%H:%M|%d.%m.%Y')}] + reviews[1:]
+        assert analytics.reviewDateHistograms(legacy)[1][0] == (today - timedelta(days = 40), 2)